@@ -4,7 +4,7 @@
 
 {
     "name": "Account Cut-off Picking",
-    "version": "14.0.2.0.1",
+    "version": "14.0.2.1.0",
     "category": "Accounting",
     "license": "AGPL-3",
     "summary": "Accrued and prepaid expense/revenue from pickings",
@@ -12,7 +12,12 @@
     "maintainers": ["alexis-via"],
     "website": "https://github.com/OCA/account-closing",
     "depends": ["account_cutoff_base", "purchase_stock", "sale_stock"],
-    "data": ["views/res_config_settings.xml", "views/account_cutoff.xml"],
+    "data": [
+        "security/account_cutoff_accrual_picking_security.xml",
+        "security/ir.model.access.csv",
+        "views/res_config_settings.xml",
+        "views/account_cutoff.xml",
+    ],
     "images": [
         "images/accrued_expense_draft.jpg",
         "images/accrued_expense_journal_entry.jpg",
@@ -20,4 +25,6 @@
     ],
     "installable": True,
     "application": True,
+    "post_init_hook": "post_init_hook",
+    "uninstall_hook": "uninstall_hook",
 }
@@ -0,0 +1,15 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import SUPERUSER_ID, api
+
+from .models.stock_picking import CUTOFF_PICKING_INDEX_NAME
+
+
+def post_init_hook(cr, registry):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["account.cutoff.picking.ledger"]._rebuild()
+
+
+def uninstall_hook(cr, registry):
+    cr.execute('DROP INDEX IF EXISTS "%s"' % CUTOFF_PICKING_INDEX_NAME)
@@ -1,2 +1,6 @@
 from . import res_company
 from . import account_cutoff
+from . import account_cutoff_picking_ledger
+from . import account_move
+from . import stock_move
+from . import stock_picking
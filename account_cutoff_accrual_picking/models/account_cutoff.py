@@ -2,6 +2,8 @@
 # @author: Alexis de Lattre <alexis.delattre@akretion.com>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+import json
+from collections import defaultdict
 from datetime import datetime
 
 import pytz
@@ -9,7 +11,7 @@ from dateutil.relativedelta import relativedelta
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
-from odoo.tools import float_compare, float_is_zero
+from odoo.tools import float_compare, float_is_zero, str2bool
 from odoo.tools.misc import format_date, format_datetime, formatLang
 
 
@@ -40,25 +42,33 @@ class AccountCutoff(models.Model):
     def _default_picking_interval_days(self):
         return self.env.company.default_cutoff_accrual_picking_interval_days
 
+    @api.model
+    def _get_order_line_key_field(self, order_type):
+        """Return the field of the cut-off line that links to the order line"""
+        return order_type == "purchase" and "purchase_line_id" or "sale_line_id"
+
+    def _get_line_source_key_fields(self):
+        return super()._get_line_source_key_fields() + [
+            "purchase_line_id",
+            "sale_line_id",
+        ]
+
     def picking_prepare_cutoff_line(self, vdict, account_mapping):
         dpo = self.env["decimal.precision"]
         qty_prec = dpo.precision_get("Product Unit of Measure")
         if self.cutoff_type in ("accrued_expense", "accrued_revenue"):
             qty = vdict["precut_delivered_qty"] - vdict["precut_invoiced_qty"]
-            qty_label = _("Pre-cutoff delivered quantity minus invoiced quantity:")
         elif self.cutoff_type in ("prepaid_expense", "prepaid_revenue"):
             qty = vdict["precut_invoiced_qty"] - vdict["precut_delivered_qty"]
-            qty_label = _("Pre-cutoff invoiced quantity minus delivered quantity:")
 
         if float_compare(qty, 0, precision_digits=qty_prec) <= 0:
             return False
 
-        company_currency = self.company_currency_id
         currency = vdict["currency"]
         sign = self.cutoff_type in ("accrued_expense", "prepaid_revenue") and -1 or 1
         amount = qty * vdict["price_unit"] * sign
-        amount_company_currency = vdict["currency"]._convert(
-            amount, company_currency, self.company_id, self.cutoff_date
+        amount_company_currency = self._convert_to_company_currency(
+            amount, vdict["currency"]
         )
 
         # Use account mapping
@@ -67,42 +77,14 @@ class AccountCutoff(models.Model):
             cutoff_account_id = account_mapping[account_id]
         else:
             cutoff_account_id = account_id
-        uom_name = vdict["product"].uom_id.name
-        notes = vdict["notes"]
-        precut_delivered_qty_fl = formatLang(
-            self.env, vdict.get("precut_delivered_qty", 0), dp="Product Unit of Measure"
-        )
-        notes += (
-            "\n"
-            + _("Pre-cutoff delivered quantity:")
-            + " %s %s"
-            % (
-                precut_delivered_qty_fl,
-                uom_name,
-            )
-        )
-        if vdict.get("precut_delivered_logs"):
-            notes += (
-                "\n"
-                + _("Pre-cutoff delivered quantity details:")
-                + "\n%s" % "\n".join(vdict["precut_delivered_logs"])
-            )
-        precut_invoiced_qty_fl = formatLang(
-            self.env, vdict.get("precut_invoiced_qty", 0), dp="Product Unit of Measure"
-        )
-        notes += (
-            "\n"
-            + _("Pre-cutoff invoiced quantity:")
-            + " %s %s" % (precut_invoiced_qty_fl, uom_name)
-        )
-        if vdict.get("precut_invoiced_logs"):
-            notes += (
-                "\n"
-                + _("Pre-cutoff invoiced quantity details:")
-                + "\n%s" % "\n".join(vdict["precut_invoiced_logs"])
-            )
-        qty_fl = formatLang(self.env, qty, dp="Product Unit of Measure")
-        notes += "\n%s %s %s" % (qty_label, qty_fl, uom_name)
+        # the notes are rendered from these facts when they are displayed
+        audit = {
+            "order_type": vdict["order_type"],
+            "delivered_qty": vdict["precut_delivered_qty"],
+            "delivered_moves": vdict["precut_delivered_moves"],
+            "invoiced_qty": vdict["precut_invoiced_qty"],
+            "invoice_lines": vdict["precut_invoiced_lines"],
+        }
 
         vals = {
             "parent_id": self.id,
@@ -117,8 +99,12 @@ class AccountCutoff(models.Model):
             "amount": amount,
             "cutoff_amount": amount_company_currency,
             "price_origin": vdict.get("price_origin"),
-            "notes": notes,
+            "notes": vdict["notes"] or False,
+            "picking_audit": json.dumps(audit, separators=(",", ":")),
         }
+        order_line = vdict.get("order_line")
+        if order_line:
+            vals[self._get_order_line_key_field(vdict["order_type"])] = order_line.id
 
         if (
             self.cutoff_type in ("accrued_expense", "accrued_revenue")
@@ -127,13 +113,13 @@ class AccountCutoff(models.Model):
         ):
             # vdict["price_unit"] is a price without tax,
             # so I set handle_price_include=False
-            tax_compute_all_res = vdict["taxes"].compute_all(
+            tax_compute_all_res = self._compute_all_taxes(
+                vdict["taxes"],
                 vdict["price_unit"],
                 currency=currency,
                 quantity=qty * sign,
                 product=vdict["product"],
                 partner=vdict["partner"],
-                handle_price_include=False,
             )
             vals["tax_line_ids"] = self._prepare_tax_lines(
                 tax_compute_all_res, self.company_currency_id
@@ -144,12 +130,33 @@ class AccountCutoff(models.Model):
         self, order_line, order_type, oline_dict, cutoff_datetime
     ):
         assert order_line not in oline_dict
+        self.order_line_init_oline_dict(order_line, order_type, oline_dict)
+        if self._get_run_cache().get("picking_qty_sql"):
+            # the quantities of all the order lines are computed at once
+            # by _update_oline_dict_sql() at the end of the analysis
+            return
+        self.order_line_update_oline_dict_from_stock_moves(
+            order_line, order_type, oline_dict, cutoff_datetime
+        )
+        self.order_line_update_oline_dict_from_invoice_lines(
+            order_line, order_type, oline_dict, cutoff_datetime
+        )
+        if not oline_dict[order_line]["price_origin"]:
+            self.order_line_update_oline_dict_price_fallback(
+                order_line, order_type, oline_dict
+            )
+
+    def order_line_init_oline_dict(self, order_line, order_type, oline_dict):
         order = order_line.order_id  # same on PO and SO
         oline_dict[order_line] = {
             "precut_delivered_qty": 0.0,  # in product_uom
-            "precut_delivered_logs": [],
+            # [stock move ID, signed qty in product_uom, date of the move]
+            "precut_delivered_moves": [],
             "precut_invoiced_qty": 0.0,  # in product_uom
-            "precut_invoiced_logs": [],
+            # [invoice line ID, invoice ID, signed qty in product_uom]
+            "precut_invoiced_lines": [],
+            "order_line": order_line,
+            "order_type": order_type,
             "name": _("%s: %s") % (order.name, order_line.name),
             "product": order_line.product_id,
             "partner": order.partner_id.commercial_partner_id,
@@ -161,31 +168,18 @@ class AccountCutoff(models.Model):
             "account_id": False,
             "taxes": False,
         }
-        self.order_line_update_oline_dict_from_stock_moves(
-            order_line, order_type, oline_dict, cutoff_datetime
-        )
-        self.order_line_update_oline_dict_from_invoice_lines(
-            order_line, order_type, oline_dict, cutoff_datetime
-        )
-        if not oline_dict[order_line]["price_origin"]:
-            self.order_line_update_oline_dict_price_fallback(
-                order_line, order_type, oline_dict
-            )
 
-    def order_line_update_oline_dict_from_stock_moves(
-        self, order_line, order_type, oline_dict, cutoff_datetime
-    ):
-        wdict = oline_dict[order_line]
-        # These fields/methods have the same name on PO and SO
+    def _get_order_line_notes(self, order_line, order_type):
+        """Return the first lines of the notes of the cut-off line of the
+        order line, which describe the order line"""
+        # These fields have the same name on PO and SO
         order = order_line.order_id
-        product = order_line.product_id
-        product_uom = product.uom_id
-        outgoing_moves, incoming_moves = order_line._get_outgoing_incoming_moves()
+        product_uom = order_line.product_id.uom_id
         if order_type == "purchase":
-            ordered_qty = order_line.product_uom._compute_quantity(
-                order_line.product_qty, product_uom
+            ordered_qty = self._convert_uom_qty(
+                order_line.product_qty, order_line.product_uom, product_uom
             )
-            wdict["notes"] = _(
+            return _(
                 "Purchase order %s confirmed on %s\n"
                 "Purchase Order Line: %s (ordered qty: %s %s)"
             ) % (
@@ -196,10 +190,10 @@ class AccountCutoff(models.Model):
                 product_uom.name,
             )
         elif order_type == "sale":
-            ordered_qty = order_line.product_uom._compute_quantity(
-                order_line.product_uom_qty, product_uom
+            ordered_qty = self._convert_uom_qty(
+                order_line.product_uom_qty, order_line.product_uom, product_uom
             )
-            wdict["notes"] = _(
+            return _(
                 "Sale order %s confirmed on %s\n"
                 "Sale Order Line: %s (ordered qty: %s %s)"
             ) % (
@@ -209,39 +203,135 @@ class AccountCutoff(models.Model):
                 formatLang(self.env, ordered_qty, dp="Product Unit of Measure"),
                 product_uom.name,
             )
+        return ""
+
+    def _get_picking_qty_label(self):
+        if self.cutoff_type in ("accrued_expense", "accrued_revenue"):
+            return _("Pre-cutoff delivered quantity minus invoiced quantity:")
+        elif self.cutoff_type in ("prepaid_expense", "prepaid_revenue"):
+            return _("Pre-cutoff invoiced quantity minus delivered quantity:")
+        return ""
+
+    def _get_picking_line_notes(self, line, audit):
+        """Return the notes of the cut-off line of an order line, rendered
+        from the facts stored in its picking_audit by the generation"""
+        self.ensure_one()
+
+        def format_qty(qty):
+            return formatLang(self.env, qty, dp="Product Unit of Measure")
+
+        order_type = audit["order_type"]
+        order_line = line[self._get_order_line_key_field(order_type)]
+        uom_name = order_line.product_id.uom_id.name or ""
+        notes = []
+        if order_line:
+            notes.append(self._get_order_line_notes(order_line, order_type))
+        if line.notes:
+            notes.append(line.notes)
+        notes.append(
+            _("Pre-cutoff delivered quantity:")
+            + " %s %s" % (format_qty(audit["delivered_qty"]), uom_name)
+        )
+        moves = (
+            self.env["stock.move"]
+            .browse([move_id for move_id, _qty, _date in audit["delivered_moves"]])
+            .exists()
+        )
+        if audit["delivered_moves"]:
+            notes.append(_("Pre-cutoff delivered quantity details:"))
+            for move_id, move_qty, move_date in audit["delivered_moves"]:
+                move = moves.browse(move_id)
+                if move not in moves:
+                    continue
+                notes.append(
+                    _(" • %s %s (picking %s transfered on %s from %s to %s)")
+                    % (
+                        format_qty(move_qty),
+                        uom_name,
+                        move.picking_id.name or "none",
+                        format_datetime(
+                            self.env, fields.Datetime.to_datetime(move_date)
+                        ),
+                        move.location_id.display_name,
+                        move.location_dest_id.display_name,
+                    )
+                )
+        notes.append(
+            _("Pre-cutoff invoiced quantity:")
+            + " %s %s" % (format_qty(audit["invoiced_qty"]), uom_name)
+        )
+        invoices = (
+            self.env["account.move"]
+            .browse(
+                [invoice_id for _iline_id, invoice_id, _qty in audit["invoice_lines"]]
+            )
+            .exists()
+        )
+        if audit["invoice_lines"]:
+            move_type2label = dict(
+                self.env["account.move"].fields_get("move_type", "selection")[
+                    "move_type"
+                ]["selection"]
+            )
+            notes.append(_("Pre-cutoff invoiced quantity details:"))
+            for _iline_id, invoice_id, iline_qty in audit["invoice_lines"]:
+                invoice = invoices.browse(invoice_id)
+                if invoice not in invoices:
+                    continue
+                notes.append(
+                    " • %s %s (%s %s dated %s)"
+                    % (
+                        format_qty(iline_qty),
+                        uom_name,
+                        move_type2label[invoice.move_type],
+                        invoice.name,
+                        format_date(self.env, invoice.date),
+                    )
+                )
+        notes.append(
+            "%s %s %s"
+            % (self._get_picking_qty_label(), format_qty(line.quantity), uom_name)
+        )
+        return "\n".join(notes)
+
+    def _update_oline_dict_price_from_invoice_line(self, wdict, iline, iline_qty_puom):
+        invoice = iline.move_id
+        wdict["price_unit"] = iline.price_subtotal / iline_qty_puom
+        wdict["price_origin"] = invoice.name
+        wdict["currency"] = invoice.currency_id
+        wdict["account_id"] = iline.account_id.id
+        wdict["analytic_account_id"] = iline.analytic_account_id.id
+        wdict["taxes"] = iline.tax_ids
+
+    def order_line_update_oline_dict_from_stock_moves(
+        self, order_line, order_type, oline_dict, cutoff_datetime
+    ):
+        wdict = oline_dict[order_line]
+        # These fields/methods have the same name on PO and SO
+        product_uom = order_line.product_id.uom_id
+        outgoing_moves, incoming_moves = order_line._get_outgoing_incoming_moves()
         move_logs = []
         for out_move in outgoing_moves.filtered(
             lambda m: m.state == "done" and m.date <= cutoff_datetime
         ):
             sign = order_type == "purchase" and -1 or 1
-            move_qty = out_move.product_uom._compute_quantity(
-                out_move.quantity_done * sign, product_uom
+            move_qty = self._convert_uom_qty(
+                out_move.quantity_done * sign, out_move.product_uom, product_uom
             )
             move_logs.append((out_move, move_qty))
         for in_move in incoming_moves.filtered(
             lambda m: m.state == "done" and m.date <= cutoff_datetime
         ):
             sign = order_type == "sale" and -1 or 1
-            move_qty = in_move.product_uom._compute_quantity(
-                in_move.quantity_done * sign, product_uom
+            move_qty = self._convert_uom_qty(
+                in_move.quantity_done * sign, in_move.product_uom, product_uom
             )
             move_logs.append((in_move, move_qty))
         move_logs_sorted = sorted(move_logs, key=lambda to_sort: to_sort[0].date)
         for (move, move_qty_signed) in move_logs_sorted:
             wdict["precut_delivered_qty"] += move_qty_signed
-            move_qty_signed_formatted = formatLang(
-                self.env, move_qty_signed, dp="Product Unit of Measure"
-            )
-            wdict["precut_delivered_logs"].append(
-                _(" • %s %s (picking %s transfered on %s from %s to %s)")
-                % (
-                    move_qty_signed_formatted,
-                    move.product_id.uom_id.name,
-                    move.picking_id.name or "none",
-                    format_datetime(self.env, move.date),
-                    move.location_id.display_name,
-                    move.location_dest_id.display_name,
-                )
+            wdict["precut_delivered_moves"].append(
+                [move.id, move_qty_signed, fields.Datetime.to_string(move.date)]
             )
 
     def order_line_update_oline_dict_from_invoice_lines(
@@ -250,11 +340,6 @@ class AccountCutoff(models.Model):
         wdict = oline_dict[order_line]
         dpo = self.env["decimal.precision"]
         qty_prec = dpo.precision_get("Product Unit of Measure")
-        move_type2label = dict(
-            self.env["account.move"].fields_get("move_type", "selection")["move_type"][
-                "selection"
-            ]
-        )
         # These fields have the same name on PO and SO
         product = order_line.product_id
         product_uom = product.uom_id
@@ -270,31 +355,18 @@ class AccountCutoff(models.Model):
             invoice = iline.move_id
             if not float_is_zero(iline.quantity, precision_digits=qty_prec):
                 sign = invoice.move_type in ("out_refund", "in_refund") and -1 or 1
-                iline_qty_puom = iline.product_uom_id._compute_quantity(
-                    iline.quantity * sign, product_uom
+                iline_qty_puom = self._convert_uom_qty(
+                    iline.quantity * sign, iline.product_uom_id, product_uom
                 )
                 if invoice.date <= self.cutoff_date:
                     wdict["precut_invoiced_qty"] += iline_qty_puom
-                    iline_qty_puom_formatted = formatLang(
-                        self.env, iline_qty_puom, dp="Product Unit of Measure"
-                    )
-                    wdict["precut_invoiced_logs"].append(
-                        " • %s %s (%s %s dated %s)"
-                        % (
-                            iline_qty_puom_formatted,
-                            iline.product_id.uom_id.name,
-                            move_type2label[invoice.move_type],
-                            invoice.name,
-                            format_date(self.env, invoice.date),
-                        )
+                    wdict["precut_invoiced_lines"].append(
+                        [iline.id, invoice.id, iline_qty_puom]
                     )
                 # Most recent invoice line used for price_unit, account,...
-                wdict["price_unit"] = iline.price_subtotal / iline_qty_puom
-                wdict["price_origin"] = invoice.name
-                wdict["currency"] = invoice.currency_id
-                wdict["account_id"] = iline.account_id.id
-                wdict["analytic_account_id"] = iline.analytic_account_id.id
-                wdict["taxes"] = iline.tax_ids
+                self._update_oline_dict_price_from_invoice_line(
+                    wdict, iline, iline_qty_puom
+                )
 
     def order_line_update_oline_dict_price_fallback(
         self, order_line, order_type, oline_dict
@@ -303,43 +375,66 @@ class AccountCutoff(models.Model):
         order = order_line.order_id
         product = order_line.product_id
         if order_type == "purchase":
-            oline_qty_puom = order_line.product_uom._compute_quantity(
-                order_line.product_qty, product.uom_id
+            oline_qty_puom = self._convert_uom_qty(
+                order_line.product_qty, order_line.product_uom, product.uom_id
             )
             wdict["price_unit"] = order_line.price_subtotal / oline_qty_puom
             wdict["price_origin"] = order.name
             wdict["currency"] = order.currency_id
             wdict["analytic_account_id"] = order_line.account_analytic_id.id
             wdict["taxes"] = order_line.taxes_id
-            account = product._get_product_accounts()["expense"]
-            if not account:
-                raise UserError(
-                    _(
-                        "Missing expense account on product '%s' or on its "
-                        "related product category '%s'."
-                    )
-                    % (product.display_name, product.categ_id.display_name)
-                )
-            wdict["account_id"] = order.fiscal_position_id.map_account(account).id
         elif order_type == "sale":
-            oline_qty_puom = order_line.product_uom._compute_quantity(
-                order_line.product_uom_qty, product.uom_id
+            oline_qty_puom = self._convert_uom_qty(
+                order_line.product_uom_qty, order_line.product_uom, product.uom_id
             )
             wdict["price_unit"] = order_line.price_subtotal / oline_qty_puom
             wdict["price_origin"] = order.name
             wdict["currency"] = order.currency_id
             wdict["analytic_account_id"] = order.analytic_account_id.id
             wdict["taxes"] = order_line.tax_id
-            account = product._get_product_accounts()["income"]
-            if not account:
-                raise UserError(
-                    _(
-                        "Missing income account on product '%s' or on its "
-                        "related product category '%s'."
-                    )
-                    % (product.display_name, product.categ_id.display_name)
+        wdict["account_id"] = self._get_order_line_product_account(
+            product, order.fiscal_position_id, order_type
+        )
+
+    def _get_order_line_product_account(self, product, fiscal_position, order_type):
+        """Return the ID of the expense (purchase) or income (sale) account
+        of the product mapped by the fiscal position, False when the
+        product has no such account (see _check_order_line_accounts)
+
+        The result is cached during the generation of the lines.
+        """
+        cache = self._get_run_cache().setdefault("product_accounts", {})
+        key = (product.id, fiscal_position.id, order_type)
+        if key not in cache:
+            account_type = order_type == "purchase" and "expense" or "income"
+            account = product._get_product_accounts()[account_type]
+            cache[key] = account and fiscal_position.map_account(account).id or False
+        return cache[key]
+
+    def _check_order_line_accounts(self, oline_dict):
+        """Raise an error listing all the products without expense or
+        income account, so that it fails before computing the cut-off
+        lines"""
+        messages = []
+        for vdict in oline_dict.values():
+            if vdict["account_id"]:
+                continue
+            product = vdict["product"]
+            if vdict["order_type"] == "purchase":
+                message = _(
+                    "Missing expense account on product '%s' or on its "
+                    "related product category '%s'."
                 )
-            wdict["account_id"] = order.fiscal_position_id.map_account(account).id
+            else:
+                message = _(
+                    "Missing income account on product '%s' or on its "
+                    "related product category '%s'."
+                )
+            message %= (product.display_name, product.categ_id.display_name)
+            if message not in messages:
+                messages.append(message)
+        if messages:
+            raise UserError("\n".join(messages))
 
     def stock_move_update_oline_dict(self, move_line, oline_dict, cutoff_datetime):
         dpo = self.env["decimal.precision"]
@@ -367,6 +462,62 @@ class AccountCutoff(models.Model):
                     move_line.sale_line_id, "sale", oline_dict, cutoff_datetime
                 )
 
+    def _get_picking_accrual_order_lines(
+        self, picking_type_code, cutoff_datetime, min_date_dt
+    ):
+        """Return the order lines of the done stock moves of the pickings
+        done between min_date_dt and cutoff_datetime, without duplicates and
+        without the order lines with a zero quantity, as the stock moves
+        selected by stock_move_update_oline_dict()"""
+        self.ensure_one()
+        dpo = self.env["decimal.precision"]
+        qty_prec = dpo.precision_get("Product Unit of Measure")
+        if picking_type_code == "incoming":
+            line_field, line_model, qty_field = (
+                "purchase_line_id",
+                "purchase.order.line",
+                "product_qty",
+            )
+        else:
+            line_field, line_model, qty_field = (
+                "sale_line_id",
+                "sale.order.line",
+                "product_uom_qty",
+            )
+        self.env["stock.move"].flush(["picking_id", "state", line_field])
+        self.env["stock.picking"].flush(
+            ["picking_type_id", "state", "date_done", "company_id"]
+        )
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT sm.{line_field}
+            FROM stock_picking sp
+            JOIN stock_picking_type spt ON spt.id = sp.picking_type_id
+            JOIN stock_move sm ON sm.picking_id = sp.id
+            WHERE sp.company_id = %(company_id)s
+            AND sp.state = 'done'
+            AND sp.date_done BETWEEN %(min_date)s AND %(cutoff_datetime)s
+            AND spt.code = %(picking_type_code)s
+            AND sm.state = 'done'
+            AND sm.{line_field} IS NOT NULL
+            ORDER BY sm.{line_field}
+            """.format(
+                line_field=line_field
+            ),
+            {
+                "company_id": self.company_id.id,
+                "min_date": min_date_dt,
+                "cutoff_datetime": cutoff_datetime,
+                "picking_type_code": picking_type_code,
+            },
+        )
+        order_lines = self.env[line_model].browse(
+            [row[0] for row in self.env.cr.fetchall()]
+        )
+        return order_lines.filtered(
+            lambda oline: not float_is_zero(oline[qty_field], precision_digits=qty_prec)
+        )
+
     def invoice_line_update_oline_dict(self, inv_line, oline_dict, cutoff_datetime):
         dpo = self.env["decimal.precision"]
         qty_prec = dpo.precision_get("Product Unit of Measure")
@@ -390,14 +541,494 @@ class AccountCutoff(models.Model):
                         so_line, "sale", oline_dict, cutoff_datetime
                     )
 
+    def _use_picking_qty_sql(self):
+        """Return True if the delivered and invoiced quantities of the
+        order lines are computed by the SQL engine
+
+        The SQL engine is enabled by the system parameter
+        account_cutoff_accrual_picking.sql_engine. It is not used when
+        another module overrides the computation of the quantities of
+        an order line.
+        """
+        self.ensure_one()
+        if not str2bool(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_cutoff_accrual_picking.sql_engine", "False"),
+            default=False,
+        ):
+            return False
+        return not any(
+            self._is_overridden(method_name, AccountCutoff)
+            for method_name in (
+                "order_line_update_oline_dict",
+                "order_line_update_oline_dict_from_stock_moves",
+                "order_line_update_oline_dict_from_invoice_lines",
+                "_update_oline_dict_sql",
+            )
+        )
+
+    @api.model
+    def _get_uom_conversion_sql(self, qty, from_uom, to_uom):
+        """Return the SQL expression of the quantity qty converted from the
+        UoM table alias from_uom to the UoM table alias to_uom, rounded UP
+        to the rounding of to_uom as by _convert_uom_qty(): the conversion
+        is computed in double precision, and the quantity normalized by the
+        rounding is lowered by the epsilon of float_round() before being
+        rounded up"""
+        normalized = (
+            "({qty})::float8 * CASE WHEN {from_uom}.id = {to_uom}.id THEN 1 "
+            "ELSE 1.0::float8 / {from_uom}.factor::float8 "
+            "* {to_uom}.factor::float8 END / {to_uom}.rounding::float8"
+        ).format(qty=qty, from_uom=from_uom, to_uom=to_uom)
+        return (
+            "(SIGN({normalized}) * CEIL(ABS({normalized}) "
+            "- ABS({normalized}) * 2 ^ (-52)) * {to_uom}.rounding::float8)::numeric"
+        ).format(normalized=normalized, to_uom=to_uom)
+
+    @api.model
+    def _get_picking_move_qty_sql(self, order_type, condition):
+        """Return the SQL query of the done stock moves of the order lines
+        of type order_type that match the SQL condition, with their order
+        line, their company and their signed quantity in the UoM of the
+        product, as _get_outgoing_incoming_moves() selects them"""
+        if order_type == "purchase":
+            line_field, line_table, usage = (
+                "purchase_line_id",
+                "purchase_order_line",
+                "supplier",
+            )
+            direction = (
+                "CASE WHEN dest.usage = '{usage}' AND sm.to_refund THEN -1 "
+                "WHEN dest.usage != '{usage}' AND (sm.origin_returned_move_id "
+                "IS NULL OR sm.to_refund) THEN 1 ELSE 0 END"
+            )
+        else:
+            line_field, line_table, usage = (
+                "sale_line_id",
+                "sale_order_line",
+                "customer",
+            )
+            direction = (
+                "CASE WHEN dest.usage = '{usage}' AND (sm.origin_returned_move_id "
+                "IS NULL OR sm.to_refund) THEN 1 "
+                "WHEN dest.usage != '{usage}' AND sm.to_refund THEN -1 ELSE 0 END"
+            )
+        return """
+            SELECT
+                sm.id,
+                sm.date,
+                sm.{line_field} AS line_id,
+                ol.company_id,
+                move_sign.direction * {qty} AS qty
+            FROM stock_move sm
+            JOIN {line_table} ol
+                ON ol.id = sm.{line_field} AND ol.product_id = sm.product_id
+            JOIN stock_location dest ON dest.id = sm.location_dest_id
+            JOIN product_product pp ON pp.id = sm.product_id
+            JOIN product_template pt ON pt.id = pp.product_tmpl_id
+            JOIN uom_uom pu ON pu.id = pt.uom_id
+            JOIN uom_uom mu ON mu.id = sm.product_uom
+            CROSS JOIN LATERAL (
+                SELECT {direction} AS direction
+            ) AS move_sign
+            -- quantity done in the UoM of the stock move
+            CROSS JOIN LATERAL (
+                SELECT COALESCE(SUM(sml.qty_done / smlu.factor), 0) * mu.factor
+                    AS qty_done
+                FROM stock_move_line sml
+                JOIN uom_uom smlu ON smlu.id = sml.product_uom_id
+                WHERE sml.move_id = sm.id
+            ) AS done
+            WHERE sm.state = 'done'
+            AND sm.scrapped IS NOT TRUE
+            AND move_sign.direction != 0
+            AND {condition}
+        """.format(
+            line_field=line_field,
+            line_table=line_table,
+            direction=direction.format(usage=usage),
+            qty=self._get_uom_conversion_sql("done.qty_done", "mu", "pu"),
+            condition=condition,
+        )
+
+    @api.model
+    def _get_picking_invoice_qty_sql(self, order_type, condition):
+        """Return the SQL query of the invoice lines with a quantity of the
+        order lines of type order_type that match the SQL condition, with
+        their order line, their invoice, their state and their signed
+        quantity in the UoM of the product"""
+        dpo = self.env["decimal.precision"]
+        if order_type == "purchase":
+            line_from = (
+                "account_move_line aml "
+                "JOIN purchase_order_line ol ON ol.id = aml.purchase_line_id"
+            )
+        else:
+            line_from = (
+                "sale_order_line_invoice_rel rel "
+                "JOIN account_move_line aml ON aml.id = rel.invoice_line_id "
+                "JOIN sale_order_line ol ON ol.id = rel.order_line_id"
+            )
+        return """
+            SELECT
+                aml.id,
+                aml.move_id,
+                am.date,
+                aml.move_name,
+                aml.parent_state,
+                ol.id AS line_id,
+                ol.company_id,
+                CASE WHEN iu.id IS NULL THEN signed.qty ELSE {qty} END AS qty
+            FROM {line_from}
+            JOIN account_move am ON am.id = aml.move_id
+            JOIN product_product pp ON pp.id = ol.product_id
+            JOIN product_template pt ON pt.id = pp.product_tmpl_id
+            JOIN uom_uom pu ON pu.id = pt.uom_id
+            LEFT JOIN uom_uom iu ON iu.id = aml.product_uom_id
+            CROSS JOIN LATERAL (
+                SELECT aml.quantity * CASE
+                    WHEN am.move_type IN ('out_refund', 'in_refund') THEN -1
+                    ELSE 1 END AS qty
+            ) AS signed
+            WHERE ROUND(aml.quantity, {qty_prec}) != 0
+            AND {condition}
+        """.format(
+            line_from=line_from,
+            qty=self._get_uom_conversion_sql("signed.qty", "iu", "pu"),
+            qty_prec=int(dpo.precision_get("Product Unit of Measure")),
+            condition=condition,
+        )
+
+    def _get_picking_delivered_rows(self, order_type, order_lines, cutoff_datetime):
+        """Return, for each order line, its done stock moves up to the
+        cut-off, by date, and their signed quantities in the UoM of the
+        product, as _get_outgoing_incoming_moves() selects them"""
+        self.ensure_one()
+        line_field = self._get_order_line_key_field(order_type)
+        self.env["stock.move"].flush()
+        self.env["stock.move.line"].flush()
+        self.env.cr.execute(
+            """
+            SELECT
+                line_id,
+                ARRAY_AGG(id ORDER BY date, id) AS move_ids,
+                ARRAY_AGG(qty ORDER BY date, id) AS move_qtys,
+                ARRAY_AGG(date ORDER BY date, id) AS move_dates
+            FROM ({moves}) AS move
+            GROUP BY line_id
+            """.format(
+                moves=self._get_picking_move_qty_sql(
+                    order_type,
+                    "sm.{line_field} IN %(line_ids)s "
+                    "AND sm.date <= %(cutoff_datetime)s".format(line_field=line_field),
+                )
+            ),
+            {
+                "line_ids": tuple(order_lines.ids),
+                "cutoff_datetime": cutoff_datetime,
+            },
+        )
+        return self.env.cr.dictfetchall()
+
+    def _get_picking_invoiced_rows(self, order_type, order_lines):
+        """Return, for each order line, its invoice lines dated up to the
+        cut-off and their signed quantities in the UoM of the product, in
+        the order of the invoice lines, with their invoices, and the
+        invoice line that gives the price, i.e. the last one whatever its
+        date"""
+        self.ensure_one()
+        if self.source_move_state == "posted":
+            states = ("posted",)
+        else:
+            states = ("draft", "posted")
+        self.env["account.move.line"].flush()
+        self.env.cr.execute(
+            """
+            SELECT
+                line_id,
+                ARRAY_AGG(id ORDER BY date DESC, move_name DESC, id)
+                    FILTER (WHERE date <= %(cutoff_date)s) AS invoice_line_ids,
+                ARRAY_AGG(qty ORDER BY date DESC, move_name DESC, id)
+                    FILTER (WHERE date <= %(cutoff_date)s) AS invoice_line_qtys,
+                ARRAY_AGG(move_id ORDER BY date DESC, move_name DESC, id)
+                    FILTER (WHERE date <= %(cutoff_date)s) AS invoice_ids,
+                (ARRAY_AGG(id ORDER BY date, move_name, id DESC))[1]
+                    AS price_line_id,
+                (ARRAY_AGG(qty ORDER BY date, move_name, id DESC))[1]
+                    AS price_line_qty
+            FROM ({ilines}) AS iline
+            GROUP BY line_id
+            """.format(
+                ilines=self._get_picking_invoice_qty_sql(
+                    order_type,
+                    "ol.id IN %(line_ids)s AND aml.parent_state IN %(states)s",
+                )
+            ),
+            {
+                "line_ids": tuple(order_lines.ids),
+                "states": states,
+                "cutoff_date": self.cutoff_date,
+            },
+        )
+        return self.env.cr.dictfetchall()
+
+    def _update_oline_dict_sql(self, oline_dict, cutoff_datetime):
+        """Same as the end of order_line_update_oline_dict() for all the
+        order lines of oline_dict, with two aggregated queries on the
+        stock moves and on the invoice lines by type of order"""
+        self.ensure_one()
+        olines_by_type = defaultdict(list)
+        for order_line, wdict in oline_dict.items():
+            olines_by_type[wdict["order_type"]].append(order_line)
+        for order_type, olines in olines_by_type.items():
+            order_lines = olines[0].union(*olines)
+            delivered = {
+                row["line_id"]: row
+                for row in self._get_picking_delivered_rows(
+                    order_type, order_lines, cutoff_datetime
+                )
+            }
+            invoiced = {
+                row["line_id"]: row
+                for row in self._get_picking_invoiced_rows(order_type, order_lines)
+            }
+            # browse the invoice lines that give the prices together, so
+            # that they are read in a few queries
+            price_lines = self.env["account.move.line"].browse(
+                [row["price_line_id"] for row in invoiced.values()]
+            )
+            for order_line in order_lines:
+                wdict = oline_dict[order_line]
+                row = delivered.get(order_line.id)
+                if row:
+                    for move_id, move_qty, move_date in zip(
+                        row["move_ids"], row["move_qtys"], row["move_dates"]
+                    ):
+                        # the elements of the numeric arrays are Decimals
+                        move_qty_signed = float(move_qty)
+                        wdict["precut_delivered_qty"] += move_qty_signed
+                        wdict["precut_delivered_moves"].append(
+                            [
+                                move_id,
+                                move_qty_signed,
+                                fields.Datetime.to_string(move_date),
+                            ]
+                        )
+                row = invoiced.get(order_line.id)
+                if row:
+                    for iline_id, invoice_id, iline_qty in zip(
+                        row["invoice_line_ids"] or [],
+                        row["invoice_ids"] or [],
+                        row["invoice_line_qtys"] or [],
+                    ):
+                        iline_qty_puom = float(iline_qty)
+                        wdict["precut_invoiced_qty"] += iline_qty_puom
+                        wdict["precut_invoiced_lines"].append(
+                            [iline_id, invoice_id, iline_qty_puom]
+                        )
+                    self._update_oline_dict_price_from_invoice_line(
+                        wdict,
+                        price_lines.browse(row["price_line_id"]).with_prefetch(
+                            price_lines._ids
+                        ),
+                        row["price_line_qty"],
+                    )
+                if not wdict["price_origin"]:
+                    self.order_line_update_oline_dict_price_fallback(
+                        order_line, order_type, oline_dict
+                    )
+
+    def _use_picking_ledger(self):
+        """Return True if the quantities of an accrual cut-off are read
+        from the ledger of the order lines (account.cutoff.picking.ledger)
+
+        The ledger is used when the system parameter
+        account_cutoff_accrual_picking.ledger_engine is set, for the
+        accrued expenses and revenues computed from the posted invoices,
+        unless another module overrides the analysis of the order lines.
+        """
+        self.ensure_one()
+        if self.cutoff_type not in ("accrued_expense", "accrued_revenue"):
+            return False
+        if self.source_move_state != "posted":
+            # the ledger only has the posted invoices
+            return False
+        if not str2bool(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_cutoff_accrual_picking.ledger_engine", "False"),
+            default=False,
+        ):
+            return False
+        return not any(
+            self._is_overridden(method_name, AccountCutoff)
+            for method_name in (
+                "order_line_update_oline_dict",
+                "order_line_update_oline_dict_from_stock_moves",
+                "order_line_update_oline_dict_from_invoice_lines",
+                "stock_move_update_oline_dict",
+                "_update_oline_dict_from_ledger",
+            )
+        )
+
+    def _get_picking_price_rows(self, order_type, order_lines):
+        """Return, for each order line, its posted invoice line that gives
+        the price, as _get_picking_invoiced_rows()"""
+        self.ensure_one()
+        self.env["account.move.line"].flush()
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT ON (line_id)
+                line_id, id AS price_line_id, qty AS price_line_qty
+            FROM ({ilines}) AS iline
+            ORDER BY line_id, date, move_name, id DESC
+            """.format(
+                ilines=self._get_picking_invoice_qty_sql(
+                    order_type, "ol.id IN %(line_ids)s AND aml.parent_state = 'posted'"
+                )
+            ),
+            {"line_ids": tuple(order_lines.ids)},
+        )
+        return self.env.cr.dictfetchall()
+
+    def _update_oline_dict_from_ledger(self, order_type, oline_dict, cutoff_datetime):
+        """Add to oline_dict the order lines whose quantity delivered up to
+        the cut-off is greater than their quantity invoiced up to the
+        cut-off, with their quantities read from the ledger in one query,
+        whatever the analysis interval"""
+        self.ensure_one()
+        qty_prec = self.env["decimal.precision"].precision_get(
+            "Product Unit of Measure"
+        )
+        line_field = self._get_order_line_key_field(order_type)
+        self.env["account.cutoff.picking.ledger"].flush()
+        self.env.cr.execute(
+            """
+            SELECT
+                line_id,
+                COALESCE(SUM(delivered_qty) FILTER (WHERE is_move), 0)
+                    AS delivered_qty,
+                COALESCE(SUM(invoiced_qty) FILTER (WHERE is_invoice), 0)
+                    AS invoiced_qty,
+                ARRAY_AGG(stock_move_id ORDER BY date, stock_move_id)
+                    FILTER (WHERE is_move) AS move_ids,
+                ARRAY_AGG(delivered_qty ORDER BY date, stock_move_id)
+                    FILTER (WHERE is_move) AS move_qtys,
+                ARRAY_AGG(date ORDER BY date, stock_move_id)
+                    FILTER (WHERE is_move) AS move_dates,
+                ARRAY_AGG(invoice_line_id ORDER BY date DESC, invoice_line_id)
+                    FILTER (WHERE is_invoice) AS invoice_line_ids,
+                ARRAY_AGG(invoice_id ORDER BY date DESC, invoice_line_id)
+                    FILTER (WHERE is_invoice) AS invoice_ids,
+                ARRAY_AGG(invoiced_qty ORDER BY date DESC, invoice_line_id)
+                    FILTER (WHERE is_invoice) AS invoice_line_qtys
+            FROM (
+                SELECT
+                    {line_field} AS line_id,
+                    date,
+                    stock_move_id,
+                    invoice_line_id,
+                    invoice_id,
+                    delivered_qty,
+                    invoiced_qty,
+                    stock_move_id IS NOT NULL
+                        AND date <= %(cutoff_datetime)s AS is_move,
+                    invoice_line_id IS NOT NULL
+                        AND date <= %(cutoff_date)s AS is_invoice
+                FROM account_cutoff_picking_ledger
+                WHERE company_id = %(company_id)s
+                AND order_type = %(order_type)s
+                AND date <= %(cutoff_datetime)s
+            ) AS entry
+            GROUP BY line_id
+            HAVING ROUND(
+                COALESCE(SUM(delivered_qty) FILTER (WHERE is_move), 0)
+                - COALESCE(SUM(invoiced_qty) FILTER (WHERE is_invoice), 0),
+                %(qty_prec)s
+            ) > 0
+            ORDER BY line_id
+            """.format(
+                line_field=line_field
+            ),
+            {
+                "company_id": self.company_id.id,
+                "order_type": order_type,
+                "cutoff_datetime": cutoff_datetime,
+                "cutoff_date": self.cutoff_date,
+                "qty_prec": qty_prec,
+            },
+        )
+        rows = {row["line_id"]: row for row in self.env.cr.dictfetchall()}
+        qty_field = order_type == "purchase" and "product_qty" or "product_uom_qty"
+        order_lines = (
+            self.env[
+                order_type == "purchase" and "purchase.order.line" or "sale.order.line"
+            ]
+            .browse(list(rows))
+            .filtered(
+                lambda oline: not float_is_zero(
+                    oline[qty_field], precision_digits=qty_prec
+                )
+            )
+        )
+        if not order_lines:
+            return
+        price_rows = {
+            row["line_id"]: row
+            for row in self._get_picking_price_rows(order_type, order_lines)
+        }
+        price_lines = self.env["account.move.line"].browse(
+            [row["price_line_id"] for row in price_rows.values()]
+        )
+        for order_line in order_lines:
+            self.order_line_init_oline_dict(order_line, order_type, oline_dict)
+            wdict = oline_dict[order_line]
+            row = rows[order_line.id]
+            wdict["precut_delivered_qty"] = row["delivered_qty"]
+            wdict["precut_invoiced_qty"] = row["invoiced_qty"]
+            # the elements of the numeric arrays are Decimals
+            wdict["precut_delivered_moves"] = [
+                [move_id, float(move_qty), fields.Datetime.to_string(move_date)]
+                for move_id, move_qty, move_date in zip(
+                    row["move_ids"] or [],
+                    row["move_qtys"] or [],
+                    row["move_dates"] or [],
+                )
+            ]
+            wdict["precut_invoiced_lines"] = [
+                [iline_id, invoice_id, float(iline_qty)]
+                for iline_id, invoice_id, iline_qty in zip(
+                    row["invoice_line_ids"] or [],
+                    row["invoice_ids"] or [],
+                    row["invoice_line_qtys"] or [],
+                )
+            ]
+            price_row = price_rows.get(order_line.id)
+            if price_row:
+                self._update_oline_dict_price_from_invoice_line(
+                    wdict,
+                    price_lines.browse(price_row["price_line_id"]).with_prefetch(
+                        price_lines._ids
+                    ),
+                    price_row["price_line_qty"],
+                )
+            else:
+                self.order_line_update_oline_dict_price_fallback(
+                    order_line, order_type, oline_dict
+                )
+
     def get_lines(self):
         res = super().get_lines()
-        aclo = self.env["account.cutoff.line"]
+        if self._is_checkpoint_done("order_line"):
+            return res
 
         account_mapping = self._get_mapping_dict()
         cutoff_type = self.cutoff_type
         cutoff_datetime = self._get_cutoff_datetime()
 
+        use_sql = self._use_picking_qty_sql() and not self._use_picking_ledger()
+        self._get_run_cache()["picking_qty_sql"] = use_sql
         oline_dict = {}  # order line dict
         # key = PO line or SO line recordset
         # value = {
@@ -426,19 +1057,41 @@ class AccountCutoff(models.Model):
                 days=self.picking_interval_days
             )
 
-            pickings = self.env["stock.picking"].search(
-                [
-                    ("picking_type_code", "=", pick_type_map[cutoff_type]),
-                    ("state", "=", "done"),
-                    ("date_done", "<=", cutoff_datetime),
-                    ("date_done", ">=", min_date_dt),
-                    ("company_id", "=", self.company_id.id),
-                ]
-            )
+            if self._use_picking_ledger():
+                order_type = cutoff_type == "accrued_expense" and "purchase" or "sale"
+                with self._profile_phase("ledger"):
+                    self._update_oline_dict_from_ledger(
+                        order_type, oline_dict, cutoff_datetime
+                    )
+            elif self._is_overridden("stock_move_update_oline_dict", AccountCutoff):
+                with self._profile_phase("search sources"):
+                    pickings = self.env["stock.picking"].search(
+                        [
+                            ("picking_type_code", "=", pick_type_map[cutoff_type]),
+                            ("state", "=", "done"),
+                            ("date_done", "<=", cutoff_datetime),
+                            ("date_done", ">=", min_date_dt),
+                            ("company_id", "=", self.company_id.id),
+                        ]
+                    )
 
-            for p in pickings:
-                for move in p.move_lines.filtered(lambda m: m.state == "done"):
-                    self.stock_move_update_oline_dict(move, oline_dict, cutoff_datetime)
+                with self._profile_phase("order lines analysis"):
+                    for p in pickings:
+                        for move in p.move_lines.filtered(lambda m: m.state == "done"):
+                            self.stock_move_update_oline_dict(
+                                move, oline_dict, cutoff_datetime
+                            )
+            else:
+                with self._profile_phase("search sources"):
+                    order_lines = self._get_picking_accrual_order_lines(
+                        pick_type_map[cutoff_type], cutoff_datetime, min_date_dt
+                    )
+                order_type = cutoff_type == "accrued_expense" and "purchase" or "sale"
+                with self._profile_phase("order lines analysis"):
+                    for order_line in order_lines:
+                        self.order_line_update_oline_dict(
+                            order_line, order_type, oline_dict, cutoff_datetime
+                        )
         elif cutoff_type in ("prepaid_revenue", "prepaid_expense"):
             move_type_map = {
                 "prepaid_revenue": ("out_invoice", "out_refund"),
@@ -455,22 +1108,53 @@ class AccountCutoff(models.Model):
                 inv_domain.append(("state", "=", "posted"))
             else:
                 inv_domain.append(("state", "in", ("draft", "posted")))
-            invoices = self.env["account.move"].search(inv_domain)
-            for invoice in invoices:
-                for iline in invoice.invoice_line_ids.filtered(
-                    lambda x: not x.display_type
-                    and x.product_id.type in ("product", "consu")
-                ):
-                    self.invoice_line_update_oline_dict(
-                        iline, oline_dict, cutoff_datetime
-                    )
+            with self._profile_phase("search sources"):
+                invoices = self.env["account.move"].search(inv_domain)
+            with self._profile_phase("order lines analysis"):
+                for invoice in invoices:
+                    for iline in invoice.invoice_line_ids.filtered(
+                        lambda x: not x.display_type
+                        and x.product_id.type in ("product", "consu")
+                    ):
+                        self.invoice_line_update_oline_dict(
+                            iline, oline_dict, cutoff_datetime
+                        )
 
+        if use_sql and oline_dict:
+            with self._profile_phase("order lines quantities"):
+                self._update_oline_dict_sql(oline_dict, cutoff_datetime)
         # from pprint import pprint
         # pprint(oline_dict)
-        for vdict in oline_dict.values():
-            vals = self.picking_prepare_cutoff_line(vdict, account_mapping)
-            if vals:
-                aclo.create(vals)
+        self._check_order_line_accounts(oline_dict)
+        if (
+            cutoff_type in ("accrued_expense", "accrued_revenue")
+            and self.company_id.accrual_taxes
+        ):
+            self._check_tax_accrual_accounts(
+                self.env["account.tax"].union(
+                    *[vdict["taxes"] for vdict in oline_dict.values()]
+                )
+            )
+        if cutoff_type in ("accrued_expense", "prepaid_expense"):
+            key_field = self._get_order_line_key_field("purchase")
+        else:
+            key_field = self._get_order_line_key_field("sale")
+        # The order lines are analysed again when the generation resumes,
+        # only the lines of the order lines after the checkpoint are created
+        position = self._get_checkpoint_position("order_line")
+        order_lines = sorted(
+            (oline for oline in oline_dict if oline.id > position),
+            key=lambda oline: oline.id,
+        )
+        with self._get_line_writer(
+            total=len(order_lines), key_field=key_field, checkpoint_source="order_line"
+        ) as writer:
+            for order_line in order_lines:
+                with self._profile_phase("prepare lines"):
+                    vals = self.picking_prepare_cutoff_line(
+                        oline_dict[order_line], account_mapping
+                    )
+                writer.add(vals, position=order_line.id)
         return res
 
     def _get_cutoff_datetime(self):
@@ -481,3 +1165,30 @@ class AccountCutoff(models.Model):
         cutoff_datetime_utc = cutoff_datetime_aware.astimezone(pytz.utc)
         cutoff_datetime_utc_naive = cutoff_datetime_utc.replace(tzinfo=None)
         return cutoff_datetime_utc_naive
+
+
+class AccountCutoffLine(models.Model):
+    _inherit = "account.cutoff.line"
+
+    purchase_line_id = fields.Many2one(
+        "purchase.order.line", string="Purchase Order Line", readonly=True
+    )
+    sale_line_id = fields.Many2one(
+        "sale.order.line", string="Sale Order Line", readonly=True
+    )
+    picking_audit = fields.Text(
+        readonly=True,
+        help="Stock moves and invoice lines of the computation of the quantity, "
+        "stored in JSON to render the notes of the line when it is displayed.",
+    )
+    picking_notes = fields.Text(compute="_compute_picking_notes", string="Notes")
+
+    @api.depends("picking_audit", "notes")
+    def _compute_picking_notes(self):
+        for line in self:
+            if line.picking_audit:
+                line.picking_notes = line.parent_id._get_picking_line_notes(
+                    line, json.loads(line.picking_audit)
+                )
+            else:
+                line.picking_notes = line.notes
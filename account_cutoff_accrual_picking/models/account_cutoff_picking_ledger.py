@@ -0,0 +1,144 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import logging
+
+from odoo import api, fields, models
+
+logger = logging.getLogger(__name__)
+
+
+class AccountCutoffPickingLedger(models.Model):
+    """Delivered and invoiced quantities of the order lines, one entry
+    per done stock move and per posted invoice line, maintained when the
+    stock moves are done and when the invoices are posted, reset to draft
+    or cancelled"""
+
+    _name = "account.cutoff.picking.ledger"
+    _description = "Delivered and Invoiced Quantities of Order Lines"
+    _order = "date, id"
+
+    company_id = fields.Many2one("res.company", required=True, index=True)
+    order_type = fields.Selection(
+        [("purchase", "Purchase"), ("sale", "Sale")], required=True
+    )
+    purchase_line_id = fields.Many2one(
+        "purchase.order.line", ondelete="cascade", index=True
+    )
+    sale_line_id = fields.Many2one("sale.order.line", ondelete="cascade", index=True)
+    date = fields.Datetime(
+        required=True,
+        index=True,
+        help="Date of the stock move, or accounting date of the invoice.",
+    )
+    stock_move_id = fields.Many2one("stock.move", ondelete="cascade", index=True)
+    invoice_line_id = fields.Many2one(
+        "account.move.line", ondelete="cascade", index=True
+    )
+    invoice_id = fields.Many2one("account.move", ondelete="cascade")
+    delivered_qty = fields.Float(digits="Product Unit of Measure")
+    invoiced_qty = fields.Float(digits="Product Unit of Measure")
+
+    @api.model
+    def _insert_entries(self, order_type, select_sql, params, source):
+        """Insert the entries of the rows of the stock moves (source
+        'move') or of the invoice lines (source 'invoice') of select_sql"""
+        line_field = self.env["account.cutoff"]._get_order_line_key_field(order_type)
+        if source == "move":
+            columns = "stock_move_id, date, delivered_qty, invoiced_qty"
+            values = "src.id, src.date, src.qty, 0"
+        else:
+            columns = "invoice_line_id, invoice_id, date, delivered_qty, invoiced_qty"
+            values = "src.id, src.move_id, src.date, 0, src.qty"
+        self.env.cr.execute(
+            """
+            INSERT INTO account_cutoff_picking_ledger (
+                company_id, order_type, {line_field}, {columns},
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT
+                src.company_id, %(order_type)s, src.line_id, {values},
+                %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+            FROM ({select_sql}) AS src
+            """.format(
+                line_field=line_field,
+                columns=columns,
+                values=values,
+                select_sql=select_sql,
+            ),
+            dict(params, order_type=order_type, uid=self.env.uid),
+        )
+
+    @api.model
+    def _sync_stock_moves(self, moves):
+        """Replace the entries of the stock moves by the ones of their
+        current quantities"""
+        if not moves:
+            return
+        cutoff_obj = self.env["account.cutoff"]
+        self.env["stock.move"].flush()
+        self.env["stock.move.line"].flush()
+        self.env.cr.execute(
+            "DELETE FROM account_cutoff_picking_ledger WHERE stock_move_id IN %s",
+            (tuple(moves.ids),),
+        )
+        for order_type in ("purchase", "sale"):
+            self._insert_entries(
+                order_type,
+                cutoff_obj._get_picking_move_qty_sql(
+                    order_type, "sm.id IN %(move_ids)s"
+                ),
+                {"move_ids": tuple(moves.ids)},
+                "move",
+            )
+        self.invalidate_cache()
+
+    @api.model
+    def _sync_invoice_lines(self, invoice_lines):
+        """Replace the entries of the invoice lines by the ones of the
+        posted invoice lines"""
+        if not invoice_lines:
+            return
+        cutoff_obj = self.env["account.cutoff"]
+        self.env["account.move"].flush()
+        self.env["account.move.line"].flush()
+        self.env.cr.execute(
+            "DELETE FROM account_cutoff_picking_ledger WHERE invoice_line_id IN %s",
+            (tuple(invoice_lines.ids),),
+        )
+        for order_type in ("purchase", "sale"):
+            self._insert_entries(
+                order_type,
+                cutoff_obj._get_picking_invoice_qty_sql(
+                    order_type,
+                    "aml.id IN %(iline_ids)s AND aml.parent_state = 'posted'",
+                ),
+                {"iline_ids": tuple(invoice_lines.ids)},
+                "invoice",
+            )
+        self.invalidate_cache()
+
+    @api.model
+    def _rebuild(self):
+        """Rebuild all the entries from the done stock moves and from the
+        posted invoice lines"""
+        logger.info("Rebuilding the ledger of the picking cut-offs")
+        cutoff_obj = self.env["account.cutoff"]
+        self.env["base"].flush()
+        self.env.cr.execute("DELETE FROM account_cutoff_picking_ledger")
+        for order_type in ("purchase", "sale"):
+            self._insert_entries(
+                order_type,
+                cutoff_obj._get_picking_move_qty_sql(order_type, "TRUE"),
+                {},
+                "move",
+            )
+            self._insert_entries(
+                order_type,
+                cutoff_obj._get_picking_invoice_qty_sql(
+                    order_type, "aml.parent_state = 'posted'"
+                ),
+                {},
+                "invoice",
+            )
+        self.invalidate_cache()
@@ -0,0 +1,30 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import models
+
+
+class AccountMove(models.Model):
+    _inherit = "account.move"
+
+    def _sync_cutoff_picking_ledger(self):
+        self.env["account.cutoff.picking.ledger"]._sync_invoice_lines(
+            self.invoice_line_ids.filtered(
+                lambda line: line.purchase_line_id or line.sale_line_ids
+            )
+        )
+
+    def _post(self, soft=True):
+        posted = super()._post(soft=soft)
+        posted._sync_cutoff_picking_ledger()
+        return posted
+
+    def button_draft(self):
+        res = super().button_draft()
+        self._sync_cutoff_picking_ledger()
+        return res
+
+    def button_cancel(self):
+        res = super().button_cancel()
+        self._sync_cutoff_picking_ledger()
+        return res
@@ -0,0 +1,64 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+
+
+class StockMove(models.Model):
+    _inherit = "stock.move"
+
+    def _action_done(self, cancel_backorder=False):
+        moves = super()._action_done(cancel_backorder=cancel_backorder)
+        self.env["account.cutoff.picking.ledger"]._sync_stock_moves(
+            moves.filtered(lambda move: move.purchase_line_id or move.sale_line_id)
+        )
+        return moves
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "date" in vals and "state" not in vals:
+            # dates corrected on done stock moves
+            self.env["account.cutoff.picking.ledger"]._sync_stock_moves(
+                self.filtered(
+                    lambda move: move.state == "done"
+                    and (move.purchase_line_id or move.sale_line_id)
+                )
+            )
+        return res
+
+
+class StockMoveLine(models.Model):
+    _inherit = "stock.move.line"
+
+    def _get_done_order_moves(self):
+        """Return the done stock moves of the move lines that are in the
+        cut-off picking ledger"""
+        return self.move_id.filtered(
+            lambda move: move.state == "done"
+            and (move.purchase_line_id or move.sale_line_id)
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        move_lines = super().create(vals_list)
+        # quantities added on done stock moves
+        self.env["account.cutoff.picking.ledger"]._sync_stock_moves(
+            move_lines._get_done_order_moves()
+        )
+        return move_lines
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "qty_done" in vals or "product_uom_id" in vals:
+            # quantities corrected on done stock moves
+            self.env["account.cutoff.picking.ledger"]._sync_stock_moves(
+                self._get_done_order_moves()
+            )
+        return res
+
+    def unlink(self):
+        moves = self._get_done_order_moves()
+        res = super().unlink()
+        # quantities removed from done stock moves
+        self.env["account.cutoff.picking.ledger"]._sync_stock_moves(moves.exists())
+        return res
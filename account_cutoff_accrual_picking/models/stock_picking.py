@@ -0,0 +1,31 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import logging
+
+from odoo import models
+from odoo.tools import sql
+
+logger = logging.getLogger(__name__)
+
+CUTOFF_PICKING_INDEX_NAME = "stock_picking_cutoff_accrual_picking_index"
+
+
+class StockPicking(models.Model):
+    _inherit = "stock.picking"
+
+    def init(self):
+        res = super().init()
+        self._create_cutoff_index()
+        return res
+
+    def _create_cutoff_index(self):
+        """Create the partial index used by the search of the done
+        pickings of the picking accrual cut-offs"""
+        if sql.index_exists(self.env.cr, CUTOFF_PICKING_INDEX_NAME):
+            return
+        logger.info("Creating index %s on stock_picking", CUTOFF_PICKING_INDEX_NAME)
+        self.env.cr.execute(
+            'CREATE INDEX "%s" ON stock_picking (company_id, date_done) '
+            "WHERE state = 'done'" % CUTOFF_PICKING_INDEX_NAME
+        )
@@ -0,0 +1,5 @@
+from . import test_picking_qty_engine
+from . import test_picking_notes
+from . import test_picking_order_lines
+from . import test_picking_ledger
+from . import test_picking_accounts
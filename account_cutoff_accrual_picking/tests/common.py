@@ -0,0 +1,323 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import json
+from datetime import timedelta
+
+from odoo import fields, models
+from odoo.tests import tagged
+from odoo.tests.common import Form, SavepointCase
+
+
+@tagged("-at_install", "post_install")
+class TestAccountCutoffPickingCommon(SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True))
+        cls.company = cls.env.ref("base.main_company")
+        cls.company.accrual_taxes = False
+        account_obj = cls.env["account.account"]
+        cls.expense_account = account_obj.create(
+            {
+                "name": "Cut-off Test Expense",
+                "code": "CUTPICKEXP",
+                "user_type_id": cls.env.ref("account.data_account_type_expenses").id,
+                "company_id": cls.company.id,
+            }
+        )
+        cls.income_account = account_obj.create(
+            {
+                "name": "Cut-off Test Income",
+                "code": "CUTPICKINC",
+                "user_type_id": cls.env.ref("account.data_account_type_revenue").id,
+                "company_id": cls.company.id,
+            }
+        )
+        cls.cutoff_account = account_obj.create(
+            {
+                "name": "Cut-off Test Accrual",
+                "code": "CUTPICKACC",
+                "user_type_id": cls.env.ref(
+                    "account.data_account_type_current_liabilities"
+                ).id,
+                "company_id": cls.company.id,
+            }
+        )
+        journal_obj = cls.env["account.journal"]
+        cls.purchase_journal = journal_obj.search(
+            [("type", "=", "purchase"), ("company_id", "=", cls.company.id)], limit=1
+        )
+        cls.sale_journal = journal_obj.search(
+            [("type", "=", "sale"), ("company_id", "=", cls.company.id)], limit=1
+        )
+        cls.partner = cls.env["res.partner"].create({"name": "Cut-off Test Partner"})
+        cls.uom_unit = cls.env.ref("uom.product_uom_unit")
+        cls.uom_dozen = cls.env.ref("uom.product_uom_dozen")
+        cls.product = cls._create_product("Cut-off Test Product")
+        cls.stock_location = cls.env.ref("stock.stock_location_stock")
+        cls.env["stock.quant"]._update_available_quantity(
+            cls.product, cls.stock_location, 100
+        )
+
+    @classmethod
+    def _create_product(cls, name):
+        return cls.env["product.product"].create(
+            {
+                "name": name,
+                "type": "product",
+                "uom_id": cls.uom_unit.id,
+                "uom_po_id": cls.uom_dozen.id,
+                "property_account_expense_id": cls.expense_account.id,
+                "property_account_income_id": cls.income_account.id,
+                "supplier_taxes_id": [(6, 0, [])],
+                "taxes_id": [(6, 0, [])],
+            }
+        )
+
+    def _datetime(self, days):
+        """Return the datetime of now plus the number of days"""
+        return fields.Datetime.now() + timedelta(days=days)
+
+    def _date(self, days):
+        """Return the date of today plus the number of days"""
+        return fields.Date.today() + timedelta(days=days)
+
+    def _create_purchase_order(
+        self, qty, uom=None, price_unit=100.0, product=None, company=None
+    ):
+        product = product or self.product
+        company = company or self.company
+        order = (
+            self.env["purchase.order"]
+            .with_company(company)
+            .create(
+                {
+                    "partner_id": self.partner.id,
+                    "company_id": company.id,
+                    "order_line": [
+                        (
+                            0,
+                            0,
+                            {
+                                "product_id": product.id,
+                                "name": product.name,
+                                "product_qty": qty,
+                                "product_uom": (uom or self.uom_unit).id,
+                                "price_unit": price_unit,
+                                "date_planned": fields.Datetime.now(),
+                                "taxes_id": [(6, 0, [])],
+                            },
+                        )
+                    ],
+                }
+            )
+        )
+        order.button_confirm()
+        return order
+
+    def _create_sale_order(self, qty, price_unit=100.0, product=None):
+        product = product or self.product
+        order = self.env["sale.order"].create(
+            {
+                "partner_id": self.partner.id,
+                "company_id": self.company.id,
+                "order_line": [
+                    (
+                        0,
+                        0,
+                        {
+                            "product_id": product.id,
+                            "name": product.name,
+                            "product_uom_qty": qty,
+                            "product_uom": self.uom_unit.id,
+                            "price_unit": price_unit,
+                            "tax_id": [(6, 0, [])],
+                        },
+                    )
+                ],
+            }
+        )
+        order.action_confirm()
+        return order
+
+    def _validate_picking(self, picking, qty, days):
+        """Transfer qty units of the product of the picking, done the
+        number of days from now"""
+        picking.action_assign()
+        move = picking.move_lines
+        move.quantity_done = self.uom_unit._compute_quantity(qty, move.product_uom)
+        picking._action_done()
+        done_date = self._datetime(days)
+        picking.date_done = done_date
+        picking.move_lines.filtered(lambda m: m.state == "done").date = done_date
+        return picking
+
+    def _return_picking(self, picking, qty, days, to_refund=True):
+        """Return qty units of the done picking, done the number of days
+        from now"""
+        wizard = Form(
+            self.env["stock.return.picking"].with_context(
+                active_ids=picking.ids,
+                active_id=picking.id,
+                active_model="stock.picking",
+            )
+        ).save()
+        return_line = wizard.product_return_moves
+        return_line.write(
+            {
+                "quantity": self.uom_unit._compute_quantity(qty, return_line.uom_id),
+                "to_refund": to_refund,
+            }
+        )
+        return_picking = self.env["stock.picking"].browse(wizard._create_returns()[0])
+        return self._validate_picking(return_picking, qty, days)
+
+    def _create_invoice(
+        self, order_line, qty, days, refund=False, uom=None, price_unit=None
+    ):
+        """Create and post an invoice of qty of the order line, in the unit
+        of measure of the order line by default, dated the number of days
+        from today"""
+        line_vals = {
+            "product_id": order_line.product_id.id,
+            "name": order_line.name,
+            "quantity": qty,
+            "product_uom_id": (uom or order_line.product_uom).id,
+            "price_unit": price_unit or order_line.price_unit,
+            "tax_ids": [(6, 0, [])],
+        }
+        if order_line._name == "purchase.order.line":
+            move_type = refund and "in_refund" or "in_invoice"
+            journal = self.purchase_journal
+            line_vals.update(
+                purchase_line_id=order_line.id, account_id=self.expense_account.id
+            )
+        else:
+            move_type = refund and "out_refund" or "out_invoice"
+            journal = self.sale_journal
+            line_vals.update(
+                sale_line_ids=[(6, 0, order_line.ids)],
+                account_id=self.income_account.id,
+            )
+        invoice = self.env["account.move"].create(
+            {
+                "move_type": move_type,
+                "partner_id": self.partner.id,
+                "journal_id": journal.id,
+                "invoice_date": self._date(days),
+                "date": self._date(days),
+                "invoice_line_ids": [(0, 0, line_vals)],
+            }
+        )
+        invoice.action_post()
+        return invoice
+
+    def _create_purchase_scenario(self):
+        """Return the purchase order lines of a scenario with a unit of
+        measure conversion, a return to refund, a supplier refund and an
+        order line without bill"""
+        # 3 dozens ordered, 24 units received, 1 dozen billed, 6 units
+        # returned and refunded
+        order_line1 = self._create_purchase_order(
+            3, uom=self.uom_dozen, price_unit=120.0
+        ).order_line
+        receipt = self._validate_picking(order_line1.order_id.picking_ids, 24, -5)
+        self._create_invoice(order_line1, 1, -4)
+        self._return_picking(receipt, 6, -3)
+        self._create_invoice(order_line1, 0.5, -2, refund=True)
+        # 5 units received, not billed: the price comes from the order
+        order_line2 = self._create_purchase_order(5, price_unit=10.0).order_line
+        self._validate_picking(order_line2.order_id.picking_ids, 5, -1)
+        return order_line1 | order_line2
+
+    def _create_sale_scenario(self):
+        """Return the sale order lines of a scenario with a return to
+        refund, a customer refund and an order line without invoice"""
+        # 4 units delivered, 2 invoiced, 1 returned and refunded
+        order_line1 = self._create_sale_order(4, price_unit=50.0).order_line
+        delivery = self._validate_picking(order_line1.order_id.picking_ids, 4, -5)
+        self._create_invoice(order_line1, 2, -4)
+        self._return_picking(delivery, 1, -3)
+        self._create_invoice(order_line1, 1, -2, refund=True)
+        # 3 units delivered, not invoiced: the price comes from the order
+        order_line2 = self._create_sale_order(3, price_unit=30.0).order_line
+        self._validate_picking(order_line2.order_id.picking_ids, 3, -1)
+        return order_line1 | order_line2
+
+    def _create_cutoff(self, cutoff_type):
+        return self.env["account.cutoff"].create(
+            {
+                "cutoff_type": cutoff_type,
+                "cutoff_date": fields.Date.today(),
+                "company_id": self.company.id,
+                "cutoff_account_id": self.cutoff_account.id,
+                "source_move_state": "posted",
+            }
+        )
+
+    def _set_param(self, key, value):
+        self.env["ir.config_parameter"].sudo().set_param(
+            "account_cutoff_accrual_picking.%s" % key, value
+        )
+
+    def _get_oline_dict(self, cutoff, order_lines, use_sql=False):
+        """Return the vdicts of the order lines computed by the Python
+        analysis or, with use_sql, by the SQL quantity engine"""
+        order_type = order_lines._name == "purchase.order.line" and "purchase" or "sale"
+        cutoff._reset_run_cache()
+        cutoff._get_run_cache()["picking_qty_sql"] = use_sql
+        cutoff_datetime = cutoff._get_cutoff_datetime()
+        oline_dict = {}
+        for order_line in order_lines:
+            cutoff.order_line_update_oline_dict(
+                order_line, order_type, oline_dict, cutoff_datetime
+            )
+        if use_sql:
+            cutoff._update_oline_dict_sql(oline_dict, cutoff_datetime)
+        return oline_dict
+
+    def _normalize(self, value):
+        """Return the value with its records as (model, IDs) and its
+        floats rounded, to compare the vdicts of several engines"""
+        if isinstance(value, models.BaseModel):
+            return (value._name, value.ids)
+        if isinstance(value, float):
+            return round(value, 6)
+        if isinstance(value, (list, tuple)):
+            return [self._normalize(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self._normalize(item) for key, item in value.items()}
+        return value
+
+    def _normalize_oline_dict(self, oline_dict):
+        return {
+            order_line.id: self._normalize(vdict)
+            for order_line, vdict in oline_dict.items()
+        }
+
+    def _get_line_values(self, cutoff, order_lines):
+        """Return the values of the cut-off lines of the order lines"""
+        key_field = cutoff._get_order_line_key_field(
+            order_lines._name == "purchase.order.line" and "purchase" or "sale"
+        )
+        lines = cutoff.line_ids.filtered(lambda line: line[key_field] in order_lines)
+        return sorted(
+            (
+                line[key_field].id,
+                line.name,
+                line.partner_id.id,
+                line.account_id.id,
+                line.cutoff_account_id.id,
+                line.analytic_account_id.id,
+                line.currency_id.id,
+                round(line.quantity, 6),
+                round(line.price_unit, 6),
+                round(line.amount, 2),
+                round(line.cutoff_amount, 2),
+                line.price_origin,
+                line.notes,
+                self._normalize(json.loads(line.picking_audit)),
+            )
+            for line in lines
+        )
@@ -0,0 +1,90 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from unittest.mock import patch
+
+from odoo.exceptions import UserError
+
+from .common import TestAccountCutoffPickingCommon
+
+
+class TestAccountCutoffPickingAccounts(TestAccountCutoffPickingCommon):
+    def test_product_account_cache(self):
+        cutoff = self._create_cutoff("accrued_expense")
+        mapped_account = self.expense_account.copy({"code": "CUTPICKMAP"})
+        fiscal_position = self.env["account.fiscal.position"].create(
+            {
+                "name": "Cut-off Test Fiscal Position",
+                "company_id": self.company.id,
+                "account_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "account_src_id": self.expense_account.id,
+                            "account_dest_id": mapped_account.id,
+                        },
+                    )
+                ],
+            }
+        )
+        no_fiscal_position = self.env["account.fiscal.position"]
+        product_class = type(self.product)
+        with patch.object(
+            product_class,
+            "_get_product_accounts",
+            autospec=True,
+            side_effect=product_class._get_product_accounts,
+        ) as get_product_accounts:
+            cutoff._reset_run_cache()
+            for _i in range(2):
+                self.assertEqual(
+                    cutoff._get_order_line_product_account(
+                        self.product, fiscal_position, "purchase"
+                    ),
+                    mapped_account.id,
+                )
+            self.assertEqual(get_product_accounts.call_count, 1)
+            self.assertEqual(
+                cutoff._get_order_line_product_account(
+                    self.product, no_fiscal_position, "purchase"
+                ),
+                self.expense_account.id,
+            )
+            self.assertEqual(
+                cutoff._get_order_line_product_account(
+                    self.product, no_fiscal_position, "sale"
+                ),
+                self.income_account.id,
+            )
+            self.assertEqual(get_product_accounts.call_count, 3)
+            # a new generation reads the accounts again
+            cutoff._reset_run_cache()
+            cutoff._get_order_line_product_account(
+                self.product, fiscal_position, "purchase"
+            )
+            self.assertEqual(get_product_accounts.call_count, 4)
+
+    def test_missing_accounts(self):
+        product1 = self._create_product("Cut-off Test Product Without Account 1")
+        product2 = self._create_product("Cut-off Test Product Without Account 2")
+        # two order lines of the first product
+        for product in (product1, product1, product2):
+            order_line = self._create_purchase_order(
+                5, price_unit=10.0, product=product
+            ).order_line
+            self._validate_picking(order_line.order_id.picking_ids, 5, -1)
+        cutoff = self._create_cutoff("accrued_expense")
+        no_account = self.env["account.account"]
+        with patch.object(
+            type(self.product),
+            "_get_product_accounts",
+            return_value={"income": no_account, "expense": no_account},
+        ):
+            with self.assertRaises(UserError) as error:
+                cutoff.get_lines()
+        # one error for all the products, with each product once
+        message = str(error.exception.args[0])
+        self.assertEqual(message.count(product1.display_name), 1)
+        self.assertEqual(message.count(product2.display_name), 1)
+        self.assertFalse(cutoff.line_ids)
@@ -0,0 +1,181 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import fields
+
+from .common import TestAccountCutoffPickingCommon
+
+
+class TestAccountCutoffPickingLedger(TestAccountCutoffPickingCommon):
+    def _get_entries(self, order_line):
+        """Return the entries of the ledger of the order line, as tuples
+        (stock move, invoice line, invoice, date, delivered and invoiced
+        quantities)"""
+        key_field = self.env["account.cutoff"]._get_order_line_key_field(
+            order_line._name == "purchase.order.line" and "purchase" or "sale"
+        )
+        entries = self.env["account.cutoff.picking.ledger"].search(
+            [(key_field, "=", order_line.id)]
+        )
+        return sorted(
+            (
+                entry.stock_move_id.id,
+                entry.invoice_line_id.id,
+                entry.invoice_id.id,
+                entry.date,
+                round(entry.delivered_qty, 6),
+                round(entry.invoiced_qty, 6),
+            )
+            for entry in entries
+        )
+
+    def _move_entry(self, move, qty):
+        return (move.id, False, False, move.date, qty, 0.0)
+
+    def _invoice_entry(self, invoice, qty):
+        return (
+            False,
+            invoice.invoice_line_ids.id,
+            invoice.id,
+            fields.Datetime.to_datetime(invoice.date),
+            0.0,
+            qty,
+        )
+
+    def test_ledger_purchase(self):
+        order_line = self._create_purchase_order(
+            3, uom=self.uom_dozen, price_unit=120.0
+        ).order_line
+        # receipt of 24 units, in the unit of measure of the product
+        receipt = self._validate_picking(order_line.order_id.picking_ids, 24, -5)
+        receipt_entry = self._move_entry(receipt.move_lines, 24.0)
+        self.assertEqual(self._get_entries(order_line), [receipt_entry])
+        # bill of 1 dozen, posted, reset to draft, posted and cancelled
+        bill = self._create_invoice(order_line, 1, -4)
+        bill_entry = self._invoice_entry(bill, 12.0)
+        self.assertEqual(
+            self._get_entries(order_line), sorted([receipt_entry, bill_entry])
+        )
+        bill.button_draft()
+        self.assertEqual(self._get_entries(order_line), [receipt_entry])
+        bill.action_post()
+        self.assertEqual(
+            self._get_entries(order_line), sorted([receipt_entry, bill_entry])
+        )
+        bill.button_draft()
+        bill.button_cancel()
+        self.assertEqual(self._get_entries(order_line), [receipt_entry])
+        # return of 6 units to refund, and refund of half a dozen
+        return_move = self._return_picking(receipt, 6, -3).move_lines
+        return_entry = self._move_entry(return_move, -6.0)
+        refund = self._create_invoice(order_line, 0.5, -2, refund=True)
+        refund_entry = self._invoice_entry(refund, -6.0)
+        self.assertEqual(
+            self._get_entries(order_line),
+            sorted([receipt_entry, return_entry, refund_entry]),
+        )
+        # date of a done stock move corrected
+        return_move.date = self._datetime(-1)
+        return_entry = self._move_entry(return_move, -6.0)
+        self.assertEqual(
+            self._get_entries(order_line),
+            sorted([receipt_entry, return_entry, refund_entry]),
+        )
+
+    def test_ledger_sale(self):
+        order_line = self._create_sale_order(4, price_unit=50.0).order_line
+        delivery = self._validate_picking(order_line.order_id.picking_ids, 4, -5)
+        delivery_entry = self._move_entry(delivery.move_lines, 4.0)
+        invoice = self._create_invoice(order_line, 2, -4)
+        invoice_entry = self._invoice_entry(invoice, 2.0)
+        return_move = self._return_picking(delivery, 1, -3).move_lines
+        return_entry = self._move_entry(return_move, -1.0)
+        refund = self._create_invoice(order_line, 1, -2, refund=True)
+        refund_entry = self._invoice_entry(refund, -1.0)
+        self.assertEqual(
+            self._get_entries(order_line),
+            sorted([delivery_entry, invoice_entry, return_entry, refund_entry]),
+        )
+        refund.button_draft()
+        self.assertEqual(
+            self._get_entries(order_line),
+            sorted([delivery_entry, invoice_entry, return_entry]),
+        )
+
+    def _add_move_line(self, move, qty):
+        """Add a move line of qty units to the done stock move"""
+        return self.env["stock.move.line"].create(
+            {
+                "move_id": move.id,
+                "picking_id": move.picking_id.id,
+                "product_id": move.product_id.id,
+                "product_uom_id": self.uom_unit.id,
+                "location_id": move.location_id.id,
+                "location_dest_id": move.location_dest_id.id,
+                "qty_done": qty,
+            }
+        )
+
+    def test_ledger_move_line_create(self):
+        order_line = self._create_purchase_order(5).order_line
+        move = self._validate_picking(order_line.order_id.picking_ids, 5, -5).move_lines
+        self.assertEqual(self._get_entries(order_line), [self._move_entry(move, 5.0)])
+        # quantity added on the done receipt
+        self._add_move_line(move, 2)
+        self.assertEqual(move.quantity_done, 7.0)
+        self.assertEqual(self._get_entries(order_line), [self._move_entry(move, 7.0)])
+
+    def test_ledger_move_line_unlink(self):
+        order_line = self._create_sale_order(5, price_unit=50.0).order_line
+        move = self._validate_picking(order_line.order_id.picking_ids, 5, -5).move_lines
+        move_line = self._add_move_line(move, 2)
+        self.assertEqual(self._get_entries(order_line), [self._move_entry(move, 7.0)])
+        # the standard unlink refuses the move lines of done stock moves:
+        # unlink it as a module that allows it would
+        self.env["base"].flush()
+        self.env.cr.execute(
+            "UPDATE stock_move_line SET state = 'assigned' WHERE id = %s",
+            (move_line.id,),
+        )
+        move_line.invalidate_cache(["state"])
+        move_line.unlink()
+        self.assertEqual(move.state, "done")
+        self.assertEqual(move.quantity_done, 5.0)
+        self.assertEqual(self._get_entries(order_line), [self._move_entry(move, 5.0)])
+
+    def _check_ledger(self, cutoff, order_lines, order_type):
+        """Check that the vdicts and the cut-off lines of the order lines
+        read from the ledger are the ones of the Python analysis"""
+        oline_dict = self._get_oline_dict(cutoff, order_lines)
+        ledger_oline_dict = {}
+        cutoff._update_oline_dict_from_ledger(
+            order_type, ledger_oline_dict, cutoff._get_cutoff_datetime()
+        )
+        ledger_oline_dict = {
+            order_line: vdict
+            for order_line, vdict in ledger_oline_dict.items()
+            if order_line in order_lines
+        }
+        self.assertEqual(set(ledger_oline_dict), set(order_lines))
+        self.assertEqual(
+            self._normalize_oline_dict(ledger_oline_dict),
+            self._normalize_oline_dict(oline_dict),
+        )
+        self._set_param("ledger_engine", "False")
+        cutoff.get_lines()
+        line_values = self._get_line_values(cutoff, order_lines)
+        self.assertEqual(len(line_values), len(order_lines))
+        self._set_param("ledger_engine", "True")
+        self.assertTrue(cutoff._use_picking_ledger())
+        cutoff.get_lines()
+        self.assertEqual(self._get_line_values(cutoff, order_lines), line_values)
+
+    def test_ledger_accrued_expense(self):
+        order_lines = self._create_purchase_scenario()
+        cutoff = self._create_cutoff("accrued_expense")
+        self._check_ledger(cutoff, order_lines, "purchase")
+
+    def test_ledger_accrued_revenue(self):
+        order_lines = self._create_sale_scenario()
+        cutoff = self._create_cutoff("accrued_revenue")
+        self._check_ledger(cutoff, order_lines, "sale")
@@ -0,0 +1,188 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo.tools import float_is_zero
+from odoo.tools.misc import format_date, format_datetime, formatLang
+
+from .common import TestAccountCutoffPickingCommon
+
+
+class TestAccountCutoffPickingNotes(TestAccountCutoffPickingCommon):
+    def _get_former_notes(self, cutoff, order_line, order_type, qty):
+        """Return the notes and the price origin that the generation stored
+        on the cut-off line of the order line before the notes were
+        rendered from the picking audit"""
+
+        def format_qty(qty):
+            return formatLang(self.env, qty, dp="Product Unit of Measure")
+
+        order = order_line.order_id
+        product_uom = order_line.product_id.uom_id
+        if order_type == "purchase":
+            ordered_qty = order_line.product_uom._compute_quantity(
+                order_line.product_qty, product_uom
+            )
+            notes = (
+                "Purchase order %s confirmed on %s\n"
+                "Purchase Order Line: %s (ordered qty: %s %s)"
+            ) % (
+                order.name,
+                format_datetime(self.env, order.date_approve),
+                order_line.name,
+                format_qty(ordered_qty),
+                product_uom.name,
+            )
+        else:
+            ordered_qty = order_line.product_uom._compute_quantity(
+                order_line.product_uom_qty, product_uom
+            )
+            notes = (
+                "Sale order %s confirmed on %s\n"
+                "Sale Order Line: %s (ordered qty: %s %s)"
+            ) % (
+                order.name,
+                format_datetime(self.env, order.date_order),
+                order_line.name,
+                format_qty(ordered_qty),
+                product_uom.name,
+            )
+        cutoff_datetime = cutoff._get_cutoff_datetime()
+        outgoing_moves, incoming_moves = order_line._get_outgoing_incoming_moves()
+        move_logs = []
+        for out_move in outgoing_moves.filtered(
+            lambda m: m.state == "done" and m.date <= cutoff_datetime
+        ):
+            sign = order_type == "purchase" and -1 or 1
+            move_logs.append(
+                (
+                    out_move,
+                    out_move.product_uom._compute_quantity(
+                        out_move.quantity_done * sign, product_uom
+                    ),
+                )
+            )
+        for in_move in incoming_moves.filtered(
+            lambda m: m.state == "done" and m.date <= cutoff_datetime
+        ):
+            sign = order_type == "sale" and -1 or 1
+            move_logs.append(
+                (
+                    in_move,
+                    in_move.product_uom._compute_quantity(
+                        in_move.quantity_done * sign, product_uom
+                    ),
+                )
+            )
+        delivered_qty = 0.0
+        delivered_logs = []
+        for move, move_qty in sorted(move_logs, key=lambda log: log[0].date):
+            delivered_qty += move_qty
+            delivered_logs.append(
+                " • %s %s (picking %s transfered on %s from %s to %s)"
+                % (
+                    format_qty(move_qty),
+                    move.product_id.uom_id.name,
+                    move.picking_id.name or "none",
+                    format_datetime(self.env, move.date),
+                    move.location_id.display_name,
+                    move.location_dest_id.display_name,
+                )
+            )
+        move_type2label = dict(
+            self.env["account.move"].fields_get("move_type", "selection")["move_type"][
+                "selection"
+            ]
+        )
+        qty_prec = self.env["decimal.precision"].precision_get(
+            "Product Unit of Measure"
+        )
+        invoiced_qty = 0.0
+        invoiced_logs = []
+        price_origin = False
+        for iline in order_line.invoice_lines.filtered(
+            lambda x: x.parent_state == "posted"
+        ):
+            invoice = iline.move_id
+            if float_is_zero(iline.quantity, precision_digits=qty_prec):
+                continue
+            sign = invoice.move_type in ("out_refund", "in_refund") and -1 or 1
+            iline_qty = iline.product_uom_id._compute_quantity(
+                iline.quantity * sign, product_uom
+            )
+            if invoice.date <= cutoff.cutoff_date:
+                invoiced_qty += iline_qty
+                invoiced_logs.append(
+                    " • %s %s (%s %s dated %s)"
+                    % (
+                        format_qty(iline_qty),
+                        iline.product_id.uom_id.name,
+                        move_type2label[invoice.move_type],
+                        invoice.name,
+                        format_date(self.env, invoice.date),
+                    )
+                )
+            price_origin = invoice.name
+        notes += "\nPre-cutoff delivered quantity: %s %s" % (
+            format_qty(delivered_qty),
+            product_uom.name,
+        )
+        if delivered_logs:
+            notes += "\nPre-cutoff delivered quantity details:\n%s" % "\n".join(
+                delivered_logs
+            )
+        notes += "\nPre-cutoff invoiced quantity: %s %s" % (
+            format_qty(invoiced_qty),
+            product_uom.name,
+        )
+        if invoiced_logs:
+            notes += "\nPre-cutoff invoiced quantity details:\n%s" % "\n".join(
+                invoiced_logs
+            )
+        notes += "\nPre-cutoff delivered quantity minus invoiced quantity: %s %s" % (
+            format_qty(qty),
+            product_uom.name,
+        )
+        return notes, price_origin or order.name
+
+    def _get_cutoff_line(self, cutoff, order_line, order_type):
+        key_field = cutoff._get_order_line_key_field(order_type)
+        return cutoff.line_ids.filtered(lambda x: x[key_field] == order_line)
+
+    def _check_notes(self, cutoff, order_lines, order_type):
+        """Check the notes of the cut-off lines of the order lines, computed
+        with the Python analysis and with the SQL quantity engine"""
+        for sql_engine in ("False", "True"):
+            self._set_param("sql_engine", sql_engine)
+            cutoff.get_lines()
+            for order_line in order_lines:
+                line = self._get_cutoff_line(cutoff, order_line, order_type)
+                self.assertEqual(len(line), 1)
+                notes, price_origin = self._get_former_notes(
+                    cutoff, order_line, order_type, line.quantity
+                )
+                self.assertEqual(line.picking_notes, notes)
+                self.assertEqual(line.price_origin, price_origin)
+                self.assertFalse(line.notes)
+
+    def test_notes_accrued_expense(self):
+        order_lines = self._create_purchase_scenario()
+        cutoff = self._create_cutoff("accrued_expense")
+        self._check_notes(cutoff, order_lines, "purchase")
+        # the price of the first line comes from the oldest bill, not from
+        # the refund, and the price of the second one from the order
+        bill = order_lines[0].invoice_lines.move_id.filtered(
+            lambda x: x.move_type == "in_invoice"
+        )
+        self.assertEqual(
+            self._get_cutoff_line(cutoff, order_lines[0], "purchase").price_origin,
+            bill.name,
+        )
+        self.assertEqual(
+            self._get_cutoff_line(cutoff, order_lines[1], "purchase").price_origin,
+            order_lines[1].order_id.name,
+        )
+
+    def test_notes_accrued_revenue(self):
+        order_lines = self._create_sale_scenario()
+        cutoff = self._create_cutoff("accrued_revenue")
+        self._check_notes(cutoff, order_lines, "sale")
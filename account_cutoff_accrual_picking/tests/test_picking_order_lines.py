@@ -0,0 +1,123 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from dateutil.relativedelta import relativedelta
+
+from .common import TestAccountCutoffPickingCommon
+
+
+class TestAccountCutoffPickingOrderLines(TestAccountCutoffPickingCommon):
+    def _get_former_order_lines(self, cutoff, picking_type_code):
+        """Return the order lines found by the former loop on the done
+        stock moves of the pickings"""
+        cutoff._reset_run_cache()
+        cutoff._get_run_cache()["picking_qty_sql"] = False
+        cutoff_datetime = cutoff._get_cutoff_datetime()
+        min_date_dt = cutoff_datetime - relativedelta(days=cutoff.picking_interval_days)
+        pickings = self.env["stock.picking"].search(
+            [
+                ("picking_type_code", "=", picking_type_code),
+                ("state", "=", "done"),
+                ("date_done", "<=", cutoff_datetime),
+                ("date_done", ">=", min_date_dt),
+                ("company_id", "=", cutoff.company_id.id),
+            ]
+        )
+        oline_dict = {}
+        for picking in pickings:
+            for move in picking.move_lines.filtered(lambda m: m.state == "done"):
+                cutoff.stock_move_update_oline_dict(move, oline_dict, cutoff_datetime)
+        return list(oline_dict)
+
+    def _get_order_lines(self, cutoff, picking_type_code):
+        cutoff_datetime = cutoff._get_cutoff_datetime()
+        min_date_dt = cutoff_datetime - relativedelta(days=cutoff.picking_interval_days)
+        return cutoff._get_picking_accrual_order_lines(
+            picking_type_code, cutoff_datetime, min_date_dt
+        )
+
+    def _check_order_lines(self, cutoff, picking_type_code, expected, excluded):
+        order_lines = self._get_order_lines(cutoff, picking_type_code)
+        self.assertEqual(len(order_lines.ids), len(set(order_lines.ids)))
+        former_order_lines = self._get_former_order_lines(cutoff, picking_type_code)
+        self.assertEqual(
+            set(order_lines.ids), {oline.id for oline in former_order_lines}
+        )
+        for order_line in expected:
+            self.assertIn(order_line, order_lines)
+        for order_line in excluded:
+            self.assertNotIn(order_line, order_lines)
+
+    def _validate_backorder(self, picking, qty, days):
+        backorder = self.env["stock.picking"].search(
+            [("backorder_id", "=", picking.id)]
+        )
+        self.assertEqual(len(backorder), 1)
+        return self._validate_picking(backorder, qty, days)
+
+    def _set_zero_qty(self, order_line, qty_field):
+        """Set the quantity of the order line to zero, as a quantity that
+        was rounded to zero"""
+        self.env["base"].flush()
+        self.env.cr.execute(
+            "UPDATE {} SET {} = 0 WHERE id = %s".format(order_line._table, qty_field),
+            (order_line.id,),
+        )
+        order_line.invalidate_cache([qty_field])
+
+    def test_order_lines_incoming(self):
+        cutoff = self._create_cutoff("accrued_expense")
+        cutoff.picking_interval_days = 10
+        # two receipts of the same order line
+        partial_line = self._create_purchase_order(5).order_line
+        receipt = self._validate_picking(partial_line.order_id.picking_ids, 2, -3)
+        self._validate_backorder(receipt, 3, -2)
+        self.assertEqual(
+            len(partial_line.move_ids.filtered(lambda m: m.state == "done")), 2
+        )
+        # a receipt and a return of the same order line
+        returned_line = self._create_purchase_order(5).order_line
+        receipt = self._validate_picking(returned_line.order_id.picking_ids, 5, -3)
+        self._return_picking(receipt, 1, -2)
+        # received before the analysis interval and after the cut-off
+        old_line = self._create_purchase_order(5).order_line
+        self._validate_picking(old_line.order_id.picking_ids, 5, -20)
+        future_line = self._create_purchase_order(5).order_line
+        self._validate_picking(future_line.order_id.picking_ids, 5, 2)
+        # received in another company
+        company = self.env["res.company"].create({"name": "Cut-off Test Company"})
+        other_line = self._create_purchase_order(5, company=company).order_line
+        self._validate_picking(other_line.order_id.picking_ids, 5, -1)
+        # received, with a quantity rounded to zero
+        zero_line = self._create_purchase_order(5).order_line
+        self._validate_picking(zero_line.order_id.picking_ids, 5, -1)
+        self._set_zero_qty(zero_line, "product_qty")
+        self._check_order_lines(
+            cutoff,
+            "incoming",
+            partial_line | returned_line,
+            old_line | future_line | other_line | zero_line,
+        )
+
+    def test_order_lines_outgoing(self):
+        cutoff = self._create_cutoff("accrued_revenue")
+        cutoff.picking_interval_days = 10
+        # two deliveries of the same order line
+        partial_line = self._create_sale_order(5).order_line
+        delivery = self._validate_picking(partial_line.order_id.picking_ids, 2, -3)
+        self._validate_backorder(delivery, 3, -2)
+        # delivered before the analysis interval and after the cut-off
+        old_line = self._create_sale_order(5).order_line
+        self._validate_picking(old_line.order_id.picking_ids, 5, -20)
+        future_line = self._create_sale_order(5).order_line
+        self._validate_picking(future_line.order_id.picking_ids, 5, 2)
+        # delivered, with a quantity rounded to zero
+        zero_line = self._create_sale_order(5).order_line
+        self._validate_picking(zero_line.order_id.picking_ids, 5, -1)
+        self._set_zero_qty(zero_line, "product_uom_qty")
+        self._check_order_lines(
+            cutoff,
+            "outgoing",
+            partial_line,
+            old_line | future_line | zero_line,
+        )
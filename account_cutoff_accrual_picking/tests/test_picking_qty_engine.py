@@ -0,0 +1,84 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from .common import TestAccountCutoffPickingCommon
+
+
+class TestPickingQtyEngine(TestAccountCutoffPickingCommon):
+    def _check_engines(self, cutoff_type, order_lines):
+        cutoff = self._create_cutoff(cutoff_type)
+        oline_dict = self._get_oline_dict(cutoff, order_lines)
+        self.assertEqual(
+            self._normalize_oline_dict(oline_dict),
+            self._normalize_oline_dict(
+                self._get_oline_dict(cutoff, order_lines, use_sql=True)
+            ),
+        )
+        self._set_param("sql_engine", "False")
+        cutoff.get_lines()
+        python_lines = self._get_line_values(cutoff, order_lines)
+        self._set_param("sql_engine", "True")
+        cutoff.get_lines()
+        self.assertEqual(self._get_line_values(cutoff, order_lines), python_lines)
+        return oline_dict, python_lines
+
+    def test_accrued_expense(self):
+        order_lines = self._create_purchase_scenario()
+        oline_dict, lines = self._check_engines("accrued_expense", order_lines)
+        vdict1, vdict2 = oline_dict[order_lines[0]], oline_dict[order_lines[1]]
+        # 24 units received, 6 returned, 12 billed and 6 refunded
+        self.assertAlmostEqual(vdict1["precut_delivered_qty"], 18)
+        self.assertAlmostEqual(vdict1["precut_invoiced_qty"], 6)
+        self.assertEqual(len(vdict1["precut_delivered_moves"]), 2)
+        self.assertEqual(len(vdict1["precut_invoiced_lines"]), 2)
+        # the price of the invoice line, by unit of the product
+        self.assertAlmostEqual(vdict1["price_unit"], 10)
+        self.assertNotEqual(vdict1["price_origin"], order_lines[0].order_id.name)
+        # the price of the order line without bill
+        self.assertAlmostEqual(vdict2["precut_delivered_qty"], 5)
+        self.assertAlmostEqual(vdict2["price_unit"], 10)
+        self.assertEqual(vdict2["price_origin"], order_lines[1].order_id.name)
+        self.assertEqual(vdict2["account_id"], self.expense_account.id)
+        self.assertEqual(len(lines), 2)
+
+    def test_accrued_revenue(self):
+        order_lines = self._create_sale_scenario()
+        oline_dict, lines = self._check_engines("accrued_revenue", order_lines)
+        vdict1, vdict2 = oline_dict[order_lines[0]], oline_dict[order_lines[1]]
+        # 4 units delivered, 1 returned, 2 invoiced and 1 refunded
+        self.assertAlmostEqual(vdict1["precut_delivered_qty"], 3)
+        self.assertAlmostEqual(vdict1["precut_invoiced_qty"], 1)
+        self.assertAlmostEqual(vdict1["price_unit"], 50)
+        self.assertAlmostEqual(vdict2["precut_delivered_qty"], 3)
+        self.assertEqual(vdict2["price_origin"], order_lines[1].order_id.name)
+        self.assertEqual(vdict2["account_id"], self.income_account.id)
+        self.assertEqual(len(lines), 2)
+
+    def test_uom_rounding(self):
+        # a unit of measure of the product with a rounding that is not a
+        # power of ten
+        uom_pack = self.env["uom.uom"].create(
+            {
+                "name": "Cut-off Test Pack",
+                "category_id": self.uom_unit.category_id.id,
+                "uom_type": "bigger",
+                "factor_inv": 1.5,
+                "rounding": 0.3,
+            }
+        )
+        product = self._create_product("Cut-off Test Product in Packs")
+        product.write({"uom_id": uom_pack.id, "uom_po_id": uom_pack.id})
+        order_line = self._create_purchase_order(
+            7, price_unit=10.0, product=product
+        ).order_line
+        self._validate_picking(order_line.order_id.picking_ids, 7, -3)
+        self._create_invoice(order_line, 5, -2)
+        # converted to exactly 2 roundings of the pack
+        self._create_invoice(order_line, 0.9, -1)
+        oline_dict, lines = self._check_engines("accrued_expense", order_line)
+        vdict = oline_dict[order_line]
+        # 7 units received as 4.8 packs, 5 and 0.9 units billed as 3.6 and
+        # 0.6 packs
+        self.assertAlmostEqual(vdict["precut_delivered_qty"], 4.8)
+        self.assertAlmostEqual(vdict["precut_invoiced_qty"], 4.2)
+        self.assertEqual(len(lines), 1)
@@ -13,12 +13,16 @@ from odoo.tools.misc import format_amount, format_date
 class AccountCutoff(models.Model):
     _inherit = "account.cutoff"
 
+    def _get_line_source_key_fields(self):
+        return super()._get_line_source_key_fields() + ["subscription_id"]
+
     def get_lines(self):
         res = super().get_lines()
         if self.cutoff_type not in ["accrued_expense", "accrued_revenue"]:
             return res
+        if self._is_checkpoint_done("account.cutoff.accrual.subscription"):
+            return res
 
-        line_obj = self.env["account.cutoff.line"]
         sub_obj = self.env["account.cutoff.accrual.subscription"]
 
         fy_start_date, fy_end_date = date_utils.get_fiscal_year(
@@ -35,13 +39,16 @@ class AccountCutoff(models.Model):
         }
         sub_type = type2subtype[self.cutoff_type]
         sign = sub_type == "revenue" and -1 or 1
-        subs = sub_obj.search(
-            [
-                ("company_id", "=", self.company_id.id),
-                ("subscription_type", "=", sub_type),
-                ("start_date", "<=", self.cutoff_date),
-            ]
-        )
+        sub_domain = [
+            ("company_id", "=", self.company_id.id),
+            ("subscription_type", "=", sub_type),
+            ("start_date", "<=", self.cutoff_date),
+        ]
+        position = self._get_checkpoint_position("account.cutoff.accrual.subscription")
+        if position:
+            sub_domain.append(("id", ">", position))
+        with self._profile_phase("search sources"):
+            subs = sub_obj.search(sub_domain, order="id")
         if subs:
             # check that the cutoff is the last day of a month
             # otherwise, we have pb with when we compute intervals
@@ -57,6 +64,8 @@ class AccountCutoff(models.Model):
                 )
             if not self.source_journal_ids:
                 raise UserError(_("Missing source journals."))
+            if self.company_id.accrual_taxes:
+                self._check_tax_accrual_accounts(subs.tax_ids)
             self.message_post(
                 body=_("Computing provisions from %d subscriptions.") % len(subs)
             )
@@ -67,20 +76,26 @@ class AccountCutoff(models.Model):
             common_domain.append(("parent_state", "in", ("draft", "posted")))
         work = {}
         # Generate time intervals and compute existing expenses/revenue
-        for sub in subs:
-            sub._process_subscription(
-                work, fy_start_date, self.cutoff_date, common_domain, sign
-            )
+        with self._profile_phase("subscriptions analysis"):
+            for sub in subs:
+                sub._process_subscription(
+                    work, fy_start_date, self.cutoff_date, common_domain, sign
+                )
         # Create mapping dict
         mapping = self._get_mapping_dict()
         sub_type_label = sub_type == "expense" and _("Expense") or _("Revenue")
         lsign = sub_type == "expense" and -1 or 1
-        for sub in work.keys():
-            vals = self._prepare_subscription_cutoff_line(
-                work[sub], mapping, sub_type_label, lsign
-            )
-            if vals:
-                line_obj.create(vals)
+        with self._get_line_writer(
+            total=len(work),
+            key_field="subscription_id",
+            checkpoint_source="account.cutoff.accrual.subscription",
+        ) as writer:
+            for sub in work.keys():
+                with self._profile_phase("prepare lines"):
+                    vals = self._prepare_subscription_cutoff_line(
+                        work[sub], mapping, sub_type_label, lsign
+                    )
+                writer.add(vals, position=sub.id)
         return res
 
     def _prepare_subscription_cutoff_line(self, data, mapping, sub_type_label, lsign):
@@ -178,8 +193,8 @@ class AccountCutoff(models.Model):
                 "notes": "\n".join(notes),
             }
             if sub.tax_ids and self.company_id.accrual_taxes:
-                tax_compute_all_res = sub.tax_ids.compute_all(
-                    cutoff_amount, partner=sub.partner_id, handle_price_include=False
+                tax_compute_all_res = self._compute_all_taxes(
+                    sub.tax_ids, cutoff_amount, partner=sub.partner_id
                 )
                 vals["tax_line_ids"] = self._prepare_tax_lines(
                     tax_compute_all_res, ccur
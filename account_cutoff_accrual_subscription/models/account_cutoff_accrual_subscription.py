@@ -257,44 +257,20 @@ class AccountCutoffAccrualSubscription(models.Model):
             amount_inside = inside_res and inside_res[0]["balance"] or 0
             amount += amount_inside * sign
             # 3. Start/end dates, OVER interval
-            mlines = aml_obj.search(
-                domain_base_w_start_end
-                + [
-                    ("start_date", "<", start_date),
-                    ("end_date", ">", end_date),
-                ]
-            )
-            for mline in mlines:
-                total_days = (mline.end_date - mline.start_date).days + 1
-                days_in_interval = (end_date - start_date).days + 1
-                amount_in_interval = mline.balance * days_in_interval / total_days
-                amount += amount_in_interval * sign
             # 4. Start/end dates, start_date before, end_date inside
-            mlines = aml_obj.search(
-                domain_base_w_start_end
-                + [
-                    ("start_date", "<", start_date),
-                    ("end_date", ">=", start_date),
-                    ("end_date", "<=", end_date),
-                ]
-            )
-            for mline in mlines:
-                total_days = (mline.end_date - mline.start_date).days + 1
-                days_in_interval = (mline.end_date - start_date).days + 1
-                amount_in_interval = mline.balance * days_in_interval / total_days
-                amount += amount_in_interval * sign
             # 5. Start/end dates, start_date inside, end_date after
+            # i.e. the journal items whose dates overlap the interval
+            # without being inside it
             mlines = aml_obj.search(
                 domain_base_w_start_end
-                + [
-                    ("start_date", ">=", start_date),
-                    ("start_date", "<=", end_date),
-                    ("end_date", ">", end_date),
-                ]
+                + aml_obj._get_date_range_overlap_domain(start_date, end_date)
+                + ["|", ("start_date", "<", start_date), ("end_date", ">", end_date)]
             )
             for mline in mlines:
                 total_days = (mline.end_date - mline.start_date).days + 1
-                days_in_interval = (end_date - mline.start_date).days + 1
+                days_in_interval = (
+                    min(mline.end_date, end_date) - max(mline.start_date, start_date)
+                ).days + 1
                 amount_in_interval = mline.balance * days_in_interval / total_days
                 amount += amount_in_interval * sign
 
@@ -0,0 +1 @@
+from . import test_accrual_subscription
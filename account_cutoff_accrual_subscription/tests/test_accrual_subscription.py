@@ -0,0 +1,131 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from datetime import date
+
+from odoo.tests.common import SavepointCase
+
+
+class TestAccrualSubscription(SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.ref("base.main_company")
+        cls.account_expense = cls.env["account.account"].search(
+            [
+                (
+                    "user_type_id",
+                    "=",
+                    cls.env.ref("account.data_account_type_expenses").id,
+                ),
+                ("company_id", "=", cls.company.id),
+            ],
+            limit=1,
+        )
+        cls.purchase_journal = cls.env["account.journal"].search(
+            [("type", "=", "purchase"), ("company_id", "=", cls.company.id)],
+            limit=1,
+        )
+        cls.partner = cls.env["res.partner"].create({"name": "Subscription Supplier"})
+        cls.sub = cls.env["account.cutoff.accrual.subscription"].create(
+            {
+                "name": "Test Subscription",
+                "company_id": cls.company.id,
+                "subscription_type": "expense",
+                "partner_type": "one",
+                "partner_id": cls.partner.id,
+                "periodicity": "month",
+                "start_date": "2021-01-01",
+                "min_amount": 1000,
+                "account_id": cls.account_expense.id,
+            }
+        )
+
+    def _create_invoice(self, amount, start_date, end_date):
+        invoice = self.env["account.move"].create(
+            {
+                "company_id": self.company.id,
+                "invoice_date": "2021-01-05",
+                "date": "2021-01-05",
+                "partner_id": self.partner.id,
+                "journal_id": self.purchase_journal.id,
+                "move_type": "in_invoice",
+                "invoice_line_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": "subscription",
+                            "price_unit": amount,
+                            "quantity": 1,
+                            "account_id": self.account_expense.id,
+                            "start_date": start_date,
+                            "end_date": end_date,
+                        },
+                    )
+                ],
+            }
+        )
+        invoice.action_post()
+        return invoice
+
+    def _get_former_amount(self, items, start_date, end_date):
+        """Amount of the interval with the formulas of each case"""
+        amount = 0
+        for balance, item_start, item_end in items:
+            total_days = (item_end - item_start).days + 1
+            if item_start >= start_date and item_end <= end_date:
+                # inside the interval
+                amount += balance
+            elif item_start < start_date and item_end > end_date:
+                # over the interval
+                amount += balance * ((end_date - start_date).days + 1) / total_days
+            elif item_start < start_date and start_date <= item_end <= end_date:
+                # start date before, end date inside
+                amount += balance * ((item_end - start_date).days + 1) / total_days
+            elif start_date <= item_start <= end_date and item_end > end_date:
+                # start date inside, end date after
+                amount += balance * ((end_date - item_start).days + 1) / total_days
+        return self.company.currency_id.round(amount)
+
+    def test_overlapping_items(self):
+        items = [
+            # spans March, ends inside February
+            (590.0, date(2021, 2, 15), date(2021, 4, 14)),
+            # starts inside January, ends inside February
+            (220.0, date(2021, 1, 20), date(2021, 2, 10)),
+            # starts inside March
+            (420.0, date(2021, 3, 20), date(2021, 4, 30)),
+            # spans January, February and March
+            (3650.0, date(2020, 7, 1), date(2021, 6, 30)),
+        ]
+        for balance, start_date, end_date in items:
+            self._create_invoice(balance, start_date, end_date)
+        work = {}
+        self.sub._process_subscription(
+            work,
+            date(2021, 1, 1),
+            date(2021, 3, 31),
+            [
+                ("journal_id", "=", self.purchase_journal.id),
+                ("parent_state", "=", "posted"),
+            ],
+            1,
+        )
+        intervals = work[self.sub]["intervals"]
+        self.assertEqual(
+            [(interval["start"], interval["end"]) for interval in intervals],
+            [
+                (date(2021, 1, 1), date(2021, 1, 31)),
+                (date(2021, 2, 1), date(2021, 2, 28)),
+                (date(2021, 3, 1), date(2021, 3, 31)),
+            ],
+        )
+        for interval in intervals:
+            self.assertAlmostEqual(
+                interval["amount"],
+                self._get_former_amount(items, interval["start"], interval["end"]),
+            )
+        # 31 days of the 59 days of the first item, 12 days of the 42 days
+        # of the third item and 31 days of the 365 days of the last item
+        self.assertAlmostEqual(intervals[2]["amount"], 310 + 120 + 310)
@@ -4,7 +4,7 @@
 
 {
     "name": "Account Cut-off Base",
-    "version": "14.0.2.0.1",
+    "version": "14.0.2.1.0",
     "category": "Accounting & Finance",
     "license": "AGPL-3",
     "summary": "Base module for Account Cut-offs",
@@ -15,8 +15,11 @@
     "data": [
         "security/account_cutoff_base_security.xml",
         "security/ir.model.access.csv",
+        "data/ir_cron.xml",
         "views/res_config_settings.xml",
         "views/account_cutoff.xml",
+        "views/account_cutoff_batch.xml",
+        "views/account_cutoff_run_stat.xml",
         "views/account_cutoff_mapping.xml",
         "views/account_tax.xml",
     ],
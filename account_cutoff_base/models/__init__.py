@@ -2,3 +2,6 @@ from . import res_company
 from . import account_tax
 from . import account_cutoff
 from . import account_cutoff_mapping
+from . import account_cutoff_job
+from . import account_cutoff_batch
+from . import account_cutoff_run_stat
@@ -2,13 +2,26 @@
 # @author: Alexis de Lattre <alexis.delattre@akretion.com>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+import json
 from collections import defaultdict
+from contextlib import contextmanager
+from weakref import WeakKeyDictionary
 
+import psycopg2
 from dateutil.relativedelta import relativedelta
 
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError
-from odoo.tools import date_utils, float_is_zero
+from odoo.tools import date_utils, float_is_zero, float_round, mute_logger
+
+from .account_cutoff_line_writer import CutoffLineWriter
+from .account_cutoff_profiler import CutoffProfiler, no_phase
+
+DEFAULT_LINE_BATCH_SIZE = 1000
+# Data cached during a generation of cut-off lines, by cursor and cut-off ID
+_run_caches = WeakKeyDictionary()
+# Profilers of the runs on the cut-offs, by cursor and cut-off ID
+_run_profilers = WeakKeyDictionary()
 
 
 class AccountCutoff(models.Model):
@@ -30,6 +43,11 @@ class AccountCutoff(models.Model):
         for cutoff in self:
             cutoff.total_cutoff_amount = mapped_data.get(cutoff.id, 0)
 
+    @api.depends("job_ids.progress")
+    def _compute_generation_progress(self):
+        for cutoff in self:
+            cutoff.generation_progress = cutoff.job_ids[:1].progress
+
     @property
     def cutoff_type_label_map(self):
         return {
@@ -174,14 +192,29 @@ class AccountCutoff(models.Model):
         states={"draft": [("readonly", False)]},
     )
     state = fields.Selection(
-        selection=[("draft", "Draft"), ("done", "Done")],
+        selection=[("draft", "Draft"), ("computing", "Computing"), ("done", "Done")],
         index=True,
         readonly=True,
         tracking=True,
         default="draft",
         copy=False,
-        help="State of the cutoff. When the Journal Entry is created, "
-        "the state is set to 'Done' and the fields become read-only.",
+        help="State of the cutoff. When the lines are generated in the "
+        "background, the state is 'Computing'. When the Journal Entry is "
+        "created, the state is set to 'Done' and the fields become read-only.",
+    )
+    job_ids = fields.One2many(
+        "account.cutoff.job", "cutoff_id", string="Background Generations"
+    )
+    generation_progress = fields.Float(compute="_compute_generation_progress")
+    generation_checkpoint = fields.Text(
+        readonly=True,
+        copy=False,
+        help="Position of the last chunk of lines committed by an interrupted "
+        "background generation, from which the next background generation "
+        "resumes.",
+    )
+    run_stat_ids = fields.One2many(
+        "account.cutoff.run.stat", "cutoff_id", string="Profiling"
     )
 
     _sql_constraints = [
@@ -291,6 +324,98 @@ class AccountCutoff(models.Model):
             to_provision[key] += provision_line["amount"]
         return to_provision
 
+    def _get_provision_sql_map(self):
+        """Return the SQL expressions of the merge keys
+
+        Returns a dictionary {key: (line_expr, tax_line_expr)} where key
+        is a merge key (see _get_merge_keys), line_expr is its value on
+        the table account_cutoff_line (alias l) and tax_line_expr is its
+        value on the table account_cutoff_tax_line (alias t).
+
+        When all the merge keys are in this dictionary, the provision
+        lines are merged by a single SQL query. If you override
+        _prepare_provision_line or _prepare_provision_tax_line, override
+        this method too, otherwise the provision lines are merged in Python.
+        If you override _merge_provision_lines, they are always merged in
+        Python.
+        """
+        self.ensure_one()
+        return {
+            "partner_id": (self.move_partner and "l.partner_id" or "NULL", "NULL"),
+            "account_id": ("l.cutoff_account_id", "t.cutoff_account_id"),
+            "analytic_account_id": ("l.analytic_account_id", "t.analytic_account_id"),
+        }
+
+    def _is_overridden(self, method_name, cls):
+        """Return True if another module overrides the method of the class cls"""
+        return getattr(type(self), method_name) is not getattr(cls, method_name)
+
+    def _use_provision_sql(self):
+        self.ensure_one()
+        sql_map = self._get_provision_sql_map()
+        if any(key not in sql_map for key in self._get_merge_keys()):
+            return False
+        if self._is_overridden("_merge_provision_lines", AccountCutoff):
+            return False
+        hooks_overridden = self._is_overridden(
+            "_prepare_provision_line", AccountCutoff
+        ) or self._is_overridden("_prepare_provision_tax_line", AccountCutoff)
+        return not hooks_overridden or self._is_overridden(
+            "_get_provision_sql_map", AccountCutoff
+        )
+
+    def _merge_provision_lines_sql(self):
+        """Same as _merge_provision_lines, with a single SQL query
+        on the cut-off lines and the cut-off tax lines of the cut-off.
+        """
+        self.ensure_one()
+        self.env["account.cutoff.line"].flush()
+        self.env["account.cutoff.tax.line"].flush()
+        merge_keys = self._get_merge_keys()
+        sql_map = self._get_provision_sql_map()
+        line_exprs = ", ".join(
+            "%s AS %s" % (sql_map[key][0], key) for key in merge_keys
+        )
+        tax_line_exprs = ", ".join(sql_map[key][1] for key in merge_keys)
+        positions = ", ".join(str(i) for i in range(1, len(merge_keys) + 1))
+        query = """
+            SELECT {keys}, SUM(amount)
+            FROM (
+                SELECT {line_exprs}, l.cutoff_amount AS amount
+                FROM account_cutoff_line l
+                WHERE l.parent_id = %(cutoff_id)s
+                UNION ALL
+                SELECT {tax_line_exprs}, t.cutoff_amount
+                FROM account_cutoff_tax_line t
+                JOIN account_cutoff_line l ON l.id = t.parent_id
+                WHERE l.parent_id = %(cutoff_id)s
+            ) AS provision
+            GROUP BY {positions}
+            ORDER BY {positions}
+        """.format(
+            keys=", ".join(merge_keys),
+            line_exprs=line_exprs,
+            tax_line_exprs=tax_line_exprs,
+            positions=positions,
+        )
+        self.env.cr.execute(query, {"cutoff_id": self.id})
+        to_provision = defaultdict(float)
+        for row in self.env.cr.fetchall():
+            key = tuple(value or False for value in row[:-1])
+            to_provision[key] += float(row[-1] or 0)
+        return to_provision
+
+    def _get_to_provision(self):
+        self.ensure_one()
+        if self._use_provision_sql():
+            return self._merge_provision_lines_sql()
+        provision_lines = []
+        for line in self.line_ids:
+            provision_lines.append(self._prepare_provision_line(line))
+            for tax_line in line.tax_line_ids:
+                provision_lines.append(self._prepare_provision_tax_line(tax_line))
+        return self._merge_provision_lines(provision_lines)
+
     def create_move(self):
         self.ensure_one()
         move_obj = self.env["account.move"]
@@ -301,6 +426,10 @@ class AccountCutoff(models.Model):
                     "delete it before running this function."
                 )
             )
+        if self.state != "draft":
+            raise UserError(
+                _("You can only create the journal entry of a draft cut-off.")
+            )
         if not self.line_ids:
             raise UserError(
                 _(
@@ -308,18 +437,18 @@ class AccountCutoff(models.Model):
                     "a Journal Entry."
                 )
             )
-        provision_lines = []
-        for line in self.line_ids:
-            provision_lines.append(self._prepare_provision_line(line))
-            for tax_line in line.tax_line_ids:
-                provision_lines.append(self._prepare_provision_tax_line(tax_line))
-        to_provision = self._merge_provision_lines(provision_lines)
-        vals = self._prepare_move(to_provision)
-        move = move_obj.create(vals)
-        if self.company_id.post_cutoff_move:
-            move._post(soft=False)
-        self.write({"move_id": move.id, "state": "done"})
-        self.message_post(body=_("Journal entry generated"))
+        with self._profile_run("create_move"):
+            with self._profile_phase("provision"):
+                to_provision = self._get_to_provision()
+            with self._profile_phase("move creation"):
+                vals = self._prepare_move(to_provision)
+                move = move_obj.create(vals)
+            self._profile_rows("move creation", len(vals["line_ids"]) + 1)
+            if self.company_id.post_cutoff_move:
+                with self._profile_phase("move posting"):
+                    move._post(soft=False)
+            self.write({"move_id": move.id, "state": "done"})
+            self.message_post(body=_("Journal entry generated"))
 
         xmlid = "account.action_move_journal_line"
         action = self.env["ir.actions.act_window"]._for_xml_id(xmlid)
@@ -333,14 +462,320 @@ class AccountCutoff(models.Model):
         )
         return action
 
+    def _lock_for_generation(self):
+        """Lock the cut-off until the end of the transaction, so that its
+        lines cannot be generated twice at the same time"""
+        self.ensure_one()
+        if self.state == "computing" and not self.env.context.get("cutoff_job_id"):
+            raise UserError(
+                _("The lines of this cut-off are being generated in the background.")
+            )
+        try:
+            with self.env.cr.savepoint(), mute_logger("odoo.sql_db"):
+                self.env.cr.execute(
+                    "SELECT id FROM account_cutoff WHERE id = %s FOR UPDATE NOWAIT",
+                    (self.id,),
+                )
+        except psycopg2.OperationalError:
+            raise UserError(
+                _(
+                    "The lines of this cut-off are already being generated. "
+                    "Please try again later."
+                )
+            )
+
+    def _report_progress(self, processed=0, total=0):
+        """Add processed records and records to process to the progress
+        of the background generation job, if any.
+
+        The progress is written in a separate transaction, so that it is
+        visible before the end of the generation.
+        """
+        job_id = self.env.context.get("cutoff_job_id")
+        if not job_id or not (processed or total):
+            return
+        with self.pool.cursor() as cr:
+            cr.execute(
+                "UPDATE account_cutoff_job SET "
+                "progress_done = progress_done + %s, "
+                "progress_total = progress_total + %s, "
+                "date_heartbeat = NOW() AT TIME ZONE 'UTC' "
+                "WHERE id = %s",
+                (processed, total, job_id),
+            )
+
+    def _create_generation_job(self, vals=None):
+        """Create a pending job to generate the lines in the background"""
+        self.ensure_one()
+        if self.state != "draft":
+            raise UserError(_("You can only generate the lines of a draft cut-off."))
+        self._lock_for_generation()
+        job = self.env["account.cutoff.job"].create(dict(vals or {}, cutoff_id=self.id))
+        self.write({"state": "computing"})
+        return job
+
+    def get_lines_async(self):
+        """Generate the lines in the background, with a cron-driven job"""
+        self.ensure_one()
+        self._create_generation_job()
+        self.env.ref("account_cutoff_base.ir_cron_account_cutoff_job")._trigger()
+        self.message_post(body=_("Generation of the lines queued"))
+        return True
+
+    def get_generation_progress(self):
+        """Return the progress of the last background generation,
+        for the clients that poll it"""
+        self.ensure_one()
+        job = self.job_ids[:1]
+        return {
+            "state": self.state,
+            "job_state": job.state,
+            "processed": job.progress_done,
+            "total": job.progress_total,
+            "progress": job.progress,
+        }
+
+    def button_refresh_progress(self):
+        return True
+
     def get_lines(self):
         """This method is designed to be inherited in other modules"""
         self.ensure_one()
-        # Delete existing lines
-        self.line_ids.unlink()
-        self.message_post(body=_("Cut-off lines re-generated"))
+        self._lock_for_generation()
+        self._reset_run_cache()
+        if self.env.context.get("cutoff_update_lines"):
+            # Only delete the lines that don't come from a source record,
+            # the other lines are updated by the sources
+            key_fields = self._get_line_source_key_fields()
+            self.line_ids.filtered(
+                lambda line: not any(line[key] for key in key_fields)
+            ).unlink()
+            self.message_post(body=_("Cut-off lines updated"))
+        elif self._use_generation_checkpoints() and self.generation_checkpoint:
+            # Keep the lines of the chunks committed by the interrupted
+            # generation, the sources resume from the checkpoint
+            self.message_post(
+                body=_("Generation of the cut-off lines resumed from the checkpoint")
+            )
+        else:
+            # Delete existing lines
+            self.line_ids.unlink()
+            self.generation_checkpoint = False
+            self.message_post(body=_("Cut-off lines re-generated"))
         return True
 
+    def generate_lines(self):
+        """Generate the lines with get_lines(), profiled when the
+        profiling of the cut-offs is enabled on the company"""
+        self.ensure_one()
+        run_type = "get_lines"
+        if self.env.context.get("cutoff_update_lines"):
+            run_type = "update_lines"
+        with self._profile_run(run_type):
+            res = self.get_lines()
+            if self.generation_checkpoint:
+                self.generation_checkpoint = False
+            return res
+
+    def _use_generation_checkpoints(self):
+        """Return True if the lines are committed by chunks, with a
+        checkpoint to resume from if the generation fails
+
+        Only the background generations, which have their own cursor,
+        commit their chunks. The updates of the lines don't, as they
+        delete the lines of the missing sources at the end.
+        """
+        return bool(self.env.context.get("cutoff_job_id")) and not (
+            self.env.context.get("cutoff_update_lines")
+        )
+
+    def _get_generation_checkpoint(self):
+        self.ensure_one()
+        return json.loads(self.generation_checkpoint or "{}")
+
+    def _is_checkpoint_done(self, source):
+        """Return True if all the records of the source were processed
+        before the checkpoint"""
+        if not self._use_generation_checkpoints():
+            return False
+        return source in self._get_generation_checkpoint().get("done", [])
+
+    def _get_checkpoint_position(self, source):
+        """Return the ID of the last record of the source processed before
+        the checkpoint, 0 if the source must be processed from the start
+
+        The sources are processed by ascending IDs, so that the generation
+        resumes with the records whose ID is greater than this position.
+        """
+        if not self._use_generation_checkpoints():
+            return 0
+        return self._get_generation_checkpoint().get("positions", {}).get(source, 0)
+
+    def _save_checkpoint(self, source, position=0, done=False):
+        """Save the position of the source and commit the lines created
+        up to this position, with the heartbeat of the job (see
+        AccountCutoffJob._recover_dead_jobs)"""
+        self.ensure_one()
+        checkpoint = self._get_generation_checkpoint()
+        positions = checkpoint.setdefault("positions", {})
+        if done:
+            positions.pop(source, None)
+            checkpoint.setdefault("done", []).append(source)
+        else:
+            positions[source] = position
+        self.generation_checkpoint = json.dumps(checkpoint)
+        self.env["account.cutoff.job"].browse(
+            self.env.context["cutoff_job_id"]
+        ).date_heartbeat = fields.Datetime.now()
+        self.env["base"].flush()
+        self.env.cr.commit()
+        # the commit released the lock on the cut-off
+        self._lock_for_generation()
+
+    def update_lines(self):
+        """Update the lines incrementally: only the lines whose source
+        record changed are created, written or deleted"""
+        self.ensure_one()
+        return self.with_context(cutoff_update_lines=True).generate_lines()
+
+    @contextmanager
+    def _profile_run(self, run_type):
+        """Profile the run, if the profiling of the cut-offs is enabled
+        on the company, and save its statistics at the end"""
+        self.ensure_one()
+        profilers = _run_profilers.setdefault(self.env.cr, {})
+        if not self.company_id.cutoff_profiling or self.id in profilers:
+            yield
+            return
+        profiler = profilers[self.id] = CutoffProfiler(self.env.cr)
+        try:
+            yield
+            with profiler.phase("flush"):
+                self.env["base"].flush()
+            profiler.stop()
+        finally:
+            del profilers[self.id]
+        self._save_run_stat(run_type, profiler)
+
+    def _profile_phase(self, name):
+        """Return a context manager that measures a phase of the run,
+        when the run is profiled"""
+        profiler = _run_profilers.get(self.env.cr, {}).get(self.id)
+        return profiler and profiler.phase(name) or no_phase()
+
+    def _profile_rows(self, name, count):
+        """Add rows created by a phase of the run, when it is profiled"""
+        profiler = _run_profilers.get(self.env.cr, {}).get(self.id)
+        if profiler:
+            profiler.add_rows(name, count)
+
+    def _save_run_stat(self, run_type, profiler):
+        self.ensure_one()
+        phases = sorted(
+            profiler.phases.items(), key=lambda item: item[1]["duration"], reverse=True
+        )
+        stat = self.env["account.cutoff.run.stat"].create(
+            {
+                "cutoff_id": self.id,
+                "run_type": run_type,
+                "duration": profiler.duration,
+                "query_count": profiler.query_count,
+                "row_count": sum(stats["row_count"] for _name, stats in phases),
+                "phase_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": name,
+                            "duration": stats["duration"],
+                            "query_count": stats["query_count"],
+                            "row_count": stats["row_count"],
+                            "call_count": stats["calls"],
+                        },
+                    )
+                    for name, stats in phases
+                ],
+            }
+        )
+        msg = _("<p>%s: %.3f s, %d SQL queries, %d created rows</p>") % (
+            stat._fields["run_type"].convert_to_export(run_type, stat),
+            stat.duration,
+            stat.query_count,
+            stat.row_count,
+        )
+        msg += "<ul>"
+        for phase in stat.phase_ids:
+            msg += "<li>%s</li>" % (
+                _("%s: %.3f s, %d SQL queries, %d created rows, %d calls")
+                % (
+                    phase.name,
+                    phase.duration,
+                    phase.query_count,
+                    phase.row_count,
+                    phase.call_count,
+                )
+            )
+        msg += "</ul>"
+        self.message_post(body=msg)
+        return stat
+
+    def _get_run_cache(self):
+        """Return a dict to cache data during a generation of the lines
+
+        The cache is reset at the beginning of each call of get_lines()
+        and is never shared between transactions.
+        """
+        self.ensure_one()
+        return _run_caches.setdefault(self.env.cr, {}).setdefault(self.id, {})
+
+    def _reset_run_cache(self):
+        self.ensure_one()
+        _run_caches.setdefault(self.env.cr, {})[self.id] = {}
+
+    def _get_line_writer(self, total=0, key_field=None, checkpoint_source=None):
+        """Return a CutoffLineWriter to create the cut-off lines in batches
+
+        The implementations of get_lines() must use it as a context manager.
+        total is the number of source records that will be given to the
+        writer, for the progress of the background generation.
+        key_field is the field of the cut-off lines that identifies their
+        source record (see _get_line_source_key_fields): when the lines
+        are updated, the writer updates the existing lines of the source
+        instead of creating new lines.
+        checkpoint_source is the name of the source of the lines in the
+        checkpoint of the generation: when the generation commits its
+        lines by chunks (see _use_generation_checkpoints), the writer
+        commits each batch with the position given to add().
+        The size of the batches is read from the system parameter
+        'account_cutoff_base.line_batch_size'.
+        """
+        self.ensure_one()
+        batch_size = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_cutoff_base.line_batch_size", DEFAULT_LINE_BATCH_SIZE)
+        )
+        existing_lines = None
+        if key_field and self.env.context.get("cutoff_update_lines"):
+            existing_lines = self.line_ids.filtered(key_field)
+        return CutoffLineWriter(
+            self,
+            batch_size,
+            total=total,
+            key_field=key_field,
+            existing_lines=existing_lines,
+            checkpoint_source=self._use_generation_checkpoints()
+            and checkpoint_source
+            or None,
+        )
+
+    def _get_line_source_key_fields(self):
+        """Return the fields of the cut-off lines that identify their
+        source record. This method is designed to be inherited by the
+        modules that generate cut-off lines, so that update_lines() can
+        update the lines of each source incrementally."""
+        return []
+
     def unlink(self):
         for rec in self:
             if rec.state != "draft":
@@ -368,41 +803,235 @@ class AccountCutoff(models.Model):
         key = ID of account,
         value = ID of cutoff_account"""
         self.ensure_one()
-        mappings = self.env["account.cutoff.mapping"].search(
-            [
-                ("company_id", "=", self.company_id.id),
-                ("cutoff_type", "in", ("all", self.cutoff_type)),
-            ]
+        return dict(
+            self.env["account.cutoff.mapping"]._get_mapping_dict(
+                self.company_id.id, self.cutoff_type
+            )
         )
-        mapping = {}
-        for item in mappings:
-            mapping[item.account_id.id] = item.cutoff_account_id.id
-        return mapping
+
+    def _get_tax_accrual_account_field(self):
+        """Return the name and the label of the field of the taxes
+        that gives their accrual account for the type of the cut-off"""
+        if self.cutoff_type == "accrued_expense":
+            return "account_accrued_expense_id", _("Accrued Expense Tax Account")
+        elif self.cutoff_type == "accrued_revenue":
+            return "account_accrued_revenue_id", _("Accrued Revenue Tax Account")
+        return False, False
+
+    def _get_tax_accrual_account_map(self):
+        """return a dict with:
+        key = ID of tax,
+        value = ID of its accrual account for the type of the cut-off"""
+        self.ensure_one()
+        cache = self._get_run_cache()
+        if "tax_accrual_accounts" not in cache:
+            fname = self._get_tax_accrual_account_field()[0]
+            taxes = (
+                self.env["account.tax"]
+                .with_context(active_test=False)
+                .search([("company_id", "=", self.company_id.id)])
+            )
+            cache["tax_accrual_accounts"] = {
+                tax.id: fname and tax[fname].id or False for tax in taxes
+            }
+        return cache["tax_accrual_accounts"]
+
+    def _check_tax_accrual_accounts(self, taxes):
+        """Raise an error listing all the taxes without accrual account,
+        so that it fails before computing the cut-off lines"""
+        self.ensure_one()
+        tax_accounts = self._get_tax_accrual_account_map()
+        missing_taxes = taxes.flatten_taxes_hierarchy().filtered(
+            lambda tax: not tax_accounts.get(tax.id)
+            and not (
+                tax.amount_type in ("percent", "division", "fixed") and not tax.amount
+            )
+        )
+        if missing_taxes:
+            label = self._get_tax_accrual_account_field()[1]
+            raise UserError(
+                _("Missing '%s' on the following taxes:\n%s")
+                % (label, "\n".join(missing_taxes.mapped("display_name")))
+            )
+
+    def _compute_all_taxes(
+        self, taxes, price_unit, currency=None, quantity=1.0, product=None, partner=None
+    ):
+        """Return taxes.compute_all(..., handle_price_include=False)
+
+        The result is cached during the generation of the lines. The
+        product and the partner are only part of the cache key when
+        the result can depend on them (taxes computed by Python code).
+        When the amounts of the taxes are proportional to the price
+        (simple percent taxes) and rounded per line, compute_all() is only
+        called once per set of taxes and the amounts are computed from the
+        price of each line.
+        """
+        self.ensure_one()
+        cache = self._get_run_cache()
+        linear_taxes = cache.setdefault("linear_taxes", {})
+        tax_key = tuple(taxes.ids)
+        if tax_key not in linear_taxes:
+            flat_taxes = taxes.flatten_taxes_hierarchy()
+            linear_taxes[tax_key] = all(
+                tax.amount_type in ("percent", "division", "fixed")
+                for tax in flat_taxes
+            )
+            cache.setdefault("proportional_taxes", {})[tax_key] = bool(
+                flat_taxes
+            ) and all(self._is_proportional_tax(tax) for tax in flat_taxes)
+        if cache["proportional_taxes"][tax_key] and self._round_taxes_per_line(taxes):
+            return self._compute_proportional_taxes(
+                taxes, price_unit * quantity, currency
+            )
+        key = (tax_key, price_unit, quantity, currency and currency.id)
+        if not linear_taxes[tax_key]:
+            key += (product and product.id, partner and partner.id)
+        compute_all_cache = cache.setdefault("compute_all", {})
+        if key not in compute_all_cache:
+            with self._profile_phase("taxes"):
+                compute_all_cache[key] = taxes.compute_all(
+                    price_unit,
+                    currency=currency,
+                    quantity=quantity,
+                    product=product,
+                    partner=partner,
+                    handle_price_include=False,
+                )
+        return compute_all_cache[key]
+
+    def _is_proportional_tax(self, tax):
+        """Return True if the amount of the tax is base * percent / 100,
+        with a single tax repartition line of 100% on invoices"""
+        tax_lines = tax.invoice_repartition_line_ids.filtered(
+            lambda line: line.repartition_type == "tax"
+        )
+        return (
+            tax.amount_type == "percent"
+            and not tax.include_base_amount
+            and len(tax_lines) == 1
+            and tax_lines.factor_percent == 100
+        )
+
+    def _round_taxes_per_line(self, taxes):
+        """Return True if compute_all() rounds the amount of each tax and
+        the totals at the precision of the currency"""
+        context = self.env.context
+        return (
+            taxes[:1].company_id.tax_calculation_rounding_method == "round_per_line"
+            and "round" not in context
+            and "round_base" not in context
+        )
+
+    def _compute_proportional_taxes(self, taxes, base, currency=None):
+        """Return the result of taxes.compute_all(base) for proportional
+        taxes (see _is_proportional_tax()) rounded per line (see
+        _round_taxes_per_line())
+
+        compute_all() is only called once per set of taxes and currency
+        during the generation of the lines, for the structure of its
+        result. The amount of each tax is then computed from the base as
+        compute_all() computes it, rounded at the precision of the currency.
+        """
+        self.ensure_one()
+        company = taxes[:1].company_id
+        currency = currency or company.currency_id
+        unit_cache = self._get_run_cache().setdefault("unit_taxes", {})
+        key = (tuple(taxes.ids), currency.id)
+        if key not in unit_cache:
+            with self._profile_phase("taxes"):
+                unit_cache[key] = taxes.compute_all(
+                    1.0, currency=currency, handle_price_include=False
+                )
+        unit_res = unit_cache[key]
+        prec = currency.rounding
+        base = float_round(base, precision_rounding=prec)
+        tax_vals_list = []
+        for tax_vals in unit_res["taxes"]:
+            percent = self.env["account.tax"].browse(tax_vals["id"]).amount
+            tax_vals_list.append(
+                dict(
+                    tax_vals,
+                    amount=float_round(base * percent / 100, precision_rounding=prec),
+                    base=base,
+                )
+            )
+        tax_amount = sum(tax_vals["amount"] for tax_vals in tax_vals_list)
+        void_amount = sum(
+            tax_vals["amount"]
+            for tax_vals in tax_vals_list
+            if not tax_vals.get("account_id")
+        )
+        return dict(
+            unit_res,
+            taxes=tax_vals_list,
+            total_excluded=currency.round(base),
+            total_included=currency.round(base + tax_amount),
+            total_void=currency.round(base + void_amount),
+        )
+
+    def _convert_to_company_currency(self, amount, currency):
+        """Same as currency._convert(amount, company currency, company,
+        cutoff date), with the rates of all the currencies loaded once
+        during the generation of the lines"""
+        self.ensure_one()
+        company_currency = self.company_currency_id
+        if not currency or currency == company_currency:
+            return company_currency.round(amount)
+        rates = self._get_run_cache().setdefault("currency_rates", {})
+        if currency.id not in rates:
+            currencies = self.env["res.currency"].search([]) | currency
+            rates.update(
+                (currencies | company_currency)._get_rates(
+                    self.company_id, self.cutoff_date
+                )
+            )
+        rate = rates[company_currency.id] / rates[currency.id]
+        return company_currency.round(amount * rate)
+
+    def _convert_uom_qty(self, qty, from_uom, to_uom, round=True, rounding_method="UP"):
+        """Same as from_uom._compute_quantity(qty, to_uom), with the
+        conversion factor of each pair of units of measure computed once
+        during the generation of the lines"""
+        self.ensure_one()
+        if not from_uom or not qty:
+            return qty
+        factors = self._get_run_cache().setdefault("uom_factors", {})
+        key = (from_uom.id, to_uom.id)
+        if key not in factors:
+            # raises the error of _compute_quantity() if the units of
+            # measure are not in the same category
+            factors[key] = (
+                from_uom._compute_quantity(1.0, to_uom, round=False),
+                to_uom.rounding,
+            )
+        factor, rounding = factors[key]
+        amount = qty * factor
+        if to_uom and round:
+            amount = float_round(
+                amount, precision_rounding=rounding, rounding_method=rounding_method
+            )
+        return amount
 
     def _prepare_tax_lines(self, tax_compute_all_res, currency):
         res = []
-        ato = self.env["account.tax"]
         company_currency = self.company_id.currency_id
         cur_rprec = company_currency.rounding
+        tax_accounts = self._get_tax_accrual_account_map()
         for tax_line in tax_compute_all_res["taxes"]:
-            tax = ato.browse(tax_line["id"])
             if float_is_zero(tax_line["amount"], precision_rounding=cur_rprec):
                 continue
-            if self.cutoff_type == "accrued_expense":
-                tax_accrual_account_id = tax.account_accrued_expense_id.id
-                tax_account_field_label = _("Accrued Expense Tax Account")
-            elif self.cutoff_type == "accrued_revenue":
-                tax_accrual_account_id = tax.account_accrued_revenue_id.id
-                tax_account_field_label = _("Accrued Revenue Tax Account")
+            tax_accrual_account_id = tax_accounts.get(tax_line["id"])
             if not tax_accrual_account_id:
                 raise UserError(
                     _("Missing '%s' on tax '%s'.")
-                    % (tax_account_field_label, tax.display_name)
+                    % (
+                        self._get_tax_accrual_account_field()[1],
+                        self.env["account.tax"].browse(tax_line["id"]).display_name,
+                    )
                 )
             tax_amount = currency.round(tax_line["amount"])
-            tax_accrual_amount = currency._convert(
-                tax_amount, company_currency, self.company_id, self.cutoff_date
-            )
+            tax_accrual_amount = self._convert_to_company_currency(tax_amount, currency)
             res.append(
                 (
                     0,
@@ -0,0 +1,282 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import _, api, fields, models
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_WORKER_COUNT = 4
+
+
+class AccountCutoffBatch(models.Model):
+    _name = "account.cutoff.batch"
+    _description = "Generation of Cut-offs in Batch"
+    _rec_name = "cutoff_date"
+    _order = "id desc"
+
+    @api.model
+    def _default_worker_count(self):
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(
+                "account_cutoff_base.batch_worker_count", DEFAULT_BATCH_WORKER_COUNT
+            )
+        )
+
+    def _selection_cutoff_type(self):
+        return [("all", _("All Types"))] + self.env[
+            "account.cutoff"
+        ]._selection_cutoff_type()
+
+    cutoff_date = fields.Date(string="Cut-off Date", required=True, readonly=True)
+    cutoff_type = fields.Selection(
+        selection="_selection_cutoff_type",
+        string="Type",
+        required=True,
+        default="all",
+        readonly=True,
+    )
+    company_ids = fields.Many2many(
+        "res.company", string="Companies", required=True, readonly=True
+    )
+    worker_count = fields.Integer(
+        string="Parallel Workers",
+        default=lambda self: self._default_worker_count(),
+        readonly=True,
+        help="Number of cut-offs whose lines are generated at the same time, "
+        "each one with its own database connection.",
+    )
+    user_id = fields.Many2one(
+        "res.users",
+        string="Requested by",
+        required=True,
+        readonly=True,
+        default=lambda self: self.env.user,
+    )
+    state = fields.Selection(
+        [
+            ("pending", "Pending"),
+            ("running", "Running"),
+            ("done", "Done"),
+            ("failed", "Failed"),
+        ],
+        default="pending",
+        required=True,
+        readonly=True,
+    )
+    date_start = fields.Datetime(string="Start Date", readonly=True)
+    date_end = fields.Datetime(string="End Date", readonly=True)
+    date_heartbeat = fields.Datetime(
+        string="Last Sign of Life",
+        readonly=True,
+        help="Written when the batch starts and when each of its generations "
+        "starts or ends.",
+    )
+    duration = fields.Float(string="Duration (s)", digits=(16, 2), readonly=True)
+    job_ids = fields.One2many(
+        "account.cutoff.job", "batch_id", string="Generations", readonly=True
+    )
+    job_done_count = fields.Integer(
+        compute="_compute_job_counts", string="Succeeded Generations"
+    )
+    job_failed_count = fields.Integer(
+        compute="_compute_job_counts", string="Failed Generations"
+    )
+
+    @api.depends("job_ids.state")
+    def _compute_job_counts(self):
+        for batch in self:
+            batch.job_done_count = len(
+                batch.job_ids.filtered(lambda job: job.state == "done")
+            )
+            batch.job_failed_count = len(
+                batch.job_ids.filtered(lambda job: job.state == "failed")
+            )
+
+    def _get_cutoff_types(self):
+        self.ensure_one()
+        if self.cutoff_type == "all":
+            return [
+                cutoff_type
+                for cutoff_type, _label in self.env[
+                    "account.cutoff"
+                ]._selection_cutoff_type()
+            ]
+        return [self.cutoff_type]
+
+    def _create_jobs(self):
+        """Create the missing cut-offs of the batch and a generation job
+        for each draft cut-off"""
+        self.ensure_one()
+        cutoff_obj = self.env["account.cutoff"]
+        for company in self.company_ids:
+            for cutoff_type in self._get_cutoff_types():
+                cutoff = cutoff_obj.search(
+                    [
+                        ("company_id", "=", company.id),
+                        ("cutoff_type", "=", cutoff_type),
+                        ("cutoff_date", "=", self.cutoff_date),
+                    ],
+                    limit=1,
+                )
+                if not cutoff:
+                    cutoff = (
+                        cutoff_obj.with_company(company)
+                        .with_context(default_cutoff_type=cutoff_type)
+                        .create(
+                            {
+                                "cutoff_date": self.cutoff_date,
+                                "cutoff_type": cutoff_type,
+                                "company_id": company.id,
+                            }
+                        )
+                    )
+                if cutoff.state == "draft":
+                    cutoff._create_generation_job({"batch_id": self.id})
+
+    @api.model
+    def _cron_create_batches(self, cutoff_date=None, cutoff_type="all"):
+        """Create a batch for all the companies at the given date
+
+        Without date, the cut-offs are created at the default cut-off date
+        of each company, i.e. the end of its previous fiscal year.
+        """
+        companies_by_date = defaultdict(lambda: self.env["res.company"])
+        for company in self.env["res.company"].search([]):
+            date = (
+                cutoff_date
+                or self.env["account.cutoff"]
+                .with_company(company)
+                ._default_cutoff_date()
+            )
+            if date:
+                companies_by_date[date] |= company
+        for date, companies in companies_by_date.items():
+            batch = self.create(
+                {
+                    "cutoff_date": date,
+                    "cutoff_type": cutoff_type,
+                    "company_ids": [(6, 0, companies.ids)],
+                }
+            )
+            batch._create_jobs()
+        self.env.ref("account_cutoff_base.ir_cron_account_cutoff_batch")._trigger()
+
+    @api.model
+    def _cron_run_batches(self):
+        self._recover_dead_batches()
+        for batch in self.search([("state", "=", "pending")], order="id"):
+            batch._run()
+
+    @api.model
+    def _recover_dead_batches(self):
+        """Fail the running batches whose process died
+
+        A running batch writes its heartbeat when it starts and when each
+        of its jobs starts or ends, and a running job writes its own
+        heartbeat while it generates the lines. A running batch without
+        heartbeat for 5 minutes and without a living job is dead: its
+        pending and running jobs are failed, which puts their cut-offs
+        back to draft.
+        """
+        self.env["account.cutoff.job"]._recover_dead_jobs()
+        min_heartbeat = fields.Datetime.now() - relativedelta(minutes=5)
+        for batch in self.search(
+            [
+                ("state", "=", "running"),
+                "|",
+                ("date_heartbeat", "<", min_heartbeat),
+                "&",
+                ("date_heartbeat", "=", False),
+                ("date_start", "<", min_heartbeat),
+            ]
+        ):
+            if batch.job_ids.filtered(lambda job: job.state == "running"):
+                # a job of the batch is alive
+                continue
+            self.env.cr.execute(
+                "SELECT id FROM account_cutoff_batch WHERE id = %s "
+                "FOR UPDATE SKIP LOCKED",
+                (batch.id,),
+            )
+            if not self.env.cr.fetchone():
+                continue
+            logger.warning("Cut-off batch %d died", batch.id)
+            for job in batch.job_ids.filtered(lambda job: job.state == "pending"):
+                job._finish("failed", _("The batch process was interrupted."))
+            batch.write({"state": "failed", "date_end": fields.Datetime.now()})
+
+    def _run_job_in_thread(self, job_id):
+        threading.current_thread().dbname = self.env.cr.dbname
+        with api.Environment.manage():
+            try:
+                self.env["account.cutoff.job"].browse(job_id)._run()
+            except Exception:
+                logger.exception("Cut-off generation job %d crashed", job_id)
+
+    def _run(self):
+        """Run the jobs of the batch in a pool of worker threads,
+        each job with its own cursor"""
+        self.ensure_one()
+        with self.pool.cursor() as cr:
+            batch = self.with_env(self.env(cr=cr))
+            cr.execute(
+                "SELECT id FROM account_cutoff_batch WHERE id = %s "
+                "AND state = 'pending' FOR UPDATE SKIP LOCKED",
+                (batch.id,),
+            )
+            if not cr.fetchone():
+                # taken by another cron worker
+                return
+            now = fields.Datetime.now()
+            batch.write({"state": "running", "date_start": now, "date_heartbeat": now})
+            cr.commit()
+            start = time.perf_counter()
+            job_ids = batch.job_ids.filtered(lambda job: job.state == "pending").ids
+            worker_count = min(batch.worker_count, len(job_ids))
+            logger.info(
+                "Start of cut-off batch %d: %d jobs, %d workers",
+                batch.id,
+                len(job_ids),
+                worker_count,
+            )
+            if worker_count > 1:
+                with ThreadPoolExecutor(max_workers=worker_count) as executor:
+                    list(executor.map(batch._run_job_in_thread, job_ids))
+            else:
+                for job in batch.job_ids.browse(job_ids):
+                    job._run()
+            batch.invalidate_cache()
+            if batch.state != "running":
+                # failed by _recover_dead_batches()
+                return
+            batch.write(
+                {
+                    "state": "done",
+                    "date_end": fields.Datetime.now(),
+                    "duration": time.perf_counter() - start,
+                }
+            )
+            logger.info(
+                "End of cut-off batch %d: %d done, %d failed",
+                batch.id,
+                batch.job_done_count,
+                batch.job_failed_count,
+            )
+
+    def button_cutoffs(self):
+        self.ensure_one()
+        action = self.env["ir.actions.act_window"]._for_xml_id(
+            "account_cutoff_base.account_cutoff_batch_cutoff_action"
+        )
+        action["domain"] = [("id", "in", self.job_ids.cutoff_id.ids)]
+        return action
@@ -0,0 +1,167 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import logging
+import time
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import _, api, fields, models
+
+logger = logging.getLogger(__name__)
+
+
+class AccountCutoffJob(models.Model):
+    _name = "account.cutoff.job"
+    _description = "Background Generation of Cut-off Lines"
+    _order = "id desc"
+    _check_company_auto = True
+
+    cutoff_id = fields.Many2one(
+        "account.cutoff",
+        string="Cut-off",
+        required=True,
+        ondelete="cascade",
+        index=True,
+        check_company=True,
+    )
+    company_id = fields.Many2one(related="cutoff_id.company_id", store=True)
+    batch_id = fields.Many2one(
+        "account.cutoff.batch", string="Batch", ondelete="set null", index=True
+    )
+    user_id = fields.Many2one(
+        "res.users",
+        string="Requested by",
+        required=True,
+        default=lambda self: self.env.user,
+    )
+    state = fields.Selection(
+        [
+            ("pending", "Pending"),
+            ("running", "Running"),
+            ("done", "Done"),
+            ("failed", "Failed"),
+        ],
+        default="pending",
+        required=True,
+        index=True,
+        readonly=True,
+    )
+    progress_done = fields.Integer(string="Processed Records", readonly=True)
+    progress_total = fields.Integer(string="Records to Process", readonly=True)
+    progress = fields.Float(compute="_compute_progress")
+    date_start = fields.Datetime(string="Start Date", readonly=True)
+    date_end = fields.Datetime(string="End Date", readonly=True)
+    date_heartbeat = fields.Datetime(
+        string="Last Sign of Life",
+        readonly=True,
+        help="Written when the job starts, at each checkpoint of the "
+        "generation and at each report of its progress.",
+    )
+    duration = fields.Float(string="Duration (s)", digits=(16, 2), readonly=True)
+    error = fields.Text(readonly=True)
+
+    @api.depends("progress_done", "progress_total", "state")
+    def _compute_progress(self):
+        for job in self:
+            if job.state == "done":
+                job.progress = 100
+            elif job.progress_total:
+                job.progress = min(100 * job.progress_done / job.progress_total, 100)
+            else:
+                job.progress = 0
+
+    @api.model
+    def _cron_run_jobs(self):
+        self._recover_dead_jobs()
+        # the jobs of a batch are run by the workers of the batch
+        for job in self.search(
+            [("state", "=", "pending"), ("batch_id", "=", False)], order="id"
+        ):
+            job._run()
+
+    @api.model
+    def _recover_dead_jobs(self):
+        """Fail the running jobs whose process died
+
+        A running job writes its heartbeat when it starts, at each
+        checkpoint and at each report of its progress, and keeps a lock
+        on its cut-off between its commits. A running job without
+        heartbeat for 5 minutes whose cut-off is not locked is dead.
+        """
+        min_heartbeat = fields.Datetime.now() - relativedelta(minutes=5)
+        for job in self.search(
+            [
+                ("state", "=", "running"),
+                "|",
+                ("date_heartbeat", "<", min_heartbeat),
+                "&",
+                ("date_heartbeat", "=", False),
+                ("date_start", "<", min_heartbeat),
+            ]
+        ):
+            self.env.cr.execute(
+                "SELECT id FROM account_cutoff WHERE id = %s FOR UPDATE SKIP LOCKED",
+                (job.cutoff_id.id,),
+            )
+            if self.env.cr.fetchone():
+                logger.warning("Cut-off generation job %d died", job.id)
+                job._finish("failed", _("The generation process was interrupted."))
+
+    def _finish(self, state, error=False, duration=0.0):
+        self.ensure_one()
+        self.write(
+            {
+                "state": state,
+                "date_end": fields.Datetime.now(),
+                "duration": duration,
+                "error": error,
+            }
+        )
+        self.cutoff_id.write({"state": "draft"})
+        if self.batch_id:
+            self.batch_id.write({"date_heartbeat": fields.Datetime.now()})
+        if state == "failed":
+            body = _("The background generation of the lines failed: %s") % error
+            if self.cutoff_id.generation_checkpoint:
+                body += "<br/>" + _(
+                    "The lines committed before the failure are kept: the next "
+                    "background generation will resume from the checkpoint."
+                )
+            self.cutoff_id.message_post(body=body)
+
+    def _run(self):
+        """Run get_lines() on the cut-off of the job, in a dedicated cursor"""
+        self.ensure_one()
+        with self.pool.cursor() as cr:
+            job = self.with_env(self.env(cr=cr))
+            cr.execute(
+                "SELECT id FROM account_cutoff_job WHERE id = %s "
+                "AND state = 'pending' FOR UPDATE SKIP LOCKED",
+                (job.id,),
+            )
+            if not cr.fetchone():
+                # taken by another cron worker
+                return
+            now = fields.Datetime.now()
+            job.write({"state": "running", "date_start": now, "date_heartbeat": now})
+            if job.batch_id:
+                job.batch_id.write({"date_heartbeat": now})
+            cr.commit()
+            logger.info("Start of cut-off generation job %d", job.id)
+            start = time.perf_counter()
+            cutoff = (
+                job.cutoff_id.with_user(job.user_id)
+                .with_company(job.company_id)
+                .with_context(cutoff_job_id=job.id)
+            )
+            try:
+                cutoff.generate_lines()
+            except Exception as e:
+                cr.rollback()
+                job.env.clear()
+                logger.exception("Cut-off generation job %d failed", job.id)
+                job._finish("failed", str(e), time.perf_counter() - start)
+            else:
+                job._finish("done", duration=time.perf_counter() - start)
+                logger.info("End of cut-off generation job %d", job.id)
@@ -0,0 +1,190 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+
+class CutoffLineWriter:
+    """Buffer the values of cut-off lines and create them in batches
+
+    The implementations of get_lines() feed the values of the cut-off
+    lines with add(), once per source record: the values are False when
+    the source record doesn't give a cut-off line. The buffer is flushed
+    with one create() on account.cutoff.line for each batch and one
+    create() on account.cutoff.tax.line for the tax lines of the batch.
+    The number of processed source records is reported at each flush,
+    for the progress of the background generation.
+    Use it as a context manager, so that the last batch gets flushed.
+
+    When checkpoint_source is given, each batch is committed with the
+    position of the last source record given to add(), and the source is
+    marked as done at the end, so that an interrupted generation resumes
+    after the last committed batch.
+
+    When existing_lines is given, the writer updates these lines instead
+    of creating new ones: the existing line with the same value of
+    key_field as the given values is only written if a value changed,
+    and the existing lines that were not given any values are deleted
+    at the end.
+    """
+
+    def __init__(
+        self,
+        cutoff,
+        batch_size,
+        total=0,
+        key_field=None,
+        existing_lines=None,
+        checkpoint_source=None,
+    ):
+        self.cutoff = cutoff
+        self.batch_size = max(batch_size, 1)
+        self.total = total
+        self.key_field = key_field
+        self.existing = None
+        if existing_lines is not None:
+            self.existing = {line[key_field].id: line for line in existing_lines}
+        self.checkpoint_source = checkpoint_source
+        self.position = None
+        self.buffer = []
+        self.processed = 0
+        self.reported = 0
+        self.line_count = 0
+        self.tax_line_count = 0
+        self.updated_count = 0
+        self.deleted_count = 0
+
+    def __enter__(self):
+        self.cutoff._report_progress(total=self.total)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+            if self.checkpoint_source:
+                self.cutoff._save_checkpoint(self.checkpoint_source, done=True)
+            if self.existing:
+                to_delete = self.cutoff.env["account.cutoff.line"].union(
+                    *self.existing.values()
+                )
+                self.deleted_count += len(to_delete)
+                self.existing = {}
+                with self.cutoff._profile_phase("delete lines"):
+                    to_delete.unlink()
+
+    def add(self, vals, position=None):
+        self.processed += 1
+        if position is not None:
+            self.position = position
+        if vals:
+            line = False
+            if self.existing is not None and vals.get(self.key_field):
+                line = self.existing.pop(vals[self.key_field], False)
+            if line:
+                self._update_line(line, vals)
+            else:
+                self.buffer.append(vals)
+        if self.processed - self.reported >= self.batch_size:
+            self.flush()
+
+    def _update_line(self, line, vals):
+        line_vals, tax_line_vals_list = self._split_tax_line_vals(vals)
+        to_write = {}
+        for fname, value in line_vals.items():
+            field = line._fields[fname]
+            if field.type in ("one2many", "many2many"):
+                to_write[fname] = value
+                continue
+            new_value = field.convert_to_record(
+                field.convert_to_cache(value, line), line
+            )
+            if new_value != line[fname]:
+                to_write[fname] = value
+        existing_tax_line_vals_list = [
+            {
+                "tax_id": tax_line.tax_id.id,
+                "cutoff_account_id": tax_line.cutoff_account_id.id,
+                "analytic_account_id": tax_line.analytic_account_id.id,
+                "base": tax_line.base,
+                "amount": tax_line.amount,
+                "sequence": tax_line.sequence,
+                "cutoff_amount": tax_line.cutoff_amount,
+            }
+            for tax_line in line.tax_line_ids
+        ]
+        if self._get_tax_lines_key(
+            line, existing_tax_line_vals_list
+        ) != self._get_tax_lines_key(line, tax_line_vals_list):
+            to_write["tax_line_ids"] = [(5, 0, 0)] + [
+                (0, 0, tax_line_vals) for tax_line_vals in tax_line_vals_list
+            ]
+        if to_write:
+            with self.cutoff._profile_phase("update lines"):
+                line.write(to_write)
+            self.updated_count += 1
+
+    def _get_tax_lines_key(self, line, tax_line_vals_list):
+        """Return a comparable key of the values of the tax lines of a line"""
+        currency = line.currency_id or line.company_currency_id
+        company_currency = line.company_currency_id or currency
+        res = []
+        for vals in tax_line_vals_list:
+            res.append(
+                (
+                    vals.get("tax_id") or False,
+                    vals.get("cutoff_account_id") or False,
+                    vals.get("analytic_account_id") or False,
+                    currency.round(vals.get("base") or 0),
+                    currency.round(vals.get("amount") or 0),
+                    vals.get("sequence") or 0,
+                    company_currency.round(vals.get("cutoff_amount") or 0),
+                )
+            )
+        return sorted(res)
+
+    def _split_tax_line_vals(self, vals):
+        """Take the creation commands out of the tax_line_ids of vals
+
+        Return the values of the cut-off line without these commands
+        and the list of values of the tax lines to create.
+        """
+        vals = dict(vals)
+        vals.setdefault("parent_id", self.cutoff.id)
+        tax_line_vals_list = []
+        other_commands = []
+        for command in vals.pop("tax_line_ids", None) or []:
+            if command[0] == 0:
+                tax_line_vals_list.append(command[2])
+            else:
+                other_commands.append(command)
+        if other_commands:
+            vals["tax_line_ids"] = other_commands
+        return vals, tax_line_vals_list
+
+    def flush(self):
+        self._create_buffer()
+        self.cutoff._report_progress(processed=self.processed - self.reported)
+        self.reported = self.processed
+        if self.checkpoint_source and self.position is not None:
+            self.cutoff._save_checkpoint(self.checkpoint_source, self.position)
+
+    def _create_buffer(self):
+        if not self.buffer:
+            return
+        env = self.cutoff.env
+        line_vals_list = []
+        tax_line_vals_lists = []
+        for vals in self.buffer:
+            line_vals, tax_line_vals_list = self._split_tax_line_vals(vals)
+            line_vals_list.append(line_vals)
+            tax_line_vals_lists.append(tax_line_vals_list)
+        self.buffer = []
+        with self.cutoff._profile_phase("create lines"):
+            lines = env["account.cutoff.line"].create(line_vals_list)
+            to_create = []
+            for line, tax_line_vals_list in zip(lines, tax_line_vals_lists):
+                for tax_line_vals in tax_line_vals_list:
+                    to_create.append(dict(tax_line_vals, parent_id=line.id))
+            if to_create:
+                env["account.cutoff.tax.line"].create(to_create)
+        self.cutoff._profile_rows("create lines", len(lines) + len(to_create))
+        self.line_count += len(lines)
+        self.tax_line_count += len(to_create)
@@ -2,7 +2,7 @@
 # @author: Alexis de Lattre <alexis.delattre@akretion.com>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
-from odoo import fields, models
+from odoo import api, fields, models, tools
 
 
 class AccountCutoffMapping(models.Model):
@@ -43,3 +43,36 @@ class AccountCutoffMapping(models.Model):
         required=True,
         default="all",
     )
+
+    @api.model
+    @tools.ormcache("company_id", "cutoff_type")
+    def _get_mapping_dict(self, company_id, cutoff_type):
+        """Return a dict with:
+        key = ID of account,
+        value = ID of cutoff_account
+        The result is cached until a mapping is created, written or deleted,
+        so it must not be modified by the caller.
+        """
+        mappings = self.sudo().search(
+            [
+                ("company_id", "=", company_id),
+                ("cutoff_type", "in", ("all", cutoff_type)),
+            ]
+        )
+        mapping = {}
+        for item in mappings:
+            mapping[item.account_id.id] = item.cutoff_account_id.id
+        return mapping
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.clear_caches()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self.clear_caches()
+        return super().write(vals)
+
+    def unlink(self):
+        self.clear_caches()
+        return super().unlink()
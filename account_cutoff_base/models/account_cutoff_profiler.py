@@ -0,0 +1,76 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import time
+from contextlib import contextmanager
+
+OTHER_PHASE = "other"
+
+
+class CutoffProfiler:
+    """Measure the wall time, the number of SQL queries and the number
+    of created rows of the phases of a run on a cut-off
+
+    Phases can be nested: the time and the queries of a phase don't
+    include the ones of the phases that it contains, so that the sum of
+    the phases is the total of the run. What happens outside of any
+    phase is counted in the phase "other".
+    """
+
+    def __init__(self, cr):
+        self.cr = cr
+        self.phases = {}
+        self.stack = []
+        self.start_time = self.mark_time = time.perf_counter()
+        self.start_queries = self.mark_queries = cr.sql_log_count
+        self.duration = 0.0
+        self.query_count = 0
+        self._enter(OTHER_PHASE)
+
+    def _get_stats(self, name):
+        return self.phases.setdefault(
+            name, {"duration": 0.0, "query_count": 0, "row_count": 0, "calls": 0}
+        )
+
+    def _switch(self):
+        """Add the time and the queries since the last switch to the
+        current phase"""
+        now = time.perf_counter()
+        queries = self.cr.sql_log_count
+        if self.stack:
+            stats = self.phases[self.stack[-1]]
+            stats["duration"] += now - self.mark_time
+            stats["query_count"] += queries - self.mark_queries
+        self.mark_time = now
+        self.mark_queries = queries
+
+    def _enter(self, name):
+        self._switch()
+        self.stack.append(name)
+        self._get_stats(name)["calls"] += 1
+
+    def _exit(self):
+        self._switch()
+        self.stack.pop()
+
+    @contextmanager
+    def phase(self, name):
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def add_rows(self, name, count):
+        self._get_stats(name)["row_count"] += count
+
+    def stop(self):
+        while self.stack:
+            self._exit()
+        self.duration = time.perf_counter() - self.start_time
+        self.query_count = self.cr.sql_log_count - self.start_queries
+
+
+@contextmanager
+def no_phase():
+    yield
@@ -0,0 +1,56 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import fields, models
+
+
+class AccountCutoffRunStat(models.Model):
+    _name = "account.cutoff.run.stat"
+    _description = "Profiling of a Run on a Cut-off"
+    _order = "id desc"
+    _check_company_auto = True
+
+    cutoff_id = fields.Many2one(
+        "account.cutoff",
+        string="Cut-off",
+        required=True,
+        ondelete="cascade",
+        index=True,
+        check_company=True,
+    )
+    company_id = fields.Many2one(related="cutoff_id.company_id", store=True)
+    run_type = fields.Selection(
+        [
+            ("get_lines", "Generation of the Lines"),
+            ("update_lines", "Update of the Lines"),
+            ("create_move", "Creation of the Journal Entry"),
+        ],
+        string="Run",
+        required=True,
+        readonly=True,
+    )
+    user_id = fields.Many2one(
+        "res.users", string="User", default=lambda self: self.env.user, readonly=True
+    )
+    date = fields.Datetime(default=fields.Datetime.now, readonly=True)
+    duration = fields.Float(string="Duration (s)", digits=(16, 3), readonly=True)
+    query_count = fields.Integer(string="SQL Queries", readonly=True)
+    row_count = fields.Integer(string="Created Rows", readonly=True)
+    phase_ids = fields.One2many(
+        "account.cutoff.run.stat.phase", "stat_id", string="Phases", readonly=True
+    )
+
+
+class AccountCutoffRunStatPhase(models.Model):
+    _name = "account.cutoff.run.stat.phase"
+    _description = "Phase of the Profiling of a Run on a Cut-off"
+    _order = "stat_id, duration desc"
+
+    stat_id = fields.Many2one(
+        "account.cutoff.run.stat", ondelete="cascade", required=True, index=True
+    )
+    name = fields.Char(string="Phase", required=True, readonly=True)
+    duration = fields.Float(string="Duration (s)", digits=(16, 3), readonly=True)
+    query_count = fields.Integer(string="SQL Queries", readonly=True)
+    row_count = fields.Integer(string="Created Rows", readonly=True)
+    call_count = fields.Integer(string="Calls", readonly=True)
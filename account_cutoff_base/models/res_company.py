@@ -20,6 +20,12 @@ class ResCompany(models.Model):
     )
     accrual_taxes = fields.Boolean(string="Accrual On Taxes", default=True)
     post_cutoff_move = fields.Boolean(string="Post Cut-off Entry")
+    cutoff_profiling = fields.Boolean(
+        string="Profile Cut-offs",
+        help="Measure the duration, the number of SQL queries and the number "
+        "of created rows of each phase of the generation of the lines and of "
+        "the creation of the journal entry of the cut-offs.",
+    )
     default_accrued_revenue_account_id = fields.Many2one(
         comodel_name="account.account",
         string="Default Account for Accrued Revenues",
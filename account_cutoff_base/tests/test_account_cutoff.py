@@ -1,9 +1,39 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+from unittest.mock import patch
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.exceptions import UserError
 from odoo.tests.common import SavepointCase
 
 
 class TestAccountCutoff(SavepointCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.company
+        cls.account = cls.env["account.account"].search(
+            [("company_id", "=", cls.company.id)], limit=1
+        )
+        cls.tax = cls.env["account.tax"].search(
+            [("company_id", "=", cls.company.id), ("type_tax_use", "=", "purchase")],
+            limit=1,
+        )
+
+    def _create_cutoff(self, cutoff_type="accrued_expense"):
+        if not self.account:
+            self.skipTest("No account in the test company")
+        return self.env["account.cutoff"].create(
+            {
+                "cutoff_type": cutoff_type,
+                "cutoff_date": "2021-12-31",
+                "company_id": self.company.id,
+                "cutoff_account_id": self.account.id,
+            }
+        )
+
     def test_default_cutoff_account_id(self):
         account_id = self.env["account.cutoff"]._default_cutoff_account_id()
         self.assertEqual(account_id, False)
@@ -36,3 +66,398 @@ class TestAccountCutoff(SavepointCase):
                 random_account.id,
                 "The account must be equals to %s" % random_account.id,
             )
+
+    def test_line_writer(self):
+        cutoff = self._create_cutoff()
+        if not self.tax:
+            self.skipTest("No purchase tax in the test company")
+        self.env["ir.config_parameter"].sudo().set_param(
+            "account_cutoff_base.line_batch_size", 2
+        )
+        line_obj = self.env["account.cutoff.line"]
+        with cutoff._get_line_writer() as writer:
+            for i in range(5):
+                writer.add(
+                    {
+                        "name": "Line %d" % i,
+                        "account_id": self.account.id,
+                        "cutoff_account_id": self.account.id,
+                        "cutoff_amount": 10,
+                        "tax_line_ids": [
+                            (
+                                0,
+                                0,
+                                {
+                                    "tax_id": self.tax.id,
+                                    "cutoff_account_id": self.account.id,
+                                    "cutoff_amount": 2,
+                                },
+                            )
+                        ],
+                    }
+                )
+            # the last line is still in the buffer
+            self.assertEqual(line_obj.search_count([("parent_id", "=", cutoff.id)]), 4)
+        self.assertEqual(writer.line_count, 5)
+        self.assertEqual(writer.tax_line_count, 5)
+        self.assertEqual(len(cutoff.line_ids), 5)
+        self.assertEqual(len(cutoff.line_ids.tax_line_ids), 5)
+        self.assertEqual(cutoff.total_cutoff_amount, 50)
+
+    def test_provision_sql_merge(self):
+        cutoff = self._create_cutoff()
+        partner = self.env.ref("base.res_partner_2")
+        tax_line_ids = []
+        if self.tax:
+            tax_line_ids = [
+                (
+                    0,
+                    0,
+                    {
+                        "tax_id": self.tax.id,
+                        "cutoff_account_id": self.account.id,
+                        "cutoff_amount": -1.5,
+                    },
+                )
+            ]
+        with cutoff._get_line_writer() as writer:
+            for amount in (-10, -20.5):
+                writer.add(
+                    {
+                        "name": "Line %s" % amount,
+                        "partner_id": partner.id,
+                        "account_id": self.account.id,
+                        "cutoff_account_id": self.account.id,
+                        "cutoff_amount": amount,
+                        "tax_line_ids": tax_line_ids,
+                    }
+                )
+        for move_partner in (False, True):
+            cutoff.move_partner = move_partner
+            provision_lines = []
+            for line in cutoff.line_ids:
+                provision_lines.append(cutoff._prepare_provision_line(line))
+                for tax_line in line.tax_line_ids:
+                    provision_lines.append(cutoff._prepare_provision_tax_line(tax_line))
+            self.assertTrue(cutoff._use_provision_sql())
+            self.assertEqual(
+                dict(cutoff._merge_provision_lines_sql()),
+                dict(cutoff._merge_provision_lines(provision_lines)),
+            )
+        # a module that overrides _merge_provision_lines is never skipped
+        with patch.object(
+            type(cutoff),
+            "_is_overridden",
+            lambda self, method_name, cls: method_name == "_merge_provision_lines",
+        ):
+            self.assertFalse(cutoff._use_provision_sql())
+
+    def test_get_lines_async(self):
+        cutoff = self._create_cutoff()
+        cutoff.get_lines_async()
+        self.assertEqual(cutoff.state, "computing")
+        self.assertEqual(cutoff.job_ids.state, "pending")
+        # a second generation of the same cut-off is refused
+        with self.assertRaises(UserError):
+            cutoff.get_lines()
+        with self.assertRaises(UserError):
+            cutoff.get_lines_async()
+        # its journal entry cannot be created while its lines are rewritten
+        with self.assertRaises(UserError):
+            cutoff.create_move()
+        # the job runs in its own cursor
+        self.registry.enter_test_mode(self.cr)
+        self.addCleanup(self.registry.leave_test_mode)
+        self.env["account.cutoff.job"]._cron_run_jobs()
+        cutoff.invalidate_cache()
+        self.assertEqual(cutoff.state, "draft")
+        self.assertEqual(cutoff.job_ids.state, "done")
+        self.assertEqual(cutoff.get_generation_progress()["progress"], 100)
+
+    def test_recover_dead_jobs(self):
+        cutoff = self._create_cutoff()
+        cutoff.get_lines_async()
+        job = cutoff.job_ids
+        old_date = fields.Datetime.now() - relativedelta(hours=1)
+        # a job started long ago with a recent heartbeat is alive
+        job.write(
+            {
+                "state": "running",
+                "date_start": old_date,
+                "date_heartbeat": fields.Datetime.now(),
+            }
+        )
+        self.env["account.cutoff.job"]._recover_dead_jobs()
+        self.assertEqual(job.state, "running")
+        job.date_heartbeat = old_date
+        self.env["account.cutoff.job"]._recover_dead_jobs()
+        self.assertEqual(job.state, "failed")
+        self.assertEqual(cutoff.state, "draft")
+
+    def test_mapping_cache(self):
+        cutoff = self._create_cutoff()
+        accounts = self.env["account.account"].search(
+            [("company_id", "=", self.company.id)], limit=3
+        )
+        if len(accounts) < 3:
+            self.skipTest("Not enough accounts in the test company")
+        self.assertNotIn(accounts[0].id, cutoff._get_mapping_dict())
+        mapping = self.env["account.cutoff.mapping"].create(
+            {
+                "company_id": self.company.id,
+                "account_id": accounts[0].id,
+                "cutoff_account_id": accounts[1].id,
+                "cutoff_type": "accrued_expense",
+            }
+        )
+        self.assertEqual(cutoff._get_mapping_dict()[accounts[0].id], accounts[1].id)
+        with self.assertQueryCount(0):
+            cutoff._get_mapping_dict()
+        mapping.write({"cutoff_account_id": accounts[2].id})
+        self.assertEqual(cutoff._get_mapping_dict()[accounts[0].id], accounts[2].id)
+        mapping.write({"cutoff_type": "prepaid_expense"})
+        self.assertNotIn(accounts[0].id, cutoff._get_mapping_dict())
+        mapping.write({"cutoff_type": "all"})
+        self.assertIn(accounts[0].id, cutoff._get_mapping_dict())
+        mapping.unlink()
+        self.assertNotIn(accounts[0].id, cutoff._get_mapping_dict())
+
+    def _assert_same_taxes(self, res, expected):
+        for key in ("total_excluded", "total_included"):
+            self.assertAlmostEqual(res[key], expected[key])
+        self.assertEqual(
+            [(vals["id"], vals["amount"], vals["base"]) for vals in res["taxes"]],
+            [(vals["id"], vals["amount"], vals["base"]) for vals in expected["taxes"]],
+        )
+
+    def test_tax_engine(self):
+        cutoff = self._create_cutoff()
+        taxes = self.env["account.tax"].create(
+            [
+                {
+                    "name": "Cut-off Test Tax %d" % rate,
+                    "amount": rate,
+                    "type_tax_use": "purchase",
+                    "company_id": self.company.id,
+                }
+                for rate in (10, 20)
+            ]
+        )
+        cutoff._reset_run_cache()
+        with self.assertRaises(UserError) as cm:
+            cutoff._check_tax_accrual_accounts(taxes)
+        for tax in taxes:
+            self.assertIn(tax.name, str(cm.exception))
+        taxes.write({"account_accrued_expense_id": self.account.id})
+        cutoff._reset_run_cache()
+        cutoff._check_tax_accrual_accounts(taxes)
+        res = cutoff._compute_all_taxes(taxes, 100.0, quantity=2)
+        with self.assertQueryCount(0):
+            self.assertEqual(cutoff._compute_all_taxes(taxes, 100.0, quantity=2), res)
+        self._assert_same_taxes(
+            res, taxes.compute_all(100.0, quantity=2, handle_price_include=False)
+        )
+        # compute_all() is called once for the percent taxes
+        for price in (0.01, 0.05, 3.33, 12.45, -45.55, 1234.56):
+            with self.assertQueryCount(0):
+                res = cutoff._compute_all_taxes(taxes, price)
+            self._assert_same_taxes(
+                res, taxes.compute_all(price, handle_price_include=False)
+            )
+        # with a global rounding, compute_all() is called for each price
+        self.company.tax_calculation_rounding_method = "round_globally"
+        cutoff._reset_run_cache()
+        for price in (0.01, 3.33, 12.45, -45.55):
+            self._assert_same_taxes(
+                cutoff._compute_all_taxes(taxes, price, quantity=3),
+                taxes.compute_all(price, quantity=3, handle_price_include=False),
+            )
+        self.company.tax_calculation_rounding_method = "round_per_line"
+        cutoff._reset_run_cache()
+        self.assertFalse(cutoff.with_context(round=False)._round_taxes_per_line(taxes))
+        self._assert_same_taxes(
+            cutoff.with_context(round=False)._compute_all_taxes(taxes, 3.33),
+            taxes.with_context(round=False).compute_all(
+                3.33, handle_price_include=False
+            ),
+        )
+        # the other taxes are computed for each price
+        fixed_tax = self.env["account.tax"].create(
+            {
+                "name": "Cut-off Test Fixed Tax",
+                "amount_type": "fixed",
+                "amount": 1.5,
+                "type_tax_use": "purchase",
+                "company_id": self.company.id,
+            }
+        )
+        res = cutoff._compute_all_taxes(taxes | fixed_tax, 12.45, quantity=3)
+        self._assert_same_taxes(
+            res,
+            (taxes | fixed_tax).compute_all(
+                12.45, quantity=3, handle_price_include=False
+            ),
+        )
+        res = cutoff._compute_all_taxes(taxes, 100.0, quantity=2)
+        tax_lines = cutoff._prepare_tax_lines(res, self.company.currency_id)
+        self.assertEqual(len(tax_lines), 2)
+        self.assertEqual(
+            sorted(vals["cutoff_amount"] for _c, _i, vals in tax_lines), [20, 40]
+        )
+        self.assertTrue(
+            all(
+                vals["cutoff_account_id"] == self.account.id
+                for _c, _i, vals in tax_lines
+            )
+        )
+
+    def test_currency_rate_table(self):
+        cutoff = self._create_cutoff()
+        company_currency = self.company.currency_id
+        currency = self.env.ref("base.EUR")
+        if currency == company_currency:
+            currency = self.env.ref("base.USD")
+        currency.active = True
+        self.env["res.currency.rate"].create(
+            {
+                "currency_id": currency.id,
+                "company_id": self.company.id,
+                "name": "2021-06-01",
+                "rate": 1.2345,
+            }
+        )
+        cutoff._reset_run_cache()
+        for amount in (100, -33.33, 1234.56):
+            self.assertEqual(
+                cutoff._convert_to_company_currency(amount, currency),
+                currency._convert(
+                    amount, company_currency, self.company, cutoff.cutoff_date
+                ),
+            )
+        with self.assertQueryCount(0):
+            cutoff._convert_to_company_currency(42, currency)
+
+    def test_uom_factor_table(self):
+        cutoff = self._create_cutoff()
+        unit = self.env.ref("uom.product_uom_unit")
+        dozen = self.env.ref("uom.product_uom_dozen")
+        cutoff._reset_run_cache()
+        for qty in (1, 7, -13, 2.5):
+            for from_uom, to_uom in ((unit, dozen), (dozen, unit), (unit, unit)):
+                self.assertEqual(
+                    cutoff._convert_uom_qty(qty, from_uom, to_uom),
+                    from_uom._compute_quantity(qty, to_uom),
+                )
+        with self.assertQueryCount(0):
+            cutoff._convert_uom_qty(42, dozen, unit)
+        with self.assertRaises(UserError):
+            cutoff._convert_uom_qty(1, unit, self.env.ref("uom.product_uom_kgm"))
+
+    def test_batch(self):
+        wizard = self.env["account.cutoff.batch.wizard"].create(
+            {
+                "cutoff_date": "2021-12-31",
+                "cutoff_type": "all",
+                "company_ids": [(6, 0, self.company.ids)],
+                "worker_count": 1,
+            }
+        )
+        action = wizard.run()
+        batch = self.env["account.cutoff.batch"].browse(action["res_id"])
+        cutoff_types = batch._get_cutoff_types()
+        self.assertEqual(len(batch.job_ids), len(cutoff_types))
+        self.assertEqual(
+            sorted(batch.job_ids.cutoff_id.mapped("cutoff_type")), sorted(cutoff_types)
+        )
+        self.assertEqual(set(batch.job_ids.cutoff_id.mapped("state")), {"computing"})
+        self.registry.enter_test_mode(self.cr)
+        self.addCleanup(self.registry.leave_test_mode)
+        # the jobs of the batch are left to the workers of the batch
+        self.env["account.cutoff.job"]._cron_run_jobs()
+        batch.job_ids.invalidate_cache()
+        self.assertEqual(set(batch.job_ids.mapped("state")), {"pending"})
+        self.env["account.cutoff.batch"]._cron_run_batches()
+        batch.invalidate_cache()
+        self.assertEqual(batch.state, "done")
+        # the generation may fail, depending on the installed cut-off modules
+        self.assertEqual(
+            batch.job_done_count + batch.job_failed_count, len(cutoff_types)
+        )
+        self.assertTrue(all(job.duration >= 0 for job in batch.job_ids))
+        self.assertEqual(set(batch.job_ids.cutoff_id.mapped("state")), {"draft"})
+
+    def test_recover_dead_batches(self):
+        wizard = self.env["account.cutoff.batch.wizard"].create(
+            {
+                "cutoff_date": "2021-12-31",
+                "cutoff_type": "all",
+                "company_ids": [(6, 0, self.company.ids)],
+                "worker_count": 1,
+            }
+        )
+        batch = self.env["account.cutoff.batch"].browse(wizard.run()["res_id"])
+        running_job = batch.job_ids[0]
+        old_date = fields.Datetime.now() - relativedelta(hours=1)
+        # a batch started long ago with a recent heartbeat is alive
+        batch.write(
+            {
+                "state": "running",
+                "date_start": old_date,
+                "date_heartbeat": fields.Datetime.now(),
+            }
+        )
+        self.env["account.cutoff.batch"]._recover_dead_batches()
+        self.assertEqual(batch.state, "running")
+        # so is a batch whose running job is alive
+        batch.date_heartbeat = old_date
+        running_job.write(
+            {
+                "state": "running",
+                "date_start": old_date,
+                "date_heartbeat": fields.Datetime.now(),
+            }
+        )
+        self.env["account.cutoff.batch"]._recover_dead_batches()
+        self.assertEqual(batch.state, "running")
+        self.assertEqual(running_job.state, "running")
+        # the batch and all its jobs are dead
+        running_job.date_heartbeat = old_date
+        self.env["account.cutoff.batch"]._recover_dead_batches()
+        self.assertEqual(batch.state, "failed")
+        self.assertEqual(set(batch.job_ids.mapped("state")), {"failed"})
+        self.assertEqual(set(batch.job_ids.cutoff_id.mapped("state")), {"draft"})
+        # the cut-offs can be generated again
+        batch.job_ids.cutoff_id[0].get_lines_async()
+        self.assertEqual(batch.job_ids.cutoff_id[0].state, "computing")
+
+    def test_run_profiling(self):
+        cutoff = self._create_cutoff()
+        partner = self.env.ref("base.res_partner_2")
+        self.company.cutoff_profiling = True
+        with cutoff._profile_run("get_lines"):
+            with cutoff._get_line_writer() as writer:
+                for amount in (-10, -20):
+                    with cutoff._profile_phase("prepare lines"):
+                        vals = {
+                            "name": "Line %s" % amount,
+                            "partner_id": partner.id,
+                            "account_id": self.account.id,
+                            "cutoff_account_id": self.account.id,
+                            "cutoff_amount": amount,
+                        }
+                    writer.add(vals)
+        stat = cutoff.run_stat_ids
+        self.assertEqual(len(stat), 1)
+        self.assertEqual(stat.run_type, "get_lines")
+        self.assertEqual(stat.row_count, 2)
+        phases = {phase.name: phase for phase in stat.phase_ids}
+        self.assertEqual(phases["prepare lines"].call_count, 2)
+        self.assertEqual(phases["create lines"].row_count, 2)
+        self.assertIn("other", phases)
+        self.assertEqual(sum(stat.phase_ids.mapped("query_count")), stat.query_count)
+        # without profiling, nothing is measured
+        self.company.cutoff_profiling = False
+        with cutoff._profile_run("get_lines"):
+            with cutoff._profile_phase("prepare lines"):
+                pass
+        self.assertEqual(len(cutoff.run_stat_ids), 1)
@@ -1 +1,2 @@
 from . import res_config_settings
+from . import account_cutoff_batch_wizard
@@ -0,0 +1,54 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+
+
+class AccountCutoffBatchWizard(models.TransientModel):
+    _name = "account.cutoff.batch.wizard"
+    _description = "Generate Cut-offs in Batch"
+
+    @api.model
+    def _selection_cutoff_type(self):
+        return self.env["account.cutoff.batch"]._selection_cutoff_type()
+
+    cutoff_date = fields.Date(
+        string="Cut-off Date",
+        required=True,
+        default=lambda self: self.env["account.cutoff"]._default_cutoff_date(),
+    )
+    cutoff_type = fields.Selection(
+        selection="_selection_cutoff_type",
+        string="Type",
+        required=True,
+        default="all",
+    )
+    company_ids = fields.Many2many(
+        "res.company",
+        string="Companies",
+        required=True,
+        default=lambda self: self.env.companies,
+    )
+    worker_count = fields.Integer(
+        string="Parallel Workers",
+        required=True,
+        default=lambda self: self.env["account.cutoff.batch"]._default_worker_count(),
+    )
+
+    def run(self):
+        self.ensure_one()
+        batch = self.env["account.cutoff.batch"].create(
+            {
+                "cutoff_date": self.cutoff_date,
+                "cutoff_type": self.cutoff_type,
+                "company_ids": [(6, 0, self.company_ids.ids)],
+                "worker_count": self.worker_count,
+            }
+        )
+        batch._create_jobs()
+        self.env.ref("account_cutoff_base.ir_cron_account_cutoff_batch")._trigger()
+        action = self.env["ir.actions.act_window"]._for_xml_id(
+            "account_cutoff_base.account_cutoff_batch_action"
+        )
+        action.update({"res_id": batch.id, "view_mode": "form", "views": False})
+        return action
@@ -22,6 +22,9 @@ class ResConfigSettings(models.TransientModel):
     post_cutoff_move = fields.Boolean(
         related="company_id.post_cutoff_move", readonly=False
     )
+    cutoff_profiling = fields.Boolean(
+        related="company_id.cutoff_profiling", readonly=False
+    )
     dft_accrued_revenue_account_id = fields.Many2one(
         related="company_id.default_accrued_revenue_account_id",
         readonly=False,
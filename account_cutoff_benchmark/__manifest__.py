@@ -0,0 +1,21 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+{
+    "name": "Account Cut-off Benchmark",
+    "version": "14.0.1.0.0",
+    "category": "Accounting & Finance",
+    "license": "AGPL-3",
+    "summary": "Performance benchmark of the cut-off and closing modules",
+    "author": "Akretion,Odoo Community Association (OCA)",
+    "maintainers": ["alexis-via"],
+    "website": "https://github.com/OCA/account-closing",
+    "depends": [
+        "account_cutoff_accrual_picking",
+        "account_cutoff_accrual_subscription",
+        "account_multicurrency_revaluation",
+        "account_fiscal_year_closing",
+    ],
+    "data": [],
+    "installable": True,
+}
@@ -0,0 +1 @@
+from . import account_cutoff_benchmark
@@ -0,0 +1,649 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import gc
+import logging
+import time
+import tracemalloc
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, release
+from odoo.tools import date_utils
+
+logger = logging.getLogger(__name__)
+
+# Number of source records of each scenario, multiplied by the scale
+DEFAULT_VOLUMES = {
+    "start_end_lines": 1000,
+    "order_lines": 500,
+    "subscriptions": 100,
+    "currency_invoices": 500,
+    "closing_moves": 1000,
+}
+LINES_PER_DOCUMENT = 10
+BENCHMARKED_MODULES = [
+    "account_cutoff_base",
+    "account_cutoff_start_end_dates",
+    "account_cutoff_accrual_picking",
+    "account_cutoff_accrual_subscription",
+    "account_multicurrency_revaluation",
+    "account_fiscal_year_closing",
+]
+
+
+class AccountCutoffBenchmark(models.AbstractModel):
+    _name = "account.cutoff.benchmark"
+    _description = "Benchmark of the Cut-off Modules"
+
+    @api.model
+    def _get_volumes(self, scale=1.0, volumes=None):
+        res = {
+            key: max(int(volume * scale), 1) for key, volume in DEFAULT_VOLUMES.items()
+        }
+        res.update(volumes or {})
+        return res
+
+    @api.model
+    def _get_environment_info(self):
+        modules = self.env["ir.module.module"].search(
+            [("name", "in", BENCHMARKED_MODULES), ("state", "=", "installed")]
+        )
+        return {
+            "odoo": release.version,
+            "postgresql": self.env.cr._cnx.server_version,
+            "modules": {module.name: module.latest_version for module in modules},
+        }
+
+    @api.model
+    def _measure(self, name, volume, func, trace_memory=True):
+        """Run func and return its duration, its number of SQL queries
+        and the peak of the memory allocated by Python while it runs
+
+        The pending updates are flushed before and after func, so that
+        they are counted in the step that made them. Tracing the memory
+        slows down the execution: only compare results obtained with
+        the same value of trace_memory.
+        """
+        self.env["base"].flush()
+        gc.collect()
+        cr = self.env.cr
+        query_count = cr.sql_log_count
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            start = time.perf_counter()
+            func()
+            self.env["base"].flush()
+            duration = time.perf_counter() - start
+            peak = trace_memory and tracemalloc.get_traced_memory()[1] or 0
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+        result = {
+            "name": name,
+            "volume": volume,
+            "duration": round(duration, 3),
+            "queries": cr.sql_log_count - query_count,
+            "peak_memory_kb": peak // 1024,
+        }
+        logger.info(
+            "Benchmark %(name)s on %(volume)d records: %(duration).3f s, "
+            "%(queries)d queries, %(peak_memory_kb)d KiB",
+            result,
+        )
+        return result
+
+    @api.model
+    def _format_results(self, results):
+        header = ("Step", "Volume", "Duration (s)", "Queries", "Peak Memory (KiB)")
+        rows = [header] + [
+            (
+                result["name"],
+                str(result["volume"]),
+                "%.3f" % result["duration"],
+                str(result["queries"]),
+                str(result["peak_memory_kb"]),
+            )
+            for result in results
+        ]
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        return "\n".join(
+            "  ".join(value.ljust(width) for value, width in zip(row, widths))
+            for row in rows
+        )
+
+    # Data generators
+
+    @api.model
+    def _get_cutoff_date(self):
+        """Return the last day of the previous month, because the cut-offs
+        of subscriptions only work at the end of a month"""
+        return fields.Date.context_today(self) + relativedelta(day=1, days=-1)
+
+    @api.model
+    def _get_account(self, code, user_type_xmlid, **vals):
+        company = self.env.company
+        account = self.env["account.account"].search(
+            [("code", "=", code), ("company_id", "=", company.id)], limit=1
+        )
+        if not account:
+            account = self.env["account.account"].create(
+                dict(
+                    vals,
+                    code=code,
+                    name="Benchmark %s" % code,
+                    user_type_id=self.env.ref(user_type_xmlid).id,
+                    company_id=company.id,
+                )
+            )
+        return account
+
+    @api.model
+    def _get_journal(self, journal_type):
+        company = self.env.company
+        journal = self.env["account.journal"].search(
+            [("type", "=", journal_type), ("company_id", "=", company.id)], limit=1
+        )
+        if not journal:
+            journal = self.env["account.journal"].create(
+                {
+                    "name": "Benchmark %s" % journal_type,
+                    "code": "BN%s" % journal_type[:3].upper(),
+                    "type": journal_type,
+                    "company_id": company.id,
+                }
+            )
+        return journal
+
+    @api.model
+    def _create_partners(self, count):
+        return self.env["res.partner"].create(
+            [{"name": "Benchmark Partner %d" % i} for i in range(count)]
+        )
+
+    @api.model
+    def _get_product(self):
+        product = self.env["product.product"].search(
+            [("default_code", "=", "CUTOFF-BENCHMARK")], limit=1
+        )
+        if not product:
+            product = self.env["product.product"].create(
+                {
+                    "name": "Cut-off Benchmark Product",
+                    "default_code": "CUTOFF-BENCHMARK",
+                    "type": "consu",
+                    "purchase_method": "receive",
+                    "invoice_policy": "delivery",
+                    "standard_price": 10,
+                    "list_price": 20,
+                }
+            )
+        return product
+
+    @api.model
+    def _get_cutoff(self, cutoff_type, cutoff_date):
+        """Return a draft cut-off of the type at the date, with the
+        benchmark accounts and journals"""
+        cutoff_obj = self.env["account.cutoff"].with_context(
+            default_cutoff_type=cutoff_type
+        )
+        company = self.env.company
+        cutoff = cutoff_obj.search(
+            [
+                ("company_id", "=", company.id),
+                ("cutoff_type", "=", cutoff_type),
+                ("cutoff_date", "=", cutoff_date),
+            ],
+            limit=1,
+        )
+        if cutoff.move_id:
+            cutoff.move_id.filtered(lambda move: move.state == "posted").button_draft()
+            cutoff.back2draft()
+        vals = {
+            "cutoff_account_id": self._get_account(
+                "BNCCUT", "account.data_account_type_current_liabilities"
+            ).id,
+            "cutoff_journal_id": self._get_journal("general").id,
+        }
+        if cutoff:
+            cutoff.write(vals)
+        else:
+            vals.update(
+                {
+                    "cutoff_type": cutoff_type,
+                    "cutoff_date": cutoff_date,
+                    "company_id": company.id,
+                }
+            )
+            cutoff = cutoff_obj.create(vals)
+        if "source_journal_ids" in cutoff._fields:
+            journal_type = cutoff_type.endswith("revenue") and "sale" or "purchase"
+            cutoff.source_journal_ids = self._get_journal(journal_type)
+        return cutoff
+
+    @api.model
+    def _generate_start_end_invoices(self, volume, cutoff_date):
+        """Create vendor bills whose lines have start and end dates
+        around the cut-off date"""
+        partners = self._create_partners(max(volume // LINES_PER_DOCUMENT, 1))
+        account = self._get_account("BNCEXP", "account.data_account_type_expenses")
+        journal = self._get_journal("purchase")
+        vals_list = []
+        for i in range(0, volume, LINES_PER_DOCUMENT):
+            invoice_index = i // LINES_PER_DOCUMENT
+            lines = []
+            for j in range(i, min(i + LINES_PER_DOCUMENT, volume)):
+                start_date = cutoff_date - relativedelta(days=j % 300)
+                lines.append(
+                    (
+                        0,
+                        0,
+                        {
+                            "name": "Benchmark line %d" % j,
+                            "account_id": account.id,
+                            "quantity": 1,
+                            "price_unit": 100 + j % 1000,
+                            "start_date": start_date,
+                            "end_date": start_date + relativedelta(years=1),
+                            "tax_ids": [(6, 0, [])],
+                        },
+                    )
+                )
+            vals_list.append(
+                {
+                    "move_type": "in_invoice",
+                    "journal_id": journal.id,
+                    "partner_id": partners[invoice_index % len(partners)].id,
+                    "invoice_date": cutoff_date
+                    - relativedelta(days=invoice_index % 28),
+                    "invoice_line_ids": lines,
+                }
+            )
+        invoices = self.env["account.move"].create(vals_list)
+        invoices.action_post()
+        return invoices
+
+    @api.model
+    def _generate_orders(self, volume, order_type, cutoff_date):
+        """Create confirmed orders whose pickings were transferred before
+        the cut-off date and which are not invoiced"""
+        product = self._get_product()
+        partners = self._create_partners(max(volume // LINES_PER_DOCUMENT, 1))
+        vals_list = []
+        for i in range(0, volume, LINES_PER_DOCUMENT):
+            partner = partners[(i // LINES_PER_DOCUMENT) % len(partners)]
+            lines = []
+            for j in range(i, min(i + LINES_PER_DOCUMENT, volume)):
+                line_vals = {
+                    "product_id": product.id,
+                    "name": "Benchmark line %d" % j,
+                    "price_unit": 10 + j % 100,
+                }
+                if order_type == "purchase":
+                    line_vals.update(
+                        {
+                            "product_qty": 1 + j % 10,
+                            "product_uom": product.uom_po_id.id,
+                            "date_planned": fields.Datetime.now(),
+                        }
+                    )
+                else:
+                    line_vals.update(
+                        {
+                            "product_uom_qty": 1 + j % 10,
+                            "product_uom": product.uom_id.id,
+                        }
+                    )
+                lines.append((0, 0, line_vals))
+            vals_list.append({"partner_id": partner.id, "order_line": lines})
+        if order_type == "purchase":
+            orders = self.env["purchase.order"].create(vals_list)
+            orders.button_confirm()
+        else:
+            orders = self.env["sale.order"].create(vals_list)
+            orders.action_confirm()
+        pickings = orders.picking_ids
+        for move in pickings.move_lines:
+            move.quantity_done = move.product_uom_qty
+        pickings._action_done()
+        date_done = fields.Datetime.to_datetime(cutoff_date) - relativedelta(days=1)
+        pickings.write({"date_done": date_done})
+        pickings.move_lines.write({"date": date_done})
+        return orders
+
+    @api.model
+    def _generate_subscriptions(self, volume, cutoff_date):
+        """Create monthly expense subscriptions with a journal item every
+        other month, so that half of the periods get a provision"""
+        company = self.env.company
+        fy_start_date = date_utils.get_fiscal_year(
+            cutoff_date,
+            day=company.fiscalyear_last_day,
+            month=int(company.fiscalyear_last_month),
+        )[0]
+        partners = self._create_partners(volume)
+        account = self._get_account("BNCEXP", "account.data_account_type_expenses")
+        payable = self._get_account(
+            "BNCPAY", "account.data_account_type_payable", reconcile=True
+        )
+        journal = self._get_journal("purchase")
+        subscriptions = self.env["account.cutoff.accrual.subscription"].create(
+            [
+                {
+                    "name": "Benchmark Subscription %d" % i,
+                    "subscription_type": "expense",
+                    "partner_type": "one",
+                    "partner_id": partner.id,
+                    "periodicity": "month",
+                    "start_date": fy_start_date,
+                    "min_amount": 1000,
+                    "provision_amount": 1000,
+                    "account_id": account.id,
+                }
+                for i, partner in enumerate(partners)
+            ]
+        )
+        move_vals_list = []
+        month_start = fy_start_date
+        while month_start <= cutoff_date:
+            for partner in partners:
+                move_vals_list.append(
+                    {
+                        "move_type": "entry",
+                        "journal_id": journal.id,
+                        "date": month_start + relativedelta(days=14),
+                        "line_ids": [
+                            (
+                                0,
+                                0,
+                                {
+                                    "name": "Benchmark subscription expense",
+                                    "account_id": account.id,
+                                    "partner_id": partner.id,
+                                    "debit": 800,
+                                },
+                            ),
+                            (
+                                0,
+                                0,
+                                {
+                                    "name": "Benchmark subscription expense",
+                                    "account_id": payable.id,
+                                    "partner_id": partner.id,
+                                    "credit": 800,
+                                },
+                            ),
+                        ],
+                    }
+                )
+            month_start += relativedelta(months=2)
+        moves = self.env["account.move"].create(move_vals_list)
+        moves.action_post()
+        return subscriptions
+
+    @api.model
+    def _set_currency_rate(self, currency, date, rate):
+        rate_obj = self.env["res.currency.rate"]
+        company = self.env.company
+        currency_rate = rate_obj.search(
+            [
+                ("currency_id", "=", currency.id),
+                ("company_id", "=", company.id),
+                ("name", "=", date),
+            ]
+        )
+        if currency_rate:
+            currency_rate.rate = rate
+        else:
+            rate_obj.create(
+                {
+                    "currency_id": currency.id,
+                    "company_id": company.id,
+                    "name": date,
+                    "rate": rate,
+                }
+            )
+
+    @api.model
+    def _generate_currency_invoices(self, volume, revaluation_date):
+        """Create open customer invoices in a foreign currency, whose rate
+        changed between the invoice date and the revaluation date"""
+        company = self.env.company
+        currency = self.env.ref("base.USD")
+        if currency == company.currency_id:
+            currency = self.env.ref("base.EUR")
+        currency.active = True
+        invoice_date = revaluation_date - relativedelta(days=20)
+        self._set_currency_rate(currency, invoice_date, 1.1)
+        self._set_currency_rate(currency, revaluation_date, 1.3)
+        receivable = self._get_account(
+            "BNCREC",
+            "account.data_account_type_receivable",
+            reconcile=True,
+            currency_revaluation=True,
+        )
+        revenue = self._get_account("BNCREV", "account.data_account_type_revenue")
+        company.write(
+            {
+                "revaluation_loss_account_id": self._get_account(
+                    "BNCRLO", "account.data_account_type_expenses"
+                ).id,
+                "revaluation_gain_account_id": self._get_account(
+                    "BNCRGA", "account.data_account_type_revenue"
+                ).id,
+                "currency_reval_journal_id": self._get_journal("general").id,
+            }
+        )
+        partners = self._create_partners(max(volume // LINES_PER_DOCUMENT, 1))
+        partners.write({"property_account_receivable_id": receivable.id})
+        invoices = self.env["account.move"].create(
+            [
+                {
+                    "move_type": "out_invoice",
+                    "journal_id": self._get_journal("sale").id,
+                    "partner_id": partners[i % len(partners)].id,
+                    "currency_id": currency.id,
+                    "invoice_date": invoice_date,
+                    "invoice_line_ids": [
+                        (
+                            0,
+                            0,
+                            {
+                                "name": "Benchmark line %d" % i,
+                                "account_id": revenue.id,
+                                "quantity": 1,
+                                "price_unit": 100 + i % 1000,
+                                "tax_ids": [(6, 0, [])],
+                            },
+                        )
+                    ],
+                }
+                for i in range(volume)
+            ]
+        )
+        invoices.action_post()
+        return receivable
+
+    @api.model
+    def _generate_closing_moves(self, volume, date_start, date_end):
+        """Create journal entries on revenue and expense accounts
+        during the fiscal year"""
+        revenue = self._get_account("BNCREV", "account.data_account_type_revenue")
+        expense = self._get_account("BNCEXP", "account.data_account_type_expenses")
+        bank = self._get_account("BNCBNK", "account.data_account_type_current_assets")
+        journal = self._get_journal("general")
+        days = (date_end - date_start).days + 1
+        vals_list = []
+        for i in range(volume):
+            account = i % 2 and expense or revenue
+            amount = 100 + i % 1000
+            vals_list.append(
+                {
+                    "move_type": "entry",
+                    "journal_id": journal.id,
+                    "date": date_start + relativedelta(days=i % days),
+                    "line_ids": [
+                        (
+                            0,
+                            0,
+                            {
+                                "name": "Benchmark entry %d" % i,
+                                "account_id": account.id,
+                                "debit": i % 2 and amount or 0,
+                                "credit": not i % 2 and amount or 0,
+                            },
+                        ),
+                        (
+                            0,
+                            0,
+                            {
+                                "name": "Benchmark entry %d" % i,
+                                "account_id": bank.id,
+                                "debit": not i % 2 and amount or 0,
+                                "credit": i % 2 and amount or 0,
+                            },
+                        ),
+                    ],
+                }
+            )
+        moves = self.env["account.move"].create(vals_list)
+        moves.action_post()
+        return moves
+
+    # Scenarios
+
+    @api.model
+    def _benchmark_cutoff(self, name, volume, cutoff, trace_memory=True):
+        return [
+            self._measure(
+                "%s.get_lines" % name, volume, cutoff.get_lines, trace_memory
+            ),
+            self._measure(
+                "%s.create_move" % name, volume, cutoff.create_move, trace_memory
+            ),
+        ]
+
+    @api.model
+    def benchmark_start_end_dates(self, volume, trace_memory=True):
+        cutoff_date = self._get_cutoff_date()
+        self._generate_start_end_invoices(volume, cutoff_date)
+        cutoff = self._get_cutoff("prepaid_expense", cutoff_date)
+        return self._benchmark_cutoff(
+            "start_end_dates", volume, cutoff, trace_memory=trace_memory
+        )
+
+    @api.model
+    def benchmark_accrual_picking(self, volume, trace_memory=True):
+        cutoff_date = self._get_cutoff_date()
+        results = []
+        for order_type, cutoff_type in (
+            ("purchase", "accrued_expense"),
+            ("sale", "accrued_revenue"),
+        ):
+            self._generate_orders(volume, order_type, cutoff_date)
+            cutoff = self._get_cutoff(cutoff_type, cutoff_date)
+            results += self._benchmark_cutoff(
+                "accrual_picking.%s" % order_type,
+                volume,
+                cutoff,
+                trace_memory=trace_memory,
+            )
+        return results
+
+    @api.model
+    def benchmark_accrual_subscription(self, volume, trace_memory=True):
+        cutoff_date = self._get_cutoff_date()
+        self._generate_subscriptions(volume, cutoff_date)
+        cutoff = self._get_cutoff("accrued_expense", cutoff_date)
+        return self._benchmark_cutoff(
+            "accrual_subscription", volume, cutoff, trace_memory=trace_memory
+        )
+
+    @api.model
+    def benchmark_currency_revaluation(self, volume, trace_memory=True):
+        revaluation_date = fields.Date.context_today(self)
+        receivable = self._generate_currency_invoices(volume, revaluation_date)
+        wizard = self.env["wizard.currency.revaluation"].create(
+            {
+                "revaluation_date": revaluation_date,
+                "start_date": revaluation_date - relativedelta(months=1),
+                "journal_id": self._get_journal("general").id,
+                "revaluation_account_ids": [(6, 0, receivable.ids)],
+            }
+        )
+        return [
+            self._measure(
+                "multicurrency_revaluation.revaluate_currency",
+                volume,
+                wizard.revaluate_currency,
+                trace_memory,
+            )
+        ]
+
+    @api.model
+    def benchmark_fiscal_year_closing(self, volume, trace_memory=True):
+        company = self.env.company
+        date_start, date_end = date_utils.get_fiscal_year(
+            fields.Date.context_today(self),
+            day=company.fiscalyear_last_day,
+            month=int(company.fiscalyear_last_month),
+        )
+        self._generate_closing_moves(volume, date_start, date_end)
+        closing_obj = self.env["account.fiscalyear.closing"]
+        closing_obj.search(
+            [
+                ("year", "=", date_end.year),
+                ("company_id", "=", company.id),
+                ("state", "=", "draft"),
+            ]
+        ).unlink()
+        journal = self._get_journal("general")
+        closing = closing_obj.create(
+            {
+                "name": "Benchmark closing",
+                "year": date_end.year,
+                "company_id": company.id,
+                "date_start": date_start,
+                "date_end": date_end,
+                "date_opening": date_end + relativedelta(days=1),
+                "check_draft_moves": False,
+                "move_config_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": "Benchmark Profit & Loss",
+                            "journal_id": journal.id,
+                            "code": "BNCPL",
+                            "move_type": "loss_profit",
+                            "closing_type_default": "balance",
+                            "date": date_end,
+                            "sequence": 1,
+                            "mapping_ids": [
+                                (
+                                    0,
+                                    0,
+                                    {
+                                        "src_accounts": code,
+                                        "dest_account_id": self._get_account(
+                                            "BNCPNL",
+                                            "account.data_account_type_current_assets",
+                                        ).id,
+                                    },
+                                )
+                                for code in ("BNCREV", "BNCEXP")
+                            ],
+                        },
+                    )
+                ],
+            }
+        )
+        return [
+            self._measure(
+                "fiscal_year_closing.calculate",
+                volume,
+                closing.calculate,
+                trace_memory,
+            )
+        ]
@@ -0,0 +1,65 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import json
+import logging
+import os
+
+from odoo.tests import tagged
+from odoo.tests.common import SavepointCase
+
+logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "-at_install", "post_install", "cutoff_benchmark")
+class TestCutoffBenchmark(SavepointCase):
+    """Benchmark of the cut-off modules, see the USAGE section of the README"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.benchmark = cls.env["account.cutoff.benchmark"]
+        cls.volumes = cls.benchmark._get_volumes(
+            scale=float(os.environ.get("CUTOFF_BENCHMARK_SCALE") or 1),
+            volumes=json.loads(os.environ.get("CUTOFF_BENCHMARK_VOLUMES") or "{}"),
+        )
+        cls.trace_memory = os.environ.get("CUTOFF_BENCHMARK_TRACE_MEMORY") != "0"
+        cls.info = cls.benchmark._get_environment_info()
+        cls.results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        results = sorted(cls.results, key=lambda result: result["name"])
+        logger.info(
+            "Cut-off benchmark results:\n%s", cls.benchmark._format_results(results)
+        )
+        output = os.environ.get("CUTOFF_BENCHMARK_OUTPUT")
+        if output:
+            with open(output, "w") as f:
+                json.dump(
+                    dict(cls.info, volumes=cls.volumes, results=results), f, indent=2
+                )
+        super().tearDownClass()
+
+    def _run_benchmark(self, method_name, volume_key):
+        results = getattr(self.benchmark, method_name)(
+            self.volumes[volume_key], trace_memory=self.trace_memory
+        )
+        self.assertTrue(results)
+        self.results.extend(results)
+        return results
+
+    def test_start_end_dates(self):
+        self._run_benchmark("benchmark_start_end_dates", "start_end_lines")
+
+    def test_accrual_picking(self):
+        self._run_benchmark("benchmark_accrual_picking", "order_lines")
+
+    def test_accrual_subscription(self):
+        self._run_benchmark("benchmark_accrual_subscription", "subscriptions")
+
+    def test_currency_revaluation(self):
+        self._run_benchmark("benchmark_currency_revaluation", "currency_invoices")
+
+    def test_fiscal_year_closing(self):
+        self._run_benchmark("benchmark_fiscal_year_closing", "closing_moves")
@@ -1,2 +1,2 @@
 from . import models
-from .hooks import module_migration
+from .hooks import module_migration, uninstall_hook
@@ -5,7 +5,7 @@
 
 {
     "name": "Account Cut-off Start End Dates",
-    "version": "14.0.1.1.0",
+    "version": "14.0.1.2.0",
     "category": "Accounting & Finance",
     "license": "AGPL-3",
     "summary": "Cutoffs based on start/end dates",
@@ -14,7 +14,12 @@
     "website": "https://github.com/OCA/account-closing",
     "depends": ["account_cutoff_base", "account_invoice_start_end_dates"],
     "external_dependencies": {"python": ["openupgradelib"]},
-    "data": ["views/account_cutoff.xml"],
+    "data": [
+        "security/account_cutoff_start_end_dates_security.xml",
+        "security/ir.model.access.csv",
+        "views/account_cutoff.xml",
+        "views/account_cutoff_forecast_bucket.xml",
+    ],
     "images": [
         "images/prepaid_revenue_draft.jpg",
         "images/prepaid_revenue_journal_entry.jpg",
@@ -23,4 +28,5 @@
     "installable": True,
     "application": True,
     "pre_init_hook": "module_migration",
+    "uninstall_hook": "uninstall_hook",
 }
@@ -5,6 +5,13 @@ from openupgradelib import openupgrade
 
 from odoo import SUPERUSER_ID, api
 
+from .models.account_move_line import (
+    CUTOFF_INDEX_NAME,
+    DATE_RANGE_COLUMN,
+    DATE_RANGE_FUNCTION_NAME,
+    DATE_RANGE_TRIGGER_NAME,
+)
+
 
 def module_migration(cr):
     account_cutoff_line_model = "account.cutoff.line"
@@ -38,3 +45,15 @@ def module_migration(cr):
         ]
         env = api.Environment(cr, SUPERUSER_ID, {})
         openupgrade.rename_fields(env, field_renames)
+
+
+def uninstall_hook(cr, registry):
+    cr.execute('DROP INDEX IF EXISTS "%s"' % CUTOFF_INDEX_NAME)
+    cr.execute(
+        'DROP TRIGGER IF EXISTS "%s" ON account_move_line' % DATE_RANGE_TRIGGER_NAME
+    )
+    cr.execute("DROP FUNCTION IF EXISTS %s()" % DATE_RANGE_FUNCTION_NAME)
+    # the GiST index is dropped with the column
+    cr.execute(
+        'ALTER TABLE account_move_line DROP COLUMN IF EXISTS "%s"' % DATE_RANGE_COLUMN
+    )
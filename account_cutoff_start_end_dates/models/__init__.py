@@ -1 +1,3 @@
 from . import account_cutoff
+from . import account_cutoff_forecast_bucket
+from . import account_move_line
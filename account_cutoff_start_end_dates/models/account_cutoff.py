@@ -2,8 +2,30 @@
 # @author: Alexis de Lattre <alexis.delattre@akretion.com>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+import json
+import logging
+
+from dateutil.relativedelta import relativedelta
+
 from odoo import _, api, fields, models
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import str2bool
+
+from .account_move_line import (
+    CUTOFF_INDEX_NAME,
+    DATE_RANGE_COLUMN,
+    DATE_RANGE_INDEX_NAME,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+    logger.debug("Cannot import numpy")
+
+DEFAULT_VECTORIZE_THRESHOLD = 10000
 
 
 class AccountCutoff(models.Model):
@@ -47,6 +69,19 @@ class AccountCutoff(models.Model):
     )
     start_date = fields.Date()
     end_date = fields.Date()
+    forecast_bucket_type = fields.Selection(
+        [("month", "Monthly"), ("quarter", "Quarterly")],
+        string="Forecast Periods",
+        default="month",
+        help="Length of the periods of the forecast matrix, "
+        "which start at the start date of the forecast.",
+    )
+    forecast_bucket_count = fields.Integer(
+        string="Number of Forecast Periods", default=12
+    )
+    forecast_bucket_ids = fields.One2many(
+        "account.cutoff.forecast.bucket", "cutoff_id", string="Forecast Matrix"
+    )
 
     @api.constrains("start_date", "end_date", "forecast")
     def _check_start_end_dates(self):
@@ -59,6 +94,14 @@ class AccountCutoff(models.Model):
             ):
                 raise ValidationError(_("The start date is after the end date!"))
 
+    @api.constrains("forecast_bucket_count")
+    def _check_forecast_bucket_count(self):
+        for rec in self:
+            if rec.forecast_bucket_count < 1:
+                raise ValidationError(
+                    _("The number of forecast periods must be positive.")
+                )
+
     def forecast_enable(self):
         self.ensure_one()
         assert self.state == "draft"
@@ -78,40 +121,64 @@ class AccountCutoff(models.Model):
         self.line_ids.unlink()
         self.write({"forecast": False})
 
-    def _prepare_date_cutoff_line(self, aml, mapping):
+    def _prepare_date_cutoff_line(self, row, mapping):
+        """Return the values of the cut-off line of a source journal item,
+        from its row of _get_date_cutoff_rows()
+
+        The rows computed by the SQL or the NumPy engine already have
+        their number of days and their cut-off amount: the prorating
+        hooks are then not called.
+        """
         self.ensure_one()
-        total_days = (aml.end_date - aml.start_date).days + 1
+        total_days = (row["end_date"] - row["start_date"]).days + 1
         assert total_days > 0, "Should never happen. Total days should always be > 0"
         # we use account mapping here
-        if aml.account_id.id in mapping:
-            cutoff_account_id = mapping[aml.account_id.id]
-        else:
-            cutoff_account_id = aml.account_id.id
         vals = {
             "parent_id": self.id,
-            "origin_move_line_id": aml.id,
-            "partner_id": aml.partner_id.id or False,
-            "name": aml.name,
-            "start_date": aml.start_date,
-            "end_date": aml.end_date,
-            "account_id": aml.account_id.id,
-            "cutoff_account_id": cutoff_account_id,
-            "analytic_account_id": aml.analytic_account_id.id or False,
+            "origin_move_line_id": row["id"],
+            "partner_id": row["partner_id"] or False,
+            "name": row["name"] or False,
+            "start_date": row["start_date"],
+            "end_date": row["end_date"],
+            "account_id": row["account_id"],
+            "cutoff_account_id": mapping.get(row["account_id"], row["account_id"]),
+            "analytic_account_id": row["analytic_account_id"] or False,
             "total_days": total_days,
-            "amount": -aml.balance,
+            "amount": -row["balance"],
             "currency_id": self.company_currency_id.id,
             "tax_line_ids": [],
         }
-        if self.cutoff_type in ["prepaid_expense", "prepaid_revenue"]:
-            self._prepare_date_prepaid_cutoff_line(aml, vals)
+        if "cutoff_amount" in row:
+            vals.update(
+                {
+                    "cutoff_days": row["cutoff_days"],
+                    "cutoff_amount": self.company_currency_id.round(
+                        row["cutoff_amount"]
+                    ),
+                }
+            )
+        elif self.cutoff_type in ["prepaid_expense", "prepaid_revenue"]:
+            self._prepare_date_prepaid_cutoff_line(row, vals)
         elif self.cutoff_type in ["accrued_expense", "accrued_revenue"]:
-            self._prepare_date_accrual_cutoff_line(aml, vals)
+            self._prepare_date_accrual_cutoff_line(row, vals)
+        if row["tax_ids"]:
+            # only read for the accruals with taxes
+            taxes = self.env["account.tax"].browse(row["tax_ids"]).sorted()
+            tax_compute_all_res = self._compute_all_taxes(
+                taxes,
+                vals["cutoff_amount"],
+                product=self.env["product.product"].browse(row["product_id"]),
+                partner=self.env["res.partner"].browse(row["partner_id"]),
+            )
+            vals["tax_line_ids"] = self._prepare_tax_lines(
+                tax_compute_all_res, self.company_currency_id
+            )
         return vals
 
-    def _prepare_date_accrual_cutoff_line(self, aml, vals):
+    def _prepare_date_accrual_cutoff_line(self, row, vals):
         self.ensure_one()
-        start_date_dt = aml.start_date
-        end_date_dt = aml.end_date
+        start_date_dt = row["start_date"]
+        end_date_dt = row["end_date"]
         # Here, we compute the amount of the cutoff
         # That's the important part !
         cutoff_date_dt = self.cutoff_date
@@ -119,7 +186,7 @@ class AccountCutoff(models.Model):
             cutoff_days = vals["total_days"]
         else:
             cutoff_days = (cutoff_date_dt - start_date_dt).days + 1
-        cutoff_amount = -aml.balance * cutoff_days / vals["total_days"]
+        cutoff_amount = -row["balance"] * cutoff_days / vals["total_days"]
         cutoff_amount = self.company_currency_id.round(cutoff_amount)
 
         vals.update(
@@ -129,21 +196,10 @@ class AccountCutoff(models.Model):
             }
         )
 
-        if aml.tax_ids and self.company_id.accrual_taxes:
-            tax_compute_all_res = aml.tax_ids.compute_all(
-                cutoff_amount,
-                product=aml.product_id,
-                partner=aml.partner_id,
-                handle_price_include=False,
-            )
-            vals["tax_line_ids"] = self._prepare_tax_lines(
-                tax_compute_all_res, self.company_currency_id
-            )
-
-    def _prepare_date_prepaid_cutoff_line(self, aml, vals):
+    def _prepare_date_prepaid_cutoff_line(self, row, vals):
         self.ensure_one()
-        start_date_dt = aml.start_date
-        end_date_dt = aml.end_date
+        start_date_dt = row["start_date"]
+        end_date_dt = row["end_date"]
         # Here, we compute the amount of the cutoff
         # That's the important part !
         if self.forecast:
@@ -161,7 +217,7 @@ class AccountCutoff(models.Model):
                 cutoff_days = vals["total_days"]
             else:
                 cutoff_days = (end_date_dt - cutoff_date_dt).days
-        cutoff_amount = aml.balance * cutoff_days / vals["total_days"]
+        cutoff_amount = row["balance"] * cutoff_days / vals["total_days"]
         cutoff_amount = self.company_currency_id.round(cutoff_amount)
 
         vals.update(
@@ -171,13 +227,238 @@ class AccountCutoff(models.Model):
             }
         )
 
-    def get_lines(self):
-        res = super().get_lines()
+    def _get_line_source_key_fields(self):
+        return super()._get_line_source_key_fields() + ["origin_move_line_id"]
+
+    def _use_date_cutoff_sql(self):
+        """Return True if the lines are computed by the SQL engine
+
+        The SQL engine is enabled by the system parameter
+        account_cutoff_start_end_dates.sql_engine. It is not used when
+        another module overrides the preparation of the lines.
+        """
+        self.ensure_one()
+        if not str2bool(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_cutoff_start_end_dates.sql_engine", "False"),
+            default=False,
+        ):
+            return False
+        return not self._date_cutoff_hooks_overridden()
+
+    def _date_cutoff_hooks_overridden(self):
+        """Return True if another module overrides the prorating of the
+        amounts of the lines, which the SQL and the vectorized engines
+        bypass"""
+        return any(
+            self._is_overridden(method_name, AccountCutoff)
+            for method_name in (
+                "_prepare_date_prepaid_cutoff_line",
+                "_prepare_date_accrual_cutoff_line",
+            )
+        )
+
+    def _use_date_cutoff_vectorized(self, count):
+        """Return True if the days and the amounts of the count source
+        journal items are computed with NumPy
+
+        NumPy is used when it is installed and when the number of source
+        journal items reaches the system parameter
+        account_cutoff_start_end_dates.vectorize_threshold (0 disables it).
+        """
+        self.ensure_one()
+        if numpy is None:
+            return False
+        threshold = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(
+                "account_cutoff_start_end_dates.vectorize_threshold",
+                DEFAULT_VECTORIZE_THRESHOLD,
+            )
+        )
+        if not threshold or count < threshold:
+            return False
+        return not self._date_cutoff_hooks_overridden()
+
+    @staticmethod
+    def _round_vectorized(amounts, rounding):
+        """Same as float_round(amount, precision_rounding=rounding) on
+        each amount of the array, with the same HALF-UP tie-breaking"""
+        normalized = amounts / rounding
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            epsilon = 2 ** (numpy.log(numpy.abs(normalized)) / numpy.log(2) - 52)
+        normalized = numpy.where(
+            normalized == 0, 0.0, normalized + numpy.sign(normalized) * epsilon
+        )
+        return numpy.round(normalized) * rounding
+
+    def _get_date_cutoff_vectorized_rows(self, rows):
+        """Add to the rows of _get_date_cutoff_rows() their days and their
+        cut-off amounts, computed with NumPy for all the rows at once"""
+        self.ensure_one()
+        if not rows:
+            return rows
+        start = numpy.array([row["start_date"] for row in rows], dtype="datetime64[D]")
+        end = numpy.array([row["end_date"] for row in rows], dtype="datetime64[D]")
+        balance = numpy.array([row["balance"] for row in rows], dtype=float)
+        total_days = (end - start).astype(int) + 1
+        assert (total_days > 0).all(), "Total days should always be > 0"
+        if self.cutoff_type in ["prepaid_expense", "prepaid_revenue"]:
+            amounts = balance
+            if self.forecast:
+                forecast_start = numpy.datetime64(self.start_date, "D")
+                forecast_end = numpy.datetime64(self.end_date, "D")
+                out_days = numpy.where(
+                    end > forecast_end, (end - forecast_end).astype(int), 0
+                ) + numpy.where(
+                    start < forecast_start, (forecast_start - start).astype(int), 0
+                )
+                cutoff_days = total_days - out_days
+            else:
+                cutoff_date = numpy.datetime64(self.cutoff_date, "D")
+                cutoff_days = numpy.where(
+                    start > cutoff_date, total_days, (end - cutoff_date).astype(int)
+                )
+        else:
+            amounts = -balance
+            cutoff_date = numpy.datetime64(self.cutoff_date, "D")
+            cutoff_days = numpy.where(
+                end <= cutoff_date, total_days, (cutoff_date - start).astype(int) + 1
+            )
+        cutoff_amounts = self._round_vectorized(
+            amounts * cutoff_days / total_days, self.company_currency_id.rounding
+        )
+        for row, row_total_days, row_cutoff_days, cutoff_amount in zip(
+            rows, total_days.tolist(), cutoff_days.tolist(), cutoff_amounts.tolist()
+        ):
+            row.update(
+                {
+                    "total_days": row_total_days,
+                    "cutoff_days": row_cutoff_days,
+                    "cutoff_amount": cutoff_amount,
+                }
+            )
+        return rows
+
+    def _get_date_cutoff_projection(self, domain):
+        """Return the SQL query that selects the columns of the journal
+        items of the domain needed by the cut-off lines, and only them
+
+        The parameters of the domain are inlined, so the query can be
+        completed with named parameters.
+        """
+        self.ensure_one()
         aml_obj = self.env["account.move.line"]
-        line_obj = self.env["account.cutoff.line"]
-        if not self.source_journal_ids:
-            raise UserError(_("You should set at least one Source Journal."))
-        mapping = self._get_mapping_dict()
+        from_clause, where_clause, where_params = self._get_date_cutoff_query(domain)
+        tax_ids = "NULL"
+        if (
+            self.cutoff_type in ["accrued_expense", "accrued_revenue"]
+            and self.company_id.accrual_taxes
+        ):
+            tax_field = aml_obj._fields["tax_ids"]
+            tax_ids = (
+                'ARRAY(SELECT "{column2}" FROM "{relation}" '
+                'WHERE "{column1}" = account_move_line.id)'
+            ).format(
+                relation=tax_field.relation,
+                column1=tax_field.column1,
+                column2=tax_field.column2,
+            )
+        # the parameters of the domain are positional: they are inlined
+        # with mogrify() before the named parameters are added
+        where_clause = self.env.cr.mogrify(where_clause, where_params).decode()
+        return """
+            SELECT
+                account_move_line.id,
+                account_move_line.name,
+                account_move_line.partner_id,
+                account_move_line.account_id,
+                account_move_line.analytic_account_id,
+                account_move_line.product_id,
+                {tax_ids} AS tax_ids,
+                account_move_line.start_date,
+                account_move_line.end_date,
+                account_move_line.balance
+            FROM {from_clause}
+            WHERE {where_clause}
+        """.format(
+            tax_ids=tax_ids,
+            from_clause=from_clause,
+            where_clause=where_clause.replace("%", "%%"),
+        )
+
+    def _get_date_cutoff_rows(self, domain):
+        """Return the source journal items of the domain as lightweight
+        rows (dicts) of the columns needed by the cut-off lines, ordered
+        by ID, without loading the records and their relations"""
+        self.ensure_one()
+        self.env.cr.execute(
+            "SELECT * FROM ({projection}) AS aml ORDER BY id".format(
+                projection=self._get_date_cutoff_projection(domain)
+            )
+        )
+        return self.env.cr.dictfetchall()
+
+    def _get_date_cutoff_sql_rows(self, domain):
+        """Return the rows of _get_date_cutoff_rows(), with their number
+        of days and their cut-off amount computed by PostgreSQL, in the
+        same way as the prorating hooks of _prepare_date_cutoff_line()"""
+        self.ensure_one()
+        params = {
+            "cutoff_date": self.cutoff_date,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "rounding": self.company_currency_id.rounding,
+        }
+        if self.cutoff_type in ["prepaid_expense", "prepaid_revenue"]:
+            sign = 1
+            if self.forecast:
+                cutoff_days = (
+                    "total_days - GREATEST(end_date - %(end_date)s, 0) "
+                    "- GREATEST(%(start_date)s - start_date, 0)"
+                )
+            else:
+                cutoff_days = (
+                    "CASE WHEN start_date > %(cutoff_date)s THEN total_days "
+                    "ELSE end_date - %(cutoff_date)s END"
+                )
+        else:
+            sign = -1
+            cutoff_days = (
+                "CASE WHEN end_date <= %(cutoff_date)s THEN total_days "
+                "ELSE %(cutoff_date)s - start_date + 1 END"
+            )
+        self.env.cr.execute(
+            """
+            SELECT
+                *,
+                ROUND(
+                    {sign} * balance * cutoff_days / total_days
+                    / %(rounding)s::numeric
+                ) * %(rounding)s::numeric AS cutoff_amount
+            FROM (
+                SELECT *, {cutoff_days} AS cutoff_days
+                FROM (
+                    SELECT *, end_date - start_date + 1 AS total_days
+                    FROM ({projection}) AS aml
+                ) AS aml
+            ) AS aml
+            ORDER BY id
+            """.format(
+                sign=sign,
+                cutoff_days=cutoff_days,
+                projection=self._get_date_cutoff_projection(domain),
+            ),
+            params,
+        )
+        return self.env.cr.dictfetchall()
+
+    def _get_date_cutoff_common_domain(self):
+        """Return the domain of the journal items of the source journals
+        of the cut-off, whatever their dates"""
+        self.ensure_one()
         domain = [
             ("journal_id", "in", self.source_journal_ids.ids),
             ("display_type", "=", False),
@@ -188,14 +469,17 @@ class AccountCutoff(models.Model):
             domain.append(("parent_state", "=", "posted"))
         else:
             domain.append(("parent_state", "in", ("draft", "posted")))
+        return domain
 
+    def _get_date_cutoff_domain(self):
+        """Return the domain of the source journal items of the cut-off"""
+        self.ensure_one()
+        domain = self._get_date_cutoff_common_domain()
         if self.cutoff_type in ["prepaid_expense", "prepaid_revenue"]:
             if self.forecast:
-                domain += [
-                    ("start_date", "!=", False),
-                    ("start_date", "<=", self.end_date),
-                    ("end_date", ">=", self.start_date),
-                ]
+                domain += self.env["account.move.line"]._get_date_range_overlap_domain(
+                    self.start_date, self.end_date
+                )
             else:
                 domain += [
                     ("start_date", "!=", False),
@@ -208,9 +492,269 @@ class AccountCutoff(models.Model):
                 ("start_date", "<=", self.cutoff_date),
                 ("date", ">", self.cutoff_date),
             ]
-        amls = aml_obj.search(domain)
-        for aml in amls:
-            line_obj.create(self._prepare_date_cutoff_line(aml, mapping))
+        return domain
+
+    def _get_date_cutoff_query(self, domain):
+        """Return the FROM clause, the WHERE clause and the parameters
+        of the search of the journal items of the domain"""
+        aml_obj = self.env["account.move.line"]
+        aml_obj.flush()
+        query = aml_obj._where_calc(domain)
+        aml_obj._apply_ir_rules(query, "read")
+        return query.get_sql()
+
+    def _get_date_cutoff_index_name(self):
+        """Return the name of the index expected to be used by the search
+        of the source journal items"""
+        self.ensure_one()
+        if self.forecast and self.cutoff_type in [
+            "prepaid_expense",
+            "prepaid_revenue",
+        ]:
+            return DATE_RANGE_INDEX_NAME
+        return CUTOFF_INDEX_NAME
+
+    def _explain_date_cutoff_query(self):
+        """Return the plan of the search of the source journal items
+        and whether it uses the dedicated index"""
+        self.ensure_one()
+        from_clause, where_clause, where_params = self._get_date_cutoff_query(
+            self._get_date_cutoff_domain()
+        )
+        self.env.cr.execute(
+            "EXPLAIN (FORMAT JSON) SELECT account_move_line.id "
+            "FROM %s WHERE %s" % (from_clause, where_clause),
+            where_params,
+        )
+        plan = self.env.cr.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        nodes = []
+        to_visit = [plan[0]["Plan"]]
+        while to_visit:
+            node = to_visit.pop()
+            nodes.append(node)
+            to_visit += node.get("Plans", [])
+        return {
+            "index_used": any(
+                node.get("Index Name") == self._get_date_cutoff_index_name()
+                for node in nodes
+            ),
+            "seq_scan": any(
+                node["Node Type"] == "Seq Scan"
+                and node.get("Relation Name") == "account_move_line"
+                for node in nodes
+            ),
+            "total_cost": plan[0]["Plan"]["Total Cost"],
+            "plan": plan,
+        }
+
+    def button_check_source_index(self):
+        self.ensure_one()
+        res = self._explain_date_cutoff_query()
+        if res["index_used"]:
+            message = _("The search of the source journal items uses the index %s.")
+            notif_type = "success"
+        elif res["seq_scan"]:
+            message = _(
+                "The search of the source journal items doesn't use the index %s: "
+                "PostgreSQL plans a sequential scan of the journal items. "
+                "If the table is big, check that it has been analyzed recently."
+            )
+            notif_type = "warning"
+        else:
+            message = _(
+                "The search of the source journal items doesn't use the index %s, "
+                "PostgreSQL prefers another index."
+            )
+            notif_type = "info"
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": _("Source Journal Items Index"),
+                "message": "%s %s"
+                % (
+                    message % self._get_date_cutoff_index_name(),
+                    _("Estimated cost: %s") % res["total_cost"],
+                ),
+                "type": notif_type,
+                "sticky": False,
+            },
+        }
+
+    def _get_forecast_buckets(self):
+        """Return the list of (start date, end date) of the periods of
+        the forecast matrix"""
+        self.ensure_one()
+        months = self.forecast_bucket_type == "quarter" and 3 or 1
+        return [
+            (
+                self.start_date + relativedelta(months=months * index),
+                self.start_date
+                + relativedelta(months=months * (index + 1))
+                - relativedelta(days=1),
+            )
+            for index in range(self.forecast_bucket_count)
+        ]
+
+    def _get_forecast_matrix_rows(self):
+        """Return the prepaid amounts of the source journal items by
+        period and by account, computed by PostgreSQL in one pass
+
+        The amount of each journal item in each period is rounded as in
+        _prepare_date_prepaid_cutoff_line() in forecast mode, so that the
+        amount of a period is the one of a forecast on that period.
+        """
+        self.ensure_one()
+        buckets = self._get_forecast_buckets()
+        domain = self._get_date_cutoff_common_domain() + self.env[
+            "account.move.line"
+        ]._get_date_range_overlap_domain(buckets[0][0], buckets[-1][1])
+        from_clause, where_clause, where_params = self._get_date_cutoff_query(domain)
+        # the parameters of the domain are positional: they are inlined
+        # with mogrify() before the named parameters are added
+        where_clause = self.env.cr.mogrify(where_clause, where_params).decode()
+        self.env.cr.execute(
+            """
+            SELECT
+                bucket.sequence, bucket.date_start, bucket.date_end,
+                aml.account_id, COUNT(*) AS line_count,
+                SUM(
+                    ROUND(
+                        aml.balance
+                        * (
+                            LEAST(aml.end_date, bucket.date_end)
+                            - GREATEST(aml.start_date, bucket.date_start) + 1
+                        )
+                        / (aml.end_date - aml.start_date + 1)
+                        / %(rounding)s::numeric
+                    ) * %(rounding)s::numeric
+                ) AS amount
+            FROM (
+                SELECT
+                    account_move_line.account_id,
+                    account_move_line.start_date,
+                    account_move_line.end_date,
+                    account_move_line.balance,
+                    account_move_line.{date_range} AS date_range
+                FROM {from_clause}
+                WHERE {where_clause}
+            ) AS aml
+            JOIN (
+                SELECT
+                    step AS sequence,
+                    (%(start_date)s::date + step * %(length)s::interval)::date
+                    AS date_start,
+                    (
+                        %(start_date)s::date + (step + 1) * %(length)s::interval
+                        - interval '1 day'
+                    )::date AS date_end
+                FROM generate_series(0, %(count)s - 1) AS step
+            ) AS bucket
+            ON aml.date_range && daterange(bucket.date_start, bucket.date_end, '[]')
+            GROUP BY
+                bucket.sequence, bucket.date_start, bucket.date_end, aml.account_id
+            ORDER BY bucket.sequence, aml.account_id
+            """.format(
+                date_range=DATE_RANGE_COLUMN,
+                from_clause=from_clause,
+                where_clause=where_clause.replace("%", "%%"),
+            ),
+            {
+                "start_date": self.start_date,
+                "length": self.forecast_bucket_type == "quarter"
+                and "3 months"
+                or "1 month",
+                "count": self.forecast_bucket_count,
+                "rounding": self.company_currency_id.rounding,
+            },
+        )
+        return self.env.cr.dictfetchall()
+
+    def compute_forecast_matrix(self):
+        """Compute the prepaid amounts of the consecutive periods of the
+        forecast matrix, by account, in a single pass over the source
+        journal items"""
+        self.ensure_one()
+        if not self.forecast or self.cutoff_type not in (
+            "prepaid_expense",
+            "prepaid_revenue",
+        ):
+            raise UserError(
+                _("The forecast matrix is only available in forecast mode.")
+            )
+        if not self.start_date:
+            raise UserError(_("The start date of the forecast is not set."))
+        if not self.source_journal_ids:
+            raise UserError(_("You should set at least one Source Journal."))
+        self.forecast_bucket_ids.unlink()
+        mapping = self._get_mapping_dict()
+        ccur = self.company_currency_id
+        vals_list = []
+        for row in self._get_forecast_matrix_rows():
+            if ccur.is_zero(row["amount"]):
+                continue
+            vals_list.append(
+                {
+                    "cutoff_id": self.id,
+                    "sequence": row["sequence"],
+                    "name": "%s / %s" % (row["date_start"], row["date_end"]),
+                    "date_start": row["date_start"],
+                    "date_end": row["date_end"],
+                    "account_id": row["account_id"],
+                    "cutoff_account_id": mapping.get(
+                        row["account_id"], row["account_id"]
+                    ),
+                    "line_count": row["line_count"],
+                    "amount": ccur.round(row["amount"]),
+                }
+            )
+        self.env["account.cutoff.forecast.bucket"].create(vals_list)
+        return self.button_forecast_matrix()
+
+    def button_forecast_matrix(self):
+        self.ensure_one()
+        action = self.env["ir.actions.act_window"]._for_xml_id(
+            "account_cutoff_start_end_dates.account_cutoff_forecast_bucket_action"
+        )
+        action["domain"] = [("cutoff_id", "=", self.id)]
+        return action
+
+    def get_lines(self):
+        res = super().get_lines()
+        if not self.source_journal_ids:
+            raise UserError(_("You should set at least one Source Journal."))
+        if self._is_checkpoint_done("account.move.line"):
+            return res
+        mapping = self._get_mapping_dict()
+        domain = self._get_date_cutoff_domain()
+        position = self._get_checkpoint_position("account.move.line")
+        if position:
+            domain.append(("id", ">", position))
+        if self._use_date_cutoff_sql():
+            with self._profile_phase("search sources"):
+                rows = self._get_date_cutoff_sql_rows(domain)
+        else:
+            with self._profile_phase("search sources"):
+                rows = self._get_date_cutoff_rows(domain)
+            if self._use_date_cutoff_vectorized(len(rows)):
+                with self._profile_phase("vectorized computation"):
+                    self._get_date_cutoff_vectorized_rows(rows)
+        self._check_tax_accrual_accounts(
+            self.env["account.tax"].browse(
+                list({tax_id for row in rows for tax_id in row["tax_ids"] or []})
+            )
+        )
+        with self._get_line_writer(
+            total=len(rows),
+            key_field="origin_move_line_id",
+            checkpoint_source="account.move.line",
+        ) as writer:
+            for row in rows:
+                with self._profile_phase("prepare lines"):
+                    vals = self._prepare_date_cutoff_line(row, mapping)
+                writer.add(vals, position=row["id"])
         return res
 
 
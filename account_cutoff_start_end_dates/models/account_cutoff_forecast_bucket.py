@@ -0,0 +1,36 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from odoo import fields, models
+
+
+class AccountCutoffForecastBucket(models.Model):
+    _name = "account.cutoff.forecast.bucket"
+    _description = "Amount of a Forecast Period on an Account"
+    _order = "cutoff_id, sequence, account_id"
+    _check_company_auto = True
+
+    cutoff_id = fields.Many2one(
+        "account.cutoff",
+        string="Cut-off",
+        required=True,
+        ondelete="cascade",
+        index=True,
+        check_company=True,
+    )
+    company_id = fields.Many2one(related="cutoff_id.company_id", store=True)
+    company_currency_id = fields.Many2one(
+        related="cutoff_id.company_currency_id", string="Company Currency"
+    )
+    sequence = fields.Integer(readonly=True)
+    name = fields.Char(string="Period", readonly=True)
+    date_start = fields.Date(string="Start Date", readonly=True)
+    date_end = fields.Date(string="End Date", readonly=True)
+    account_id = fields.Many2one(
+        "account.account", string="Account", required=True, readonly=True
+    )
+    cutoff_account_id = fields.Many2one(
+        "account.account", string="Cut-off Account", readonly=True
+    )
+    line_count = fields.Integer(string="Journal Items", readonly=True)
+    amount = fields.Monetary(currency_field="company_currency_id", readonly=True)
@@ -0,0 +1,128 @@
+# Copyright 2026 Akretion France (http://www.akretion.com/)
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import logging
+
+from odoo import api, models
+from odoo.tools import sql
+
+logger = logging.getLogger(__name__)
+
+CUTOFF_INDEX_NAME = "account_move_line_cutoff_start_end_dates_index"
+CUTOFF_INDEX_COLUMNS = ["company_id", "journal_id", "start_date", "end_date", "date"]
+DATE_RANGE_COLUMN = "start_end_date_range"
+DATE_RANGE_INDEX_NAME = "account_move_line_start_end_date_range_index"
+DATE_RANGE_FUNCTION_NAME = "account_move_line_start_end_date_range"
+DATE_RANGE_TRIGGER_NAME = "account_move_line_start_end_date_range_trigger"
+
+
+class AccountMoveLine(models.Model):
+    _inherit = "account.move.line"
+
+    def init(self):
+        res = super().init()
+        self._create_cutoff_index()
+        self._create_date_range_column()
+        return res
+
+    def _create_cutoff_index(self):
+        """Create the partial index used by the search of the source
+        journal items of the start/end-date cut-offs, or re-create it
+        if its columns changed"""
+        columns = ", ".join(CUTOFF_INDEX_COLUMNS)
+        self.env.cr.execute(
+            "SELECT indexdef FROM pg_indexes WHERE indexname = %s",
+            (CUTOFF_INDEX_NAME,),
+        )
+        row = self.env.cr.fetchone()
+        if row and "(%s)" % columns in row[0]:
+            return
+        if row:
+            self.env.cr.execute('DROP INDEX "%s"' % CUTOFF_INDEX_NAME)
+        logger.info("Creating index %s on account_move_line", CUTOFF_INDEX_NAME)
+        self.env.cr.execute(
+            'CREATE INDEX "%s" ON account_move_line (%s) '
+            "WHERE start_date IS NOT NULL" % (CUTOFF_INDEX_NAME, columns)
+        )
+
+    def _create_date_range_column(self):
+        """Create the column with the range of the start and end dates of
+        the journal items, the trigger that keeps it in sync with them and
+        its GiST index, used by the searches of the journal items whose
+        dates overlap a period"""
+        cr = self.env.cr
+        if not sql.column_exists(cr, self._table, DATE_RANGE_COLUMN):
+            logger.info("Creating column %s on account_move_line", DATE_RANGE_COLUMN)
+            sql.create_column(cr, self._table, DATE_RANGE_COLUMN, "daterange")
+            cr.execute(
+                """
+                UPDATE account_move_line
+                SET {column} = daterange(start_date, end_date, '[]')
+                WHERE start_date IS NOT NULL
+                AND end_date IS NOT NULL
+                AND start_date <= end_date
+                """.format(
+                    column=DATE_RANGE_COLUMN
+                )
+            )
+        # inconsistent dates are left to the constraint on the journal
+        # items, which raises a proper error after the update
+        cr.execute(
+            """
+            CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+            BEGIN
+                IF NEW.start_date IS NOT NULL
+                AND NEW.end_date IS NOT NULL
+                AND NEW.start_date <= NEW.end_date THEN
+                    NEW.{column} := daterange(NEW.start_date, NEW.end_date, '[]');
+                ELSE
+                    NEW.{column} := NULL;
+                END IF;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+            """.format(
+                function=DATE_RANGE_FUNCTION_NAME, column=DATE_RANGE_COLUMN
+            )
+        )
+        cr.execute(
+            'DROP TRIGGER IF EXISTS "{trigger}" ON account_move_line'.format(
+                trigger=DATE_RANGE_TRIGGER_NAME
+            )
+        )
+        cr.execute(
+            """
+            CREATE TRIGGER "{trigger}"
+            BEFORE INSERT OR UPDATE OF start_date, end_date ON account_move_line
+            FOR EACH ROW EXECUTE PROCEDURE {function}()
+            """.format(
+                trigger=DATE_RANGE_TRIGGER_NAME, function=DATE_RANGE_FUNCTION_NAME
+            )
+        )
+        if not sql.index_exists(cr, DATE_RANGE_INDEX_NAME):
+            logger.info("Creating index %s on account_move_line", DATE_RANGE_INDEX_NAME)
+            cr.execute(
+                'CREATE INDEX "{index}" ON account_move_line USING gist ({column}) '
+                "WHERE {column} IS NOT NULL".format(
+                    index=DATE_RANGE_INDEX_NAME, column=DATE_RANGE_COLUMN
+                )
+            )
+
+    @api.model
+    def _get_date_range_overlap_domain(self, start_date, end_date):
+        """Return the domain of the journal items whose start and end dates
+        overlap the period from start_date to end_date (both included),
+        which uses the GiST index of their date range"""
+        return [
+            (
+                "id",
+                "inselect",
+                (
+                    "SELECT id FROM account_move_line "
+                    "WHERE {column} && daterange(%s, %s, '[]')".format(
+                        column=DATE_RANGE_COLUMN
+                    ),
+                    (start_date, end_date),
+                ),
+            )
+        ]
@@ -5,10 +5,16 @@
 
 
 import time
+from unittest.mock import patch
 
 from odoo import fields
 from odoo.tests.common import SavepointCase
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class TestCutoffPrepaid(SavepointCase):
     @classmethod
@@ -151,3 +157,242 @@ class TestCutoffPrepaid(SavepointCase):
         # two invoices, but two lines (because the two cutoff lines
         # have been grouped into one line plus one counterpart)
         self.assertEqual(len(cutoff.move_id.line_ids), 2)
+
+    def test_update_lines(self):
+        """update the lines incrementally"""
+        amount = self._days("04-01", "06-30")
+        invoice = self._create_invoice(
+            "01-15", amount, start_date="04-01", end_date="06-30"
+        )
+        cutoff = self._create_cutoff("01-31")
+        cutoff.get_lines()
+        line = cutoff.line_ids
+        self.assertEqual(len(line), 1)
+        # nothing changed: the line is kept as is
+        cutoff.update_lines()
+        self.assertEqual(cutoff.line_ids, line)
+        # a new invoice: a new line is created, the first one is kept
+        self._create_invoice("01-16", amount, start_date="04-01", end_date="06-30")
+        cutoff.update_lines()
+        self.assertEqual(len(cutoff.line_ids), 2)
+        self.assertIn(line, cutoff.line_ids)
+        self.assertEqual(amount * 2, cutoff.total_cutoff_amount)
+        # the first invoice is cancelled: its line is deleted
+        invoice.button_draft()
+        invoice.button_cancel()
+        cutoff.update_lines()
+        self.assertEqual(len(cutoff.line_ids), 1)
+        self.assertNotIn(line, cutoff.line_ids)
+        self.assertEqual(amount, cutoff.total_cutoff_amount)
+
+    def _get_line_values(self, cutoff):
+        return sorted(
+            (
+                line.origin_move_line_id.id,
+                line.total_days,
+                line.cutoff_days,
+                line.amount,
+                line.cutoff_amount,
+            )
+            for line in cutoff.line_ids
+        )
+
+    def test_sql_engine(self):
+        """the SQL engine gives the same lines as the Python one"""
+        self._create_invoice("01-15", 1000, start_date="04-01", end_date="06-30")
+        self._create_invoice("01-16", 333.33, start_date="01-10", end_date="03-20")
+        self._create_invoice("01-17", 100.01, start_date="02-01", end_date="12-31")
+        self._create_invoice("01-18", 12.5, start_date="01-01", end_date="01-31")
+        param = self.env["ir.config_parameter"].sudo()
+        for forecast in (False, True):
+            cutoff = self._create_cutoff("01-31")
+            if forecast:
+                cutoff.forecast_enable()
+                cutoff.write(
+                    {"start_date": self._date("02-15"), "end_date": self._date("05-15")}
+                )
+            param.set_param("account_cutoff_start_end_dates.sql_engine", "False")
+            self.assertFalse(cutoff._use_date_cutoff_sql())
+            cutoff.get_lines()
+            python_values = self._get_line_values(cutoff)
+            self.assertTrue(python_values)
+            param.set_param("account_cutoff_start_end_dates.sql_engine", "True")
+            self.assertTrue(cutoff._use_date_cutoff_sql())
+            cutoff.get_lines()
+            self.assertEqual(self._get_line_values(cutoff), python_values)
+
+    def test_vectorized_engine(self):
+        """the NumPy engine gives the same lines as the Python one"""
+        if numpy is None:
+            self.skipTest("NumPy is not installed")
+        self._create_invoice("01-15", 1000, start_date="04-01", end_date="06-30")
+        self._create_invoice("01-16", 333.33, start_date="01-10", end_date="03-20")
+        self._create_invoice("01-17", 100.01, start_date="02-01", end_date="12-31")
+        self._create_invoice("01-18", 12.5, start_date="01-01", end_date="01-31")
+        param = self.env["ir.config_parameter"].sudo()
+        for forecast in (False, True):
+            cutoff = self._create_cutoff("01-31")
+            if forecast:
+                cutoff.forecast_enable()
+                cutoff.write(
+                    {"start_date": self._date("02-15"), "end_date": self._date("05-15")}
+                )
+            param.set_param("account_cutoff_start_end_dates.vectorize_threshold", "0")
+            self.assertFalse(cutoff._use_date_cutoff_vectorized(4))
+            cutoff.get_lines()
+            python_values = self._get_line_values(cutoff)
+            self.assertTrue(python_values)
+            param.set_param("account_cutoff_start_end_dates.vectorize_threshold", "1")
+            self.assertTrue(cutoff._use_date_cutoff_vectorized(4))
+            cutoff.get_lines()
+            self.assertEqual(self._get_line_values(cutoff), python_values)
+
+    def test_prorating_hooks(self):
+        """the prorating hooks receive the rows of the journal items, and
+        their overrides disable the SQL and the NumPy engines"""
+        self._create_invoice("01-15", 1000, start_date="04-01", end_date="06-30")
+        self._create_invoice("01-16", 333.33, start_date="01-10", end_date="03-20")
+        param = self.env["ir.config_parameter"].sudo()
+        param.set_param("account_cutoff_start_end_dates.sql_engine", "True")
+        param.set_param("account_cutoff_start_end_dates.vectorize_threshold", "1")
+        cutoff = self._create_cutoff("01-31")
+        cutoff.get_lines()
+        values = self._get_line_values(cutoff)
+        self.assertTrue(values)
+        cutoff_class = type(cutoff)
+        prepare_prepaid_line = cutoff_class._prepare_date_prepaid_cutoff_line
+        rows = []
+
+        def double_prepaid_line(cutoff, row, vals):
+            rows.append(row)
+            prepare_prepaid_line(cutoff, row, vals)
+            vals["cutoff_amount"] *= 2
+
+        with patch.object(
+            cutoff_class, "_prepare_date_prepaid_cutoff_line", double_prepaid_line
+        ):
+            self.assertFalse(cutoff._use_date_cutoff_sql())
+            self.assertFalse(cutoff._use_date_cutoff_vectorized(2))
+            cutoff.get_lines()
+        self.assertEqual(len(rows), len(values))
+        self.assertEqual(
+            sorted(row["id"] for row in rows),
+            sorted(cutoff.line_ids.mapped("origin_move_line_id").ids),
+        )
+        self.assertAlmostEqual(
+            cutoff.total_cutoff_amount,
+            2 * sum(cutoff_amount for *_values, cutoff_amount in values),
+        )
+
+    def test_source_index(self):
+        """the partial index exists and the plan of the search is reported"""
+        self.cr.execute(
+            "SELECT indexdef FROM pg_indexes WHERE indexname = %s",
+            ("account_move_line_cutoff_start_end_dates_index",),
+        )
+        indexdef = self.cr.fetchone()[0]
+        self.assertIn("WHERE (start_date IS NOT NULL)", indexdef)
+        cutoff = self._create_cutoff("01-31")
+        res = cutoff._explain_date_cutoff_query()
+        self.assertIn("index_used", res)
+        self.assertTrue(res["plan"])
+        action = cutoff.button_check_source_index()
+        self.assertEqual(action["tag"], "display_notification")
+
+    def test_forecast_matrix(self):
+        """each period of the matrix gives the amount of a forecast on it"""
+        self._create_invoice("01-15", 1000, start_date="02-10", end_date="06-30")
+        self._create_invoice("01-16", 333.33, start_date="01-10", end_date="03-20")
+        self._create_invoice("01-17", 100.01, start_date="03-01", end_date="12-31")
+        matrix_cutoff = self._create_cutoff("01-31")
+        matrix_cutoff.forecast_enable()
+        matrix_cutoff.write(
+            {
+                "start_date": self._date("01-01"),
+                "end_date": self._date("12-31"),
+                "forecast_bucket_type": "month",
+                "forecast_bucket_count": 6,
+            }
+        )
+        matrix_cutoff.compute_forecast_matrix()
+        buckets = matrix_cutoff.forecast_bucket_ids
+        self.assertEqual(set(buckets.mapped("sequence")), set(range(6)))
+        for start_date, end_date in matrix_cutoff._get_forecast_buckets():
+            cutoff = self._create_cutoff("01-31")
+            cutoff.forecast_enable()
+            cutoff.write({"start_date": start_date, "end_date": end_date})
+            cutoff.get_lines()
+            self.assertAlmostEqual(
+                sum(
+                    buckets.filtered(lambda b: b.date_start == start_date).mapped(
+                        "amount"
+                    )
+                ),
+                cutoff.total_cutoff_amount,
+            )
+
+    def test_date_range_column(self):
+        """the date range of the journal items follows their dates and
+        is used to find the ones which overlap a period"""
+        invoice = self._create_invoice(
+            "01-15", 1000, start_date="04-01", end_date="06-30"
+        )
+        aml = invoice.invoice_line_ids
+        aml_obj = self.env["account.move.line"]
+
+        def overlapping(start_date, end_date):
+            return aml_obj.search(
+                [("id", "=", aml.id)]
+                + aml_obj._get_date_range_overlap_domain(
+                    self._date(start_date), self._date(end_date)
+                )
+            )
+
+        self.assertTrue(overlapping("06-30", "07-31"))
+        self.assertFalse(overlapping("07-01", "07-31"))
+        aml.write({"start_date": self._date("07-01"), "end_date": self._date("07-10")})
+        aml.flush()
+        self.assertTrue(overlapping("07-01", "07-31"))
+        self.assertFalse(overlapping("06-30", "06-30"))
+
+    def test_resume_from_checkpoint(self):
+        """a failed background generation resumes after its last chunk"""
+        for day in ("15", "16", "17"):
+            self._create_invoice("01-" + day, 100, start_date="04-01", end_date="06-30")
+        self.env["ir.config_parameter"].sudo().set_param(
+            "account_cutoff_base.line_batch_size", "1"
+        )
+        cutoff = self._create_cutoff("01-31")
+        cutoff_class = type(cutoff)
+        prepare_line = cutoff_class._prepare_date_cutoff_line
+        prepared_rows = []
+
+        def failing_prepare_line(cutoff, row, mapping):
+            if len(prepared_rows) == 2:
+                raise ValueError("Interrupted")
+            prepared_rows.append(row)
+            return prepare_line(cutoff, row, mapping)
+
+        self.registry.enter_test_mode(self.cr)
+        self.addCleanup(self.registry.leave_test_mode)
+        cutoff.get_lines_async()
+        with patch.object(
+            cutoff_class, "_prepare_date_cutoff_line", failing_prepare_line
+        ):
+            self.env["account.cutoff.job"]._cron_run_jobs()
+        cutoff.invalidate_cache()
+        self.assertEqual(cutoff.job_ids[0].state, "failed")
+        self.assertEqual(cutoff.state, "draft")
+        self.assertEqual(len(cutoff.line_ids), 2)
+        self.assertEqual(
+            cutoff._get_generation_checkpoint()["positions"]["account.move.line"],
+            prepared_rows[-1]["id"],
+        )
+        cutoff.get_lines_async()
+        self.env["account.cutoff.job"]._cron_run_jobs()
+        cutoff.invalidate_cache()
+        self.assertEqual(cutoff.job_ids[0].state, "done")
+        self.assertEqual(len(cutoff.line_ids), 3)
+        self.assertEqual(len(cutoff.line_ids.origin_move_line_id), 3)
+        self.assertFalse(cutoff.generation_checkpoint)
+        self.assertEqual(300, cutoff.total_cutoff_amount)
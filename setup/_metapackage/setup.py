@@ -11,6 +11,7 @@ setuptools.setup(
         'odoo14-addon-account_cutoff_accrual_picking',
         'odoo14-addon-account_cutoff_accrual_subscription',
         'odoo14-addon-account_cutoff_base',
+        'odoo14-addon-account_cutoff_benchmark',
         'odoo14-addon-account_cutoff_start_end_dates',
         'odoo14-addon-account_fiscal_year_closing',
         'odoo14-addon-account_invoice_start_end_dates',